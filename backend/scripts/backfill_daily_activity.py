@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Backfill user_daily_activity from user_word_events written before the rollup
+existed.
+
+Events with id > rollup_state.live_from_event_id are counted when they are
+written. This script walks older events in id order, in chunks, starting at
+rollup_state.last_event_id, and commits the rollup together with the new
+high-water mark. It can be interrupted and re-run at any time; it resumes
+from the last committed chunk. The high-water mark is advanced with a
+compare-and-set, so concurrent runs cannot count a chunk twice.
+
+The boundary is not exact. live_from_event_id is max(id) when the first
+process started, but ids are allocated on insert and rows become visible on
+commit: an event from a transaction open at that moment can get an id below
+the marker and still be counted live (the backfill counts it again), and an
+event written by a not-yet-upgraded process during a rolling deploy gets an
+id above the marker without being counted. Once the deploy days are over,
+re-run with --reconcile-from/--reconcile-to to rebuild those days from the
+raw events; only past days (UTC) are accepted, so live writes cannot race
+the rebuild.
+
+Usage:
+    python -m scripts.backfill_daily_activity [--chunk-size 10000]
+    python -m scripts.backfill_daily_activity --reconcile-from 2024-05-01 [--reconcile-to 2024-05-02]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import select, update
+
+from src.database import async_session_maker
+from src.models.word import UserWordEvent, RollupState
+from src.services.activity import DAILY_ACTIVITY_ROLLUP, add_daily_activity, ensure_rollup_state, rebuild_daily_activity
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(chunk_size: int):
+    started = time.monotonic()
+    processed = 0
+    async with async_session_maker() as session:
+        state = await ensure_rollup_state(session)
+        live_from = state.live_from_event_id
+        logger.info(f"Backfilling events {state.last_event_id + 1}..{live_from}")
+
+        while True:
+            last_event_id = (await session.execute(
+                select(RollupState.last_event_id)
+                .where(RollupState.name == DAILY_ACTIVITY_ROLLUP)
+            )).scalar_one()
+            if last_event_id >= live_from:
+                break
+
+            result = await session.execute(
+                select(
+                    UserWordEvent.id,
+                    UserWordEvent.user_id,
+                    UserWordEvent.event_type,
+                    UserWordEvent.is_correct,
+                    UserWordEvent.timestamp,
+                )
+                .where(UserWordEvent.id > last_event_id, UserWordEvent.id <= live_from)
+                .order_by(UserWordEvent.id)
+                .limit(chunk_size)
+            )
+            events = [row._asdict() for row in result.all()]
+            chunk_end = events[-1]["id"] if events else live_from
+
+            await add_daily_activity(session, events)
+            moved = await session.execute(
+                update(RollupState)
+                .where(
+                    RollupState.name == DAILY_ACTIVITY_ROLLUP,
+                    RollupState.last_event_id == last_event_id,
+                )
+                .values(last_event_id=chunk_end)
+            )
+            if moved.rowcount != 1:
+                # Этот участок уже обработал другой запуск
+                await session.rollback()
+                continue
+            await session.commit()
+
+            processed += len(events)
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Up to event {chunk_end}/{live_from}: {processed} events, "
+                f"{processed / elapsed if elapsed else 0:.0f} events/s"
+            )
+
+    logger.info(f"Backfill complete: {processed} events")
+
+
+async def reconcile(day_from: date, day_to: date):
+    async with async_session_maker() as session:
+        rows = await rebuild_daily_activity(session, day_from, day_to)
+    logger.info(f"Rebuilt daily activity for {day_from}..{day_to}: {rows} user-days")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily activity rollup")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Events per transaction")
+    parser.add_argument("--reconcile-from", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--reconcile-to", type=date.fromisoformat, help="Last day to rebuild, defaults to --reconcile-from")
+    args = parser.parse_args()
+    if args.reconcile_from is None:
+        asyncio.run(backfill(args.chunk_size))
+    else:
+        day_to = args.reconcile_to or args.reconcile_from
+        if day_to >= datetime.utcnow().date():
+            sys.exit("Only past days can be rebuilt: events for today are still being counted live")
+        asyncio.run(reconcile(args.reconcile_from, day_to))
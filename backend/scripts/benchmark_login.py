@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for login throughput and event-loop stalls.
+
+Seeds a scratch SQLite database with users, then fires concurrent
+POST /api/auth/jwt/login requests at the app in-process. A heartbeat task
+sleeps for a few milliseconds in a loop and records how late it wakes up:
+while a password is hashed on the event loop, every other request waits
+for it. Each run is repeated with hashing inline (PASSWORD_HASH_WORKERS=0)
+and on thread pools of the given sizes.
+
+Usage:
+    python -m scripts.benchmark_login [--users 20] [--requests 100] [--concurrency 20] [--workers 1,2,4,8]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# База приложения должна быть задана до импорта src
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+
+import httpx
+from sqlalchemy import insert
+
+from src.auth import passwords
+from src.database import async_session_maker, engine
+from src.main import app
+from src.models.models import Base, User
+
+PASSWORD = "benchmark-password"
+HEARTBEAT_INTERVAL = 0.005
+
+
+async def seed(count):
+    """Создает count пользователей с одинаковым паролем"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    hashed = await passwords.hash_password(PASSWORD)
+    emails = [f"bench-{i}@example.com" for i in range(count)]
+    async with async_session_maker() as session:
+        await session.execute(insert(User), [
+            {
+                "email": email,
+                "username": email.split("@")[0],
+                "hashed_password": hashed,
+                "is_active": True,
+                "is_verified": True,
+                "is_superuser": False,
+            }
+            for email in emails
+        ])
+        await session.commit()
+    return emails
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list):
+    """Запоминает, насколько позже положенного просыпается цикл событий"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        stalls.append(time.perf_counter() - started - HEARTBEAT_INTERVAL)
+
+
+async def run(client, emails, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def login(i):
+        nonlocal failures
+        async with semaphore:
+            response = await client.post(
+                "/api/auth/jwt/login",
+                data={"username": emails[i % len(emails)], "password": PASSWORD},
+            )
+            if response.status_code != 200:
+                failures += 1
+
+    stop = asyncio.Event()
+    stalls = []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return requests / elapsed, max(stalls, default=0.0) * 1000, failures
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument("--users", type=int, default=20, help="Users to seed")
+    parser.add_argument("--requests", type=int, default=100, help="Logins per run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Logins in flight")
+    parser.add_argument("--workers", type=str, default="1,2,4,8", help="Thread pool sizes, comma separated")
+    args = parser.parse_args()
+
+    emails = await seed(args.users)
+    print(f"scheme: {type(passwords.password_helper.password_hash.hashers[0]).__name__}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        print(f"{'workers':>8} {'logins/s':>10} {'max stall, ms':>14} {'failed':>7}")
+        for workers in [0] + [int(w) for w in args.workers.split(",")]:
+            executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+            passwords._executor = executor
+            rate, stall, failures = await run(client, emails, args.requests, args.concurrency)
+            print(f"{workers or 'inline':>8} {rate:>10.1f} {stall:>14.1f} {failures:>7}")
+            if executor is not None:
+                executor.shutdown()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
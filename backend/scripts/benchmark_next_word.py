@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark for next-word candidate scoring.
+
+Seeds a scratch database with wordsets of growing size, a single user that
+has progress on half of the words, and measures the latency of
+pick_next_word_id (cached candidate list, one progress query) against the
+legacy approach that issued one WordProgress query per candidate.
+
+Usage:
+    python -m scripts.benchmark_next_word [--sizes 100,1000,10000,50000] [--repeat 20] [--legacy-max 5000] [--db-url URL]
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.models.models import Base, User, WordSet, user_wordset, wordset_word
+from src.models.word import Word, WordProgress
+from src.services.catalog import catalog_cache
+from src.services.selection import pick_next_word_id, word_age, selection_weight
+
+
+async def legacy_pick_next_word_id(session, user_id, current_position, alpha=2.0):
+    """Старый вариант: отдельный запрос WordProgress для каждого кандидата"""
+    candidates = (await session.execute(
+        select(Word.id).where(Word.id.in_(
+            select(wordset_word.c.word_id).where(wordset_word.c.wordset_id.in_(
+                select(user_wordset.c.wordset_id).where(user_wordset.c.user_id == user_id)
+            ))
+        ))
+    )).scalars().all()
+    weights = []
+    for word_id in candidates:
+        progress = (await session.execute(
+            select(WordProgress)
+            .where(WordProgress.user_id == user_id)
+            .where(WordProgress.word_id == word_id)
+        )).scalars().first()
+        if progress is None:
+            weight = selection_weight(word_age(current_position, None), 0.5, alpha)
+        else:
+            weight = selection_weight(
+                word_age(current_position, progress.last_shown_position),
+                progress.exp_error_rate,
+                alpha,
+            )
+        weights.append((word_id, weight))
+    return max(weights, key=lambda x: x[1])[0] if weights else None
+
+
+async def seed(session_maker, size):
+    """Создает набор из size слов и пользователя с прогрессом по половине из них"""
+    async with session_maker() as session:
+        user = User(
+            email=f"bench-{uuid.uuid4()}@example.com",
+            username=f"bench-{uuid.uuid4()}",
+            hashed_password="x",
+            words_shown_counter=size,
+        )
+        wordset = WordSet(name=f"bench-{size}")
+        session.add_all([user, wordset])
+        await session.flush()
+
+        word_ids = (await session.execute(
+            insert(Word).returning(Word.id),
+            [{"english": f"word{i}", "russian": f"слово{i}"} for i in range(size)],
+        )).scalars().all()
+        await session.execute(
+            insert(wordset_word),
+            [{"wordset_id": wordset.id, "word_id": word_id} for word_id in word_ids],
+        )
+        await session.execute(
+            insert(user_wordset).values(user_id=user.id, wordset_id=wordset.id)
+        )
+        await session.execute(
+            insert(WordProgress),
+            [
+                {
+                    "user_id": user.id,
+                    "word_id": word_id,
+                    "shown_count": 1,
+                    "last_shown_position": i,
+                    "exp_error_rate": (i % 10) / 10,
+                }
+                for i, word_id in enumerate(word_ids[::2])
+            ],
+        )
+        await session.commit()
+        return user.id
+
+
+async def measure(session_maker, pick, user_id, size, repeat):
+    timings = []
+    async with session_maker() as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await pick(session, user_id, size)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark next-word candidate scoring")
+    parser.add_argument("--sizes", type=str, default="100,1000,10000,50000", help="Wordset sizes, comma separated")
+    parser.add_argument("--repeat", type=int, default=20, help="Measurements per size")
+    parser.add_argument("--legacy-max", type=int, default=5000, help="Largest size to run the legacy per-candidate scoring on")
+    parser.add_argument("--db-url", type=str, help="Async database URL (defaults to a temporary SQLite file)")
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if not db_url:
+        db_url = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"{'words':>8} {'set-based, ms':>15} {'legacy, ms':>12}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        user_id = await seed(session_maker, size)
+        # Слова добавлены в обход API — перечитываем каталог
+        catalog_cache.invalidate()
+        current = await measure(session_maker, pick_next_word_id, user_id, size, args.repeat)
+        legacy = "-"
+        if size <= args.legacy_max:
+            legacy_ms = await measure(session_maker, legacy_pick_next_word_id, user_id, size, max(1, args.repeat // 10))
+            legacy = f"{legacy_ms:.1f}"
+        print(f"{size:>8} {current:>15.1f} {legacy:>12}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
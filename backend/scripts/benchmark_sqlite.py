@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark for SQLite under concurrent reads and writes.
+
+Runs the same workload against a scratch SQLite file twice: with the
+default engine (rollback journal, one pool for everything) and with
+SQLITE_WAL_MODE (WAL, pragmas, read pool and a single writer connection,
+see src/sqlite_mode.py). Each simulated client loops over requests; a
+write is what /api/words/next does to the database (reserve a position,
+upsert WordProgress, record a "shown" event with its daily rollup), a read
+loads the user's progress and event count. Reports throughput, write
+latency percentiles and "database is locked" failures.
+
+Usage:
+    python -m scripts.benchmark_sqlite [--clients 50] [--requests 40] [--write-ratio 0.5] [--users 20]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.models.models import Base, User
+from src.models.word import Word, WordProgress, UserWordEvent
+from src.services.events import record_events, make_event
+from src.services.selection import reserve_positions
+from src.sqlite_mode import create_sqlite_engines
+
+WORDS = 200
+
+
+async def seed(session_maker, users):
+    async with session_maker() as session:
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        await session.execute(insert(User), [
+            {
+                "id": user_id,
+                "email": f"bench-{user_id}@example.com",
+                "username": f"bench-{user_id}",
+                "hashed_password": "x",
+                "words_shown_counter": 0,
+            }
+            for user_id in user_ids
+        ])
+        word_ids = (await session.execute(
+            insert(Word).returning(Word.id),
+            [{"english": f"word{i}", "russian": f"слово{i}"} for i in range(WORDS)],
+        )).scalars().all()
+        await session.commit()
+    return user_ids, word_ids
+
+
+async def show_word(session_maker, user_id, word_id):
+    """Записи одного показа слова, как в /api/words/next"""
+    async with session_maker() as session:
+        position = await reserve_positions(session, user_id)
+        stmt = sqlite.insert(WordProgress).values(
+            user_id=user_id, word_id=word_id, shown_count=1, last_shown_position=position
+        )
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[WordProgress.user_id, WordProgress.word_id],
+            set_={
+                "shown_count": WordProgress.shown_count + 1,
+                "last_shown_position": position,
+            },
+        ))
+        await record_events(session, [make_event(user_id, word_id, "shown")])
+        await session.commit()
+
+
+async def read_progress(session_maker, user_id):
+    async with session_maker() as session:
+        (await session.execute(
+            select(WordProgress).where(WordProgress.user_id == user_id)
+        )).scalars().all()
+        await session.execute(
+            select(func.count()).select_from(UserWordEvent).where(UserWordEvent.user_id == user_id)
+        )
+
+
+async def run_mode(name, wal, args):
+    url = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+    if wal:
+        read_engine, write_engine = create_sqlite_engines(url)
+    else:
+        read_engine = write_engine = create_async_engine(url)
+    async with write_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    read_maker = async_sessionmaker(read_engine, expire_on_commit=False)
+    write_maker = async_sessionmaker(write_engine, expire_on_commit=False)
+    user_ids, word_ids = await seed(write_maker, args.users)
+
+    rng = random.Random(42)
+    write_latencies = []
+    read_latencies = []
+    locked = 0
+
+    async def client():
+        nonlocal locked
+        for _ in range(args.requests):
+            user_id = rng.choice(user_ids)
+            started = time.perf_counter()
+            try:
+                if rng.random() < args.write_ratio:
+                    await show_word(write_maker, user_id, rng.choice(word_ids))
+                    write_latencies.append(time.perf_counter() - started)
+                else:
+                    await read_progress(read_maker, user_id)
+                    read_latencies.append(time.perf_counter() - started)
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    def percentile(values, q):
+        if len(values) < 2:
+            return values[0] * 1000 if values else 0.0
+        return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+    done = len(write_latencies) + len(read_latencies)
+    print(
+        f"{name:>8} {done / elapsed:>8.0f} {percentile(write_latencies, 50):>9.1f} "
+        f"{percentile(write_latencies, 99):>9.1f} {percentile(read_latencies, 50):>9.1f} "
+        f"{percentile(read_latencies, 99):>9.1f} {locked:>7}"
+    )
+
+    await read_engine.dispose()
+    if write_engine is not read_engine:
+        await write_engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite concurrency modes")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.5, help="Share of write requests")
+    parser.add_argument("--users", type=int, default=20, help="Users to spread requests over")
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'req/s':>8} {'write p50':>9} {'write p99':>9} {'read p50':>9} {'read p99':>9} {'locked':>7}")
+    await run_mode("default", False, args)
+    await run_mode("wal", True, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Create the test user (testuser@example.com / testpass) if it does not exist.
+
+With STARTUP_MODE=fast the application no longer seeds the test user on
+every start; run this once after `python -m scripts.migrate` on
+environments that need it.
+
+Usage:
+    python -m scripts.create_test_user
+"""
+import asyncio
+import logging
+
+from src.database import seed_test_user, engine
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    await seed_test_user()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
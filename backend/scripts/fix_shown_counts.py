@@ -3,13 +3,28 @@
 Script to fix shown_count values in the WordProgress table.
 This corrects the double-counting bug by setting shown_count to the actual number of 'shown' events.
 
+The repair is set-based and runs in chunks of users: for each chunk a single
+UPDATE ... FROM counts 'shown' events per progress row and applies the rows
+whose count differs. The update is a compare-and-set: a row is only written
+if its shown_count still equals the value the count was compared against,
+so a show committed while the statement runs is not overwritten. Each chunk
+is its own short transaction.
+
+Shows are counted from user_word_events, so every show must already have its
+event in the table. With EVENT_BUFFER_ENABLED, events wait in the
+application's memory after shown_count is committed, and the script would
+lower correct counts. Disable the event buffer (or stop the application, which
+drains it) before running without --dry-run.
+
 Usage:
-    python fix_shown_counts.py
+    python -m scripts.fix_shown_counts [--dry-run] [--users-per-chunk 100] [--pause 0.1]
 """
+import argparse
 import asyncio
 import sys
+import time
 import logging
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, and_
 from pydantic_settings import BaseSettings
 
 # Set up logging
@@ -32,60 +47,106 @@ logger.info(f"Using database from environment variables or .env file")
 from src.database import async_session_maker
 from src.models.word import WordProgress, UserWordEvent
 
-async def fix_shown_counts():
+# Сколько расхождений показывать в режиме --dry-run на одну порцию
+DRY_RUN_SHOW = 20
+
+def shown_count_diff(user_ids):
+    """
+    Progress rows of the given users whose shown_count differs from the number
+    of 'shown' events: (id, user_id, word_id, old shown_count, actual count).
+    """
+    actual = func.count(UserWordEvent.id)
+    return (
+        select(
+            WordProgress.id,
+            WordProgress.user_id,
+            WordProgress.word_id,
+            WordProgress.shown_count,
+            actual.label("actual_shown_count"),
+        )
+        .outerjoin(
+            UserWordEvent,
+            and_(
+                UserWordEvent.user_id == WordProgress.user_id,
+                UserWordEvent.word_id == WordProgress.word_id,
+                UserWordEvent.event_type == 'shown',
+            ),
+        )
+        .where(WordProgress.user_id.in_(user_ids))
+        .group_by(WordProgress.id, WordProgress.user_id, WordProgress.word_id, WordProgress.shown_count)
+        .having(actual != func.coalesce(WordProgress.shown_count, -1))
+    )
+
+async def fix_shown_counts(users_per_chunk: int = 100, dry_run: bool = False, pause: float = 0.0):
     """Fix shown_count values in the WordProgress table."""
     try:
         async with async_session_maker() as session:
-            # Get all user-word pairs that have progress records
-            query = select(WordProgress.user_id, WordProgress.word_id)
-            result = await session.execute(query)
-            user_word_pairs = result.all()
-            
-            count_fixed = 0
-            total_records = len(user_word_pairs)
-            logger.info(f"Found {total_records} WordProgress records to check")
-            
-            for user_id, word_id in user_word_pairs:
-                # Count actual 'shown' events for this user-word pair
-                event_count_query = select(func.count()).where(
-                    UserWordEvent.user_id == user_id,
-                    UserWordEvent.word_id == word_id,
-                    UserWordEvent.event_type == 'shown'
-                )
-                event_count_result = await session.execute(event_count_query)
-                actual_shown_count = event_count_result.scalar() or 0
-                
-                # Get the current progress record
-                progress_query = select(WordProgress).where(
-                    WordProgress.user_id == user_id,
-                    WordProgress.word_id == word_id
+            total_users = (await session.execute(
+                select(func.count(func.distinct(WordProgress.user_id)))
+            )).scalar()
+            logger.info(f"Checking WordProgress records of {total_users} users"
+                        f"{' (dry run)' if dry_run else ''}")
+
+            started = time.monotonic()
+            last_user_id = None
+            users_done = count_fixed = 0
+            while True:
+                # Следующая порция пользователей по возрастанию id
+                query = select(WordProgress.user_id).distinct().order_by(WordProgress.user_id).limit(users_per_chunk)
+                if last_user_id is not None:
+                    query = query.where(WordProgress.user_id > last_user_id)
+                user_ids = (await session.execute(query)).scalars().all()
+                if not user_ids:
+                    break
+                last_user_id = user_ids[-1]
+
+                if dry_run:
+                    diff = (await session.execute(shown_count_diff(user_ids))).all()
+                    for _, user_id, word_id, old_count, actual_count in diff[:DRY_RUN_SHOW]:
+                        logger.info(f"Would fix user {user_id}, word {word_id}: {old_count} → {actual_count}")
+                    fixed = len(diff)
+                    await session.rollback()
+                else:
+                    diff = shown_count_diff(user_ids).subquery()
+                    result = await session.execute(
+                        update(WordProgress)
+                        .where(
+                            WordProgress.id == diff.c.id,
+                            # Показ, закоммиченный после подсчета, не перезаписываем
+                            WordProgress.shown_count.is_not_distinct_from(diff.c.shown_count),
+                        )
+                        .values(shown_count=diff.c.actual_shown_count)
+                        .execution_options(synchronize_session=False)
+                    )
+                    fixed = result.rowcount
+                    await session.commit()
+
+                users_done += len(user_ids)
+                count_fixed += fixed
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"{users_done}/{total_users} users, {count_fixed} records "
+                    f"{'to fix' if dry_run else 'fixed'}, {users_done / elapsed if elapsed else 0:.0f} users/s"
                 )
-                progress_result = await session.execute(progress_query)
-                progress = progress_result.scalar_one_or_none()
-                
-                if progress and progress.shown_count != actual_shown_count:
-                    # Update the shown_count to the correct value
-                    old_count = progress.shown_count
-                    progress.shown_count = actual_shown_count
-                    count_fixed += 1
-                    logger.info(f"Fixed user {user_id}, word {word_id}: {old_count} → {actual_shown_count}")
-            
-            await session.commit()
-            logger.info(f"Fixed {count_fixed} out of {total_records} records")
+                if pause:
+                    # Даем место рабочей нагрузке между порциями
+                    await asyncio.sleep(pause)
+
+            logger.info(f"{'Would fix' if dry_run else 'Fixed'} {count_fixed} records")
             
             # Additional check for records where shown_count is approximately twice correct_count + error_count
             # This helps identify records that might still be affected by the double-counting bug
-            query = select(WordProgress).where(
-                WordProgress.shown_count > (WordProgress.correct_count + WordProgress.error_count) * 1.8
-            )
-            result = await session.execute(query)
-            suspicious_records = result.scalars().all()
+            suspicious = WordProgress.shown_count > (WordProgress.correct_count + WordProgress.error_count) * 1.8
+            suspicious_count = (await session.execute(
+                select(func.count()).select_from(WordProgress).where(suspicious)
+            )).scalar()
             
-            if suspicious_records:
-                logger.warning(f"Found {len(suspicious_records)} suspicious records where shown_count is much higher than correct_count + error_count")
+            if suspicious_count:
+                logger.warning(f"Found {suspicious_count} suspicious records where shown_count is much higher than correct_count + error_count")
                 logger.warning("You may want to manually review these records or run this script again")
                 
-                for record in suspicious_records[:10]:  # Show first 10 as examples
+                result = await session.execute(select(WordProgress).where(suspicious).limit(10))
+                for record in result.scalars():  # Show first 10 as examples
                     logger.warning(f"User {record.user_id}, Word {record.word_id}: shown={record.shown_count}, correct={record.correct_count}, error={record.error_count}")
             
             return count_fixed
@@ -95,4 +156,9 @@ async def fix_shown_counts():
         raise
 
 if __name__ == "__main__":
-    asyncio.run(fix_shown_counts())
+    parser = argparse.ArgumentParser(description="Fix WordProgress.shown_count from 'shown' events")
+    parser.add_argument("--dry-run", action="store_true", help="Report differences without updating")
+    parser.add_argument("--users-per-chunk", type=int, default=100, help="Users per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+    args = parser.parse_args()
+    asyncio.run(fix_shown_counts(args.users_per_chunk, args.dry_run, args.pause))
@@ -1,57 +1,231 @@
 #!/usr/bin/env python3
+import csv
 import json
+import time
 import logging
 import asyncio
 import argparse
 from pathlib import Path
-from gtts import gTTS
-from sqlalchemy import select
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Локальные импорты
 from src.database import create_db_and_tables, async_session_maker
 from src.models.word import Word
 from src.models.models import WordSet, wordset_word
+from src.services.catalog import bump_catalog_version
+from src.services.tts import AudioGenerator, TTS_PROVIDERS, normalize_text
 
 # Конфигурация
 AUDIO_DIR = Path("static/audio")
-TTS_LANG = "en"  # Язык для генерации произношения
-TTS_SLOW = False  # Замедленное произношение
+TTS_WORKERS = 4  # Параллельных запросов к TTS
+DEFAULT_CHUNK_SIZE = 1000  # Слов в одной транзакции
+READ_SIZE = 1 << 16  # Размер блока чтения JSON-массива
+MAX_RECORD_SIZE = 1 << 20  # Больше — запись считается битой
 
-async def generate_audio(word: Word, session: AsyncSession):
-    """Генерирует аудиофайл с произношением английского слова"""
-    try:
-        # Создаем директорию, если нужно
-        AUDIO_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Формируем путь к файлу
-        audio_path = AUDIO_DIR / f"word_{word.id}.mp3"
-        
-        # Генерируем аудио через Google TTS
-        tts = gTTS(
-            text=word.english,
-            lang=TTS_LANG,
-            slow=TTS_SLOW,
-            tld="com"  # Домен для акцента (com - американский)
+# Форматы входного файла по расширению
+FORMATS_BY_SUFFIX = {
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+}
+
+def read_json_array(path: str) -> Iterator[dict]:
+    """
+    Элементы JSON-массива по одному, без загрузки файла целиком:
+    в памяти только текущий блок и один разбираемый элемент.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        buf = f.read(READ_SIZE)
+        pos = 0
+        eof = not buf
+        started = False
+        while True:
+            # Пропускаем пробелы и разделители, дочитывая файл по мере надобности
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ',')):
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError(f"{path}: неожиданный конец файла")
+                buf, pos = f.read(READ_SIZE), 0
+                eof = not buf
+                continue
+
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError(f"{path}: ожидается JSON-массив")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Элемент не поместился в блок — дочитываем
+                if eof or len(buf) - pos > MAX_RECORD_SIZE:
+                    raise
+                chunk = f.read(READ_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield item
+            pos = end
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    """Одна JSON-запись на строку; пустые строки пропускаются"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_csv(path: str) -> Iterator[dict]:
+    """CSV с заголовком, в котором есть колонки english и russian"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+READERS = {
+    "json": read_json_array,
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+}
+
+def read_words(path: str, file_format: Optional[str] = None) -> Iterator[dict]:
+    """Записи слов из файла; формат берется из --format или по расширению"""
+    if file_format is None:
+        file_format = FORMATS_BY_SUFFIX.get(Path(path).suffix.lower())
+        if file_format is None:
+            raise ValueError(f"Не удалось определить формат {path}, укажите --format")
+    return READERS[file_format](path)
+
+class ImportCheckpoint:
+    """
+    Отметка последней закоммиченной порции рядом с входным файлом.
+    Повторный запуск после сбоя продолжает с нее; если файл изменился,
+    отметка игнорируется.
+    """
+
+    def __init__(self, file_path: str):
+        self.path = Path(f"{file_path}.import-state")
+        stat = Path(file_path).stat()
+        self.source = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> int:
+        if not self.path.exists():
+            return 0
+        state = json.loads(self.path.read_text())
+        if state.get("source") != self.source:
+            logging.warning(f"{self.path} относится к другой версии файла, начинаем сначала")
+            return 0
+        return state["offset"]
+
+    def save(self, offset: int):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"source": self.source, "offset": offset}))
+        tmp.replace(self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+# russian -> (id, english, audio_path)
+WordIndex = Dict[str, Tuple[int, str, Optional[str]]]
+
+async def load_word_index(session: AsyncSession) -> WordIndex:
+    """Индекс всех слов по русскому тексту; при дубликатах берется первое"""
+    result = await session.execute(
+        select(Word.russian, Word.id, Word.english, Word.audio_path).order_by(Word.id)
+    )
+    index = {}
+    for russian, word_id, english, audio_path in result.all():
+        index.setdefault(russian, (word_id, english, audio_path))
+    return index
+
+async def import_chunk(
+    session: AsyncSession,
+    items: List[dict],
+    index: WordIndex,
+    wordset: Optional[WordSet],
+    audio: Optional[AudioGenerator]
+) -> int:
+    """Импортирует порцию слов одной транзакцией; возвращает число новых слов"""
+    new_rows = []
+    for item in items:
+        if item['russian'] not in index:
+            new_rows.append({"russian": item['russian'], "english": item['english']})
+            # Повтор слова внутри порции не должен создать вторую запись
+            index[item['russian']] = (None, item['english'], None)
+
+    if new_rows:
+        # Один многострочный INSERT с RETURNING вместо коммита на каждое слово
+        result = await session.execute(
+            insert(Word).returning(Word.id, Word.russian, sort_by_parameter_order=True),
+            new_rows
         )
-        tts.save(audio_path)
-        
-        # Обновляем запись в БД
-        word.audio_path = "/" + str(audio_path)
-        session.add(word)
-        await session.commit()
-        
-        logging.info(f"Сгенерировано аудио для {word.english}")
+        for word_id, russian in result.all():
+            index[russian] = (word_id, index[russian][1], None)
 
-    except Exception as e:
-        logging.error(f"Ошибка генерации аудио: {str(e)}")
-        raise
+    chunk_keys = list(dict.fromkeys(item['russian'] for item in items))
+
+    if audio:
+        # Аудио для слов порции, у которых его еще нет: каждый уникальный
+        # текст синтезируется один раз, пути пишутся одним UPDATE
+        missing = [russian for russian in chunk_keys if index[russian][2] is None]
+        if missing:
+            paths = await audio.generate(index[russian][1] for russian in missing)
+            updates = []
+            for russian in missing:
+                word_id, english, _ = index[russian]
+                audio_path = paths[normalize_text(english)]
+                index[russian] = (word_id, english, audio_path)
+                updates.append({"id": word_id, "audio_path": audio_path})
+            await session.execute(update(Word), updates)
 
-async def import_words(json_path: str = "all_words.json", wordset_name: str = None):
-    """Импортирует слова и генерирует аудио, опционально добавляя их в набор слов"""
+    if wordset:
+        # Связи, которые уже есть, пропускаются базой
+        if session.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(wordset_word)
+        else:
+            stmt = sqlite.insert(wordset_word)
+        await session.execute(
+            stmt.on_conflict_do_nothing(),
+            [{"wordset_id": wordset.id, "word_id": index[russian][0]} for russian in chunk_keys]
+        )
+
+    # Сообщаем запущенным процессам API, что каталог слов изменился
+    await bump_catalog_version(session)
+    await session.commit()
+    return len(new_rows)
+
+async def import_words(
+    file_path: str = "all_words.json",
+    wordset_name: str = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    tts: Optional[str] = "gtts",
+    tts_workers: int = TTS_WORKERS,
+    restart: bool = False,
+    file_format: Optional[str] = None
+):
+    """
+    Импортирует слова порциями и генерирует аудио провайдером tts
+    (None — без аудио), опционально добавляя их в набор слов
+    """
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
+        audio = None
+        if tts:
+            audio = AudioGenerator(TTS_PROVIDERS[tts](), AUDIO_DIR, workers=tts_workers)
+
+        checkpoint = ImportCheckpoint(file_path)
+        offset = 0 if restart else checkpoint.load()
+        # Записи читаются лениво; уже импортированные пропускаются без загрузки в БД
+        records = islice(read_words(file_path, file_format), offset, None)
+        if offset:
+            logging.info(f"Продолжаем импорт с позиции {offset}")
 
         async with async_session_maker() as session:
             # Если указано имя набора слов, проверяем его существование или создаем новый
@@ -66,53 +240,36 @@ async def import_words(json_path: str = "all_words.json", wordset_name: str = No
                     logging.info(f"Создаем новый набор слов: {wordset_name}")
                     wordset = WordSet(
                         name=wordset_name,
-                        description=f"Набор слов, импортированный из {json_path}"
+                        description=f"Набор слов, импортированный из {file_path}"
                     )
                     session.add(wordset)
+                    await bump_catalog_version(session)
                     await session.commit()
                     await session.refresh(wordset)
-            
-            for item in words_data:
-                # Поиск существующей записи
-                result = await session.execute(
-                    select(Word).where(Word.russian == item['russian'])
-                )
-                word = result.scalars().first()
 
-                # Создаем новую запись если не найдено
-                if not word:
-                    word = Word(
-                        russian=item['russian'],
-                        english=item['english']
-                    )
-                    session.add(word)
-                    await session.commit()
-                    await session.refresh(word)  # Получаем ID
+            # Существующие слова загружаем один раз вместо запроса на каждое слово
+            index = await load_word_index(session)
+            logging.info(f"В базе {len(index)} слов")
 
-                # Генерируем аудио если его нет
-                if not word.audio_path:
-                    await generate_audio(word, session)
-                
-                # Если указан набор слов, добавляем слово в набор
-                if wordset:
-                    # Проверяем, не добавлено ли уже слово в набор
-                    existing_result = await session.execute(
-                        select(wordset_word)
-                        .where(wordset_word.c.wordset_id == wordset.id)
-                        .where(wordset_word.c.word_id == word.id)
-                    )
-                    if not existing_result.first():
-                        # Добавляем слово в набор
-                        await session.execute(
-                            wordset_word.insert().values(
-                                wordset_id=wordset.id,
-                                word_id=word.id
-                            )
-                        )
-                        await session.commit()
-                        logging.info(f"Слово '{word.english}' добавлено в набор '{wordset.name}'")
-
-        logging.info(f"Обработано {len(words_data)} слов")
+            started = time.monotonic()
+            processed = created = 0
+            while True:
+                items = list(islice(records, chunk_size))
+                if not items:
+                    break
+                created += await import_chunk(session, items, index, wordset, audio)
+                offset += len(items)
+                checkpoint.save(offset)
+
+                processed += len(items)
+                elapsed = time.monotonic() - started
+                logging.info(
+                    f"Импортировано {offset} (новых: {created}), "
+                    f"{processed / elapsed if elapsed else 0:.0f} слов/с"
+                )
+
+        checkpoint.clear()
+        logging.info(f"Обработано {offset} слов")
 
     except Exception as e:
         logging.error(f"Ошибка импорта: {str(e)}")
@@ -122,13 +279,27 @@ async def main():
     logging.basicConfig(level=logging.INFO)
     
     # Парсинг аргументов командной строки
-    parser = argparse.ArgumentParser(description='Импорт слов из JSON файла')
-    parser.add_argument('--file', type=str, default="all_words.json", help='Путь к JSON файлу со словами')
+    parser = argparse.ArgumentParser(description='Импорт слов из JSON, JSONL или CSV файла')
+    parser.add_argument('--file', type=str, default="all_words.json", help='Путь к файлу со словами')
+    parser.add_argument('--format', choices=sorted(READERS), help='Формат файла (по умолчанию по расширению)')
     parser.add_argument('--wordset', type=str, help='Имя набора слов для добавления импортируемых слов')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Слов в одной транзакции')
+    parser.add_argument('--no-audio', action='store_true', help='Не генерировать аудио')
+    parser.add_argument('--tts', choices=sorted(TTS_PROVIDERS), default="gtts", help='Провайдер синтеза речи')
+    parser.add_argument('--tts-workers', type=int, default=TTS_WORKERS, help='Параллельных запросов к TTS')
+    parser.add_argument('--restart', action='store_true', help='Начать сначала, игнорируя сохраненную позицию')
     args = parser.parse_args()
     
     await create_db_and_tables()
-    await import_words(args.file, args.wordset)
+    await import_words(
+        args.file,
+        args.wordset,
+        chunk_size=args.chunk_size,
+        tts=None if args.no_audio else args.tts,
+        tts_workers=args.tts_workers,
+        restart=args.restart,
+        file_format=args.format
+    )
 
 if __name__ == "__main__":
     asyncio.run(main())
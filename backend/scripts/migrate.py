@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Apply pending schema migrations (src/migrations/versions.py) to the database
+configured in DATABASE_URL. Works for both PostgreSQL and SQLite and replaces
+the one-off migrate_db.py / migrate_sqlite.py scripts.
+
+Index migrations on PostgreSQL use CREATE INDEX CONCURRENTLY, so they can be
+applied while the application is serving traffic. Every operation is
+idempotent; an interrupted run can simply be started again.
+
+Usage:
+    python -m scripts.migrate             # apply pending migrations
+    python -m scripts.migrate --status    # list applied and pending versions
+    python -m scripts.migrate --explain   # show query plans for hot queries
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+
+from sqlalchemy import text
+
+from src.database import engine
+from src.migrations import run_migrations, applied_versions, pending_migrations
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Запросы горячих путей: выбор слова, показ/ответ, журнал событий
+HOT_QUERIES = {
+    "progress by user and word": (
+        "SELECT * FROM wordprogress WHERE user_id = :user_id AND word_id = :word_id"
+    ),
+    "last shown words": (
+        "SELECT word_id FROM wordprogress WHERE user_id = :user_id "
+        "ORDER BY last_shown DESC LIMIT 5"
+    ),
+    "user progress": (
+        "SELECT word_id, last_shown_position, exp_error_rate FROM wordprogress "
+        "WHERE user_id = :user_id"
+    ),
+    "recent events": (
+        "SELECT * FROM user_word_events WHERE user_id = :user_id "
+        "ORDER BY timestamp DESC LIMIT 100"
+    ),
+}
+
+
+async def explain():
+    explain_prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    # Параметры нужны только для построения плана
+    params = {
+        "user_id": uuid.uuid4().hex if engine.dialect.name == "sqlite" else str(uuid.uuid4()),
+        "word_id": 1,
+    }
+    async with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            result = await conn.execute(text(f"{explain_prefix} {query}"), params)
+            print(f"-- {name}")
+            for row in result.all():
+                print("   ", row[-1])
+
+
+async def status():
+    applied = await applied_versions(engine)
+    for migration in await pending_migrations(engine):
+        print(f"pending  {migration.version:>4}  {migration.description}")
+    print(f"applied: {sorted(applied)}")
+
+
+async def main(args):
+    try:
+        if args.status:
+            await status()
+        elif args.explain:
+            await explain()
+        else:
+            applied = await run_migrations(engine)
+            logger.info(f"Applied {len(applied)} migration(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--explain", action="store_true", help="Show query plans for hot queries")
+    asyncio.run(main(parser.parse_args()))
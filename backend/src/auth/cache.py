@@ -0,0 +1,120 @@
+"""
+Кэш аутентифицированных пользователей.
+
+Горячие эндпоинты (показ слова, ответ) получают пользователя зависимостью
+current_active_identity: ID берется из проверенного JWT, флаги учетной
+записи — из кэша процесса с коротким TTL, без запроса к БД на каждый
+запрос. В кэше лежит неизменяемый снимок, а не ORM-объект, поэтому
+счетчики вроде words_shown_counter эндпоинты читают и меняют в БД сами.
+
+Изменение, деактивация, смена пароля и удаление пользователя сбрасывают
+запись в этом процессе (хуки UserManager); в остальных процессах запись
+устаревает не позже чем через USER_CACHE_TTL_SECONDS.
+"""
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi_users.jwt import decode_jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import get_async_session
+from ..models.models import User
+from .auth import bearer_transport, get_jwt_strategy
+
+
+class AuthenticatedUser(NamedTuple):
+    id: uuid.UUID
+    email: str
+    username: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            is_verified=user.is_verified,
+        )
+
+
+class UserCache:
+    """LRU-кэш снимков пользователей с TTL"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+
+    def get(self, user_id: uuid.UUID) -> Optional[AuthenticatedUser]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        identity, loaded_at = entry
+        if time.monotonic() - loaded_at >= self.ttl:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return identity
+
+    def put(self, identity: AuthenticatedUser):
+        self._entries[identity.id] = (identity, time.monotonic())
+        self._entries.move_to_end(identity.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[uuid.UUID] = None):
+        """Сбрасывает запись пользователя или весь кэш"""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+_strategy = get_jwt_strategy()
+
+
+def _unauthorized():
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+
+async def current_active_identity(
+    token: Optional[str] = Depends(bearer_transport.scheme),
+    session: AsyncSession = Depends(get_async_session),
+) -> AuthenticatedUser:
+    """Активный пользователь по JWT; БД читается только при промахе кэша"""
+    if token is None:
+        raise _unauthorized()
+    try:
+        data = decode_jwt(
+            token, _strategy.decode_key, _strategy.token_audience, algorithms=[_strategy.algorithm]
+        )
+        user_id = uuid.UUID(data["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        raise _unauthorized()
+
+    identity = user_cache.get(user_id)
+    if identity is None:
+        user = await session.get(User, user_id)
+        if user is None:
+            raise _unauthorized()
+        identity = AuthenticatedUser.from_user(user)
+        user_cache.put(identity)
+
+    if not identity.is_active:
+        raise _unauthorized()
+    return identity
@@ -0,0 +1,64 @@
+"""
+Хэширование паролей вне цикла событий.
+
+bcrypt и argon2 — намеренно медленные операции (сотни миллисекунд), поэтому
+хэширование и проверка выполняются в отдельном пуле из
+PASSWORD_HASH_WORKERS потоков; пока идет проверка пароля, остальные запросы
+обслуживаются. PASSWORD_HASH_WORKERS=0 — хэширование в цикле событий (для
+сравнения в бенчмарке).
+
+Новые пароли хэшируются схемой PASSWORD_HASH_SCHEME; хэши другой схемы или с
+другой стоимостью по-прежнему проверяются и при входе прозрачно
+перехэшируются текущей схемой.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from ..config import settings
+
+
+def build_password_helper() -> PasswordHelper:
+    """Первый хэшер — схема новых паролей, остальные только проверяются"""
+    bcrypt = BcryptHasher(rounds=settings.BCRYPT_ROUNDS)
+    argon2 = Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+    )
+    if settings.PASSWORD_HASH_SCHEME == "bcrypt":
+        hashers = (bcrypt, argon2)
+    elif settings.PASSWORD_HASH_SCHEME == "argon2":
+        hashers = (argon2, bcrypt)
+    else:
+        raise ValueError(f"Unknown PASSWORD_HASH_SCHEME: {settings.PASSWORD_HASH_SCHEME}")
+    return PasswordHelper(PasswordHash(hashers))
+
+
+password_helper = build_password_helper()
+
+_executor: Optional[ThreadPoolExecutor] = None
+if settings.PASSWORD_HASH_WORKERS > 0:
+    _executor = ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        thread_name_prefix="password-hash",
+    )
+
+
+async def _run(func, *args):
+    if _executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(password_helper.hash, password)
+
+
+async def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(пароль верен, новый хэш или None, если перехэширование не нужно)"""
+    return await _run(password_helper.verify_and_update, password, hashed_password)
@@ -11,6 +11,64 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480  # 8 hours
     ENV: str = ENV  # Store the environment
 
+    # Запуск (см. startup.py): "full" — create_all и тестовый пользователь при
+    # каждом старте, "fast" — схема из миграций, тестовый пользователь командой
+    STARTUP_MODE: str = "full"
+
+    # Планировщик выбора слов в памяти процесса (см. services/scheduler.py)
+    SCHEDULER_ENABLED: bool = False
+    SCHEDULER_IDLE_SECONDS: int = 900  # Выгружать расписание после 15 минут простоя
+    SCHEDULER_TTL_SECONDS: float = 30.0  # Перечитывать из БД ответы других процессов
+
+    # Откуда брать неправильные варианты ответа: "global" — весь словарь,
+    # "wordset" — набор, в который входит показываемое слово
+    DISTRACTOR_MODE: str = "global"
+
+    # Как часто процесс сверяет версию каталога слов с БД
+    CATALOG_VERSION_CHECK_SECONDS: float = 5.0
+    # Сколько живет закэшированный список слов пользователя
+    ELIGIBLE_WORDS_TTL_SECONDS: float = 30.0
+
+    # Отложенная запись событий user_word_events (см. services/events.py)
+    EVENT_BUFFER_ENABLED: bool = False
+    EVENT_BUFFER_MAX_SIZE: int = 10000  # Больше — события пишутся в транзакции запроса
+    EVENT_BUFFER_FLUSH_SIZE: int = 500
+    EVENT_BUFFER_FLUSH_INTERVAL: float = 1.0  # Секунды
+    EVENT_BUFFER_MAX_RETRIES: int = 3  # Затем пачка пишется по событию, ошибочные отбрасываются
+
+    # Кэш аутентифицированных пользователей (см. auth/cache.py)
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Хэширование паролей (см. auth/passwords.py)
+    PASSWORD_HASH_SCHEME: str = "argon2"  # Схема новых паролей: "argon2" или "bcrypt"
+    PASSWORD_HASH_WORKERS: int = 4  # Потоков для хэширования; 0 — в цикле событий
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # КиБ
+
+    # Пул соединений PostgreSQL (см. db_pool.py)
+    DB_POOL_SIZE: int = 5  # Постоянных соединений на процесс
+    DB_MAX_OVERFLOW: int = 10  # Дополнительных соединений при пиковой нагрузке
+    DB_POOL_TIMEOUT: float = 30.0  # Сколько ждать свободного соединения, секунды
+    DB_POOL_RECYCLE: int = 1800  # Пересоздавать соединения старше, секунды; -1 — никогда
+    DB_POOL_USE_LIFO: bool = True  # Лишние соединения простаивают и пересоздаются
+    DB_POOL_PRE_PING: bool = False  # Пинг при каждой выдаче соединения
+    DB_POOL_PING_IDLE_SECONDS: float = 300.0  # Пинг только после простоя; -1 — никогда
+    # Кэши подготовленных выражений; 0 для пулера в режиме транзакций
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    # Режим SQLite для небольших установок: WAL, пул чтения и один писатель
+    # (см. sqlite_mode.py)
+    SQLITE_WAL_MODE: bool = False
+    SQLITE_READ_POOL_SIZE: int = 5
+    SQLITE_WRITER_TIMEOUT: float = 30.0  # Сколько запрос ждет писателя, секунды
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # В WAL не теряет целостность при сбое
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 20000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 МиБ
+
     class Config:
         env_file = ".env"
 
@@ -7,11 +7,13 @@ from fastapi import Depends
 from fastapi_users.db import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy import select
-from passlib.context import CryptContext
 import uuid
 
 from .config import settings
+from .db_pool import create_postgres_engine, install_pool_monitor
+from .sqlite_mode import create_sqlite_engines
 from .models.models import User, Base, Progress
+from .auth.passwords import hash_password
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +36,9 @@ else:
     logger.info(f"Using PRODUCTION environment database")
     DATABASE_URL = settings.DATABASE_URL
 
+# Движок для записи; отдельный только в режиме SQLITE_WAL_MODE
+write_engine = None
+
 # Parse the DATABASE_URL to extract components
 parsed_url = urlparse(DATABASE_URL)
 
@@ -52,22 +57,31 @@ if parsed_url.scheme.startswith('postgresql'):
     # Construct a clean URL without query parameters
     clean_url = f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
     
-    # Create engine with appropriate connect_args
-    engine = create_async_engine(
-        clean_url,
-        echo=False,  # Set to True for debugging
-        pool_pre_ping=True,  # Check connection before using from pool
-    )
+    # Create engine with the pool configured from settings
+    engine = create_postgres_engine(clean_url)
 elif parsed_url.scheme.startswith('sqlite'):
     # For SQLite, use aiosqlite
     logger.info("Using SQLite database")
     sqlite_url = DATABASE_URL.replace("sqlite:", "sqlite+aiosqlite:")
-    engine = create_async_engine(sqlite_url)
+    if settings.SQLITE_WAL_MODE:
+        # Пул чтения и отдельное соединение писателя
+        engine, write_engine = create_sqlite_engines(sqlite_url)
+    else:
+        engine = create_async_engine(sqlite_url)
+        install_pool_monitor(engine)
 else:
     # Default case
     logger.warning(f"Unknown database type: {parsed_url.scheme}")
     engine = create_async_engine(DATABASE_URL)
+if write_engine is None:
+    write_engine = engine
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+# Сессии запросов, которые пишут в БД; совпадает с async_session_maker,
+# кроме режима SQLITE_WAL_MODE
+if write_engine is engine:
+    write_session_maker = async_session_maker
+else:
+    write_session_maker = async_sessionmaker(write_engine, expire_on_commit=False)
 
 async def create_test_user(session: AsyncSession):
     try:
@@ -78,11 +92,10 @@ async def create_test_user(session: AsyncSession):
         if not test_user:
             # Create a new test user
             logger.info("Creating new test user")
-            pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
             new_user = User(
                 email="testuser@example.com",
                 username="testuser",
-                hashed_password=pwd_context.hash("testpass"),
+                hashed_password=await hash_password("testpass"),
                 is_active=True,
                 is_verified=True,
                 is_superuser=False
@@ -109,11 +122,10 @@ async def create_test_user(session: AsyncSession):
                     await session.commit()
                     
                     # Create a new user with all required fields
-                    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
                     new_user = User(
                         email="testuser@example.com",
                         username="testuser",
-                        hashed_password=pwd_context.hash("testpass"),
+                        hashed_password=await hash_password("testpass"),
                         is_active=True,
                         is_verified=True,
                         is_superuser=False
@@ -129,32 +141,39 @@ async def create_test_user(session: AsyncSession):
         # Don't raise the exception, just log it
         # This allows the application to start even if there are issues with the test user
 
-async def create_db_and_tables():
+async def create_schema():
+    """Создает недостающие таблицы по моделям (create_all)"""
     from .models.word import Word
-    try:
-        logger.info("Creating database tables...")
-        async with engine.begin() as conn:
-            # Check if we're using PostgreSQL
-            if parsed_url.scheme.startswith('postgresql'):
-                # For PostgreSQL, we need to be careful about creating tables
-                # as the schema might already exist and be different
-                logger.info("Using PostgreSQL - checking if tables exist before creating")
-                try:
-                    # Try to create tables, but catch any errors
-                    await conn.run_sync(Base.metadata.create_all)
-                except Exception as e:
-                    logger.warning(f"Error creating tables: {str(e)}")
-                    logger.warning("Tables may already exist with a different schema")
-                    # Continue without creating tables
-            else:
-                # For SQLite, we can safely create tables
+    logger.info("Creating database tables...")
+    async with write_engine.begin() as conn:
+        # Check if we're using PostgreSQL
+        if parsed_url.scheme.startswith('postgresql'):
+            # For PostgreSQL, we need to be careful about creating tables
+            # as the schema might already exist and be different
+            logger.info("Using PostgreSQL - checking if tables exist before creating")
+            try:
+                # Try to create tables, but catch any errors
                 await conn.run_sync(Base.metadata.create_all)
-        
+            except Exception as e:
+                logger.warning(f"Error creating tables: {str(e)}")
+                logger.warning("Tables may already exist with a different schema")
+                # Continue without creating tables
+        else:
+            # For SQLite, we can safely create tables
+            await conn.run_sync(Base.metadata.create_all)
+
+async def seed_test_user():
+    """Создает тестового пользователя, если его нет"""
+    from .models.word import Word
+    logger.info("Creating/checking test user...")
+    async with write_session_maker() as session:
+        await create_test_user(session)
+
+async def create_db_and_tables():
+    try:
+        await create_schema()
         # Create test user in both development and production
-        logger.info("Creating/checking test user...")
-        async with async_session_maker() as session:
-            await create_test_user(session)
-        
+        await seed_test_user()
         logger.info("Database initialization complete")
     except Exception as e:
         logger.error(f"Database initialization failed: {str(e)}")
@@ -165,5 +184,12 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
-async def get_user_db(session: AsyncSession = Depends(get_async_session)):
+async def get_write_session() -> AsyncGenerator[AsyncSession, None]:
+    """Сессия для запросов, которые пишут в БД"""
+    async with write_session_maker() as session:
+        yield session
+
+async def get_user_db(session: AsyncSession = Depends(get_write_session)):
+    # Регистрация, изменение пользователя и перехэширование пароля при входе
+    # пишут в БД — в режиме SQLITE_WAL_MODE через соединение писателя
     yield SQLAlchemyUserDatabase(session, User)
@@ -0,0 +1,168 @@
+"""
+Пул соединений PostgreSQL и его статистика.
+
+Параметры пула и кэшей подготовленных выражений asyncpg берутся из
+настроек DB_* (см. config.py), чтобы пул можно было подобрать под размер
+развертывания без правки кода.
+
+Вместо pool_pre_ping (лишний round trip на каждую выдачу соединения)
+соединение проверяется, только если оно пролежало в пуле дольше
+DB_POOL_PING_IDLE_SECONDS: свежие соединения заведомо живы, а
+DB_POOL_RECYCLE пересоздает старые до того, как их закроет сервер или
+балансировщик. Если проверка не прошла, пул выбрасывает соединение и
+выдает новое, запрос ошибки не видит.
+"""
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ключ connection_record.info: когда соединение вернулось в пул
+CHECKED_IN_AT_KEY = "checked_in_at"
+
+
+class PoolStats:
+    """Счетчики пула с момента запуска процесса"""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkout_waits = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.invalidations = 0
+
+    def record_checkout_wait(self, seconds: float):
+        self.checkout_waits += 1
+        self.checkout_wait_total += seconds
+        self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkout_wait_avg_ms": round(
+                self.checkout_wait_total / self.checkout_waits * 1000 if self.checkout_waits else 0.0, 3
+            ),
+            "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+            "checkout_timeouts": self.checkout_timeouts,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+            "invalidations": self.invalidations,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Очередь соединений, которая замеряет ожидание свободного соединения"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.checkout_timeouts += 1
+            raise
+        pool_stats.record_checkout_wait(time.perf_counter() - started)
+        return record
+
+
+def install_pool_monitor(engine: AsyncEngine):
+    """Подписывается на события пула: статистика и проверка простоявших соединений"""
+    sync_engine: Engine = engine.sync_engine
+    ping_idle_seconds = settings.DB_POOL_PING_IDLE_SECONDS
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats.connects += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info[CHECKED_IN_AT_KEY] = time.monotonic()
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.invalidations += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_stats.checkouts += 1
+        if ping_idle_seconds < 0:
+            return
+        checked_in_at = connection_record.info.pop(CHECKED_IN_AT_KEY, None)
+        if checked_in_at is None or time.monotonic() - checked_in_at < ping_idle_seconds:
+            # Новое или недавно использованное соединение
+            return
+        pool_stats.pings += 1
+        try:
+            sync_engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            pool_stats.ping_failures += 1
+            logger.warning(f"Idle connection failed liveness check, reconnecting: {e}")
+            # Пул выбросит соединение и повторит выдачу с новым
+            raise exc.DisconnectionError() from e
+
+
+def create_postgres_engine(url: str) -> AsyncEngine:
+    """Движок asyncpg с пулом и кэшами выражений из настроек"""
+    engine = create_async_engine(
+        url,
+        echo=False,  # Set to True for debugging
+        poolclass=MonitoredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Кэш подготовленных выражений asyncpg на соединение
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            # Кэш подготовленных выражений адаптера SQLAlchemy
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        },
+    )
+    install_pool_monitor(engine)
+    logger.info(
+        f"Connection pool: size={settings.DB_POOL_SIZE}, overflow={settings.DB_MAX_OVERFLOW}, "
+        f"timeout={settings.DB_POOL_TIMEOUT}s, recycle={settings.DB_POOL_RECYCLE}s, "
+        f"pre_ping={settings.DB_POOL_PRE_PING}, ping_idle={settings.DB_POOL_PING_IDLE_SECONDS}s"
+    )
+    return engine
+
+
+def pool_occupancy(engine: AsyncEngine) -> dict:
+    """Текущее состояние пула движка"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    return status
+
+
+def pool_status(engine: AsyncEngine, write_engine: Optional[AsyncEngine] = None) -> dict:
+    """Состояние пула (и отдельного пула писателя, если есть) и накопленные счетчики"""
+    status = pool_occupancy(engine)
+    if write_engine is not None and write_engine is not engine:
+        status["writer"] = pool_occupancy(write_engine)
+    status.update(pool_stats.as_dict())
+    return status
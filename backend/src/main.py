@@ -1,21 +1,72 @@
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from .database import create_db_and_tables
-from .routers import words, progress, wordsets
+from .database import create_schema, seed_test_user, engine, async_session_maker, write_session_maker
+from .routers import words, progress, wordsets, health
 from .auth.router import fastapi_users, auth_backend, current_active_user
 from .schemas import UserRead, UserCreate, UserUpdate
 from .models.models import User
 from .config import settings
+from .services.catalog import catalog_cache
+from .services.events import event_buffer
+from .services.activity import ensure_rollup_state
+from .migrations import missing_migrations
+from .migrations.versions import MIGRATIONS
+from .startup import startup_state, STARTUP_MODES
+
+logger = logging.getLogger(__name__)
+
+async def check_schema():
+    """Быстрый запуск: схема должна быть создана миграциями заранее"""
+    missing = await missing_migrations(engine)
+    if len(missing) == len(MIGRATIONS):
+        raise RuntimeError(
+            "Database schema is not initialized; run `python -m scripts.migrate` "
+            "or start with STARTUP_MODE=full"
+        )
+    if missing:
+        logger.warning(
+            f"Pending migrations: {[m.version for m in missing]}; run `python -m scripts.migrate`"
+        )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables and initial data on startup
-    await create_db_and_tables()
+    if settings.STARTUP_MODE not in STARTUP_MODES:
+        raise ValueError(f"Unknown STARTUP_MODE: {settings.STARTUP_MODE}")
+    if settings.STARTUP_MODE == "full":
+        # Create tables and initial data on startup
+        # (шаги create_db_and_tables, но каждый замеряется отдельно)
+        try:
+            with startup_state.phase("create schema"):
+                await create_schema()
+            with startup_state.phase("seed test user"):
+                await seed_test_user()
+            logger.info("Database initialization complete")
+        except Exception as e:
+            logger.error(f"Database initialization failed: {str(e)}")
+            raise
+    else:
+        with startup_state.phase("check schema"):
+            await check_schema()
+    # Загружаем каталог слов заранее, чтобы первый запрос не ждал его
+    with startup_state.phase("load catalog"):
+        async with async_session_maker() as session:
+            await catalog_cache.reload(session)
+    with startup_state.phase("rollup state"):
+        async with write_session_maker() as session:
+            await ensure_rollup_state(session)
+    if settings.EVENT_BUFFER_ENABLED:
+        event_buffer.start(write_session_maker)
+    startup_state.mark_ready()
     yield
+    # Новые запросы больше не направляются, пока процесс останавливается
+    startup_state.ready = False
+    # Дописываем накопленные события перед остановкой
+    await event_buffer.stop()
 
 app = FastAPI(title="Zubroslov API", lifespan=lifespan)
 
@@ -78,6 +129,7 @@ app.include_router(
 app.include_router(words.router)
 app.include_router(progress.router)
 app.include_router(wordsets.router)
+app.include_router(health.router)
 
 @app.get("/")
 def read_root():
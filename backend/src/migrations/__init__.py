@@ -0,0 +1,2 @@
+# Migrations package
+from .runner import run_migrations, applied_versions, pending_migrations, missing_migrations
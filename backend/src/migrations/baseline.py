@@ -0,0 +1,95 @@
+"""
+Схема базы на момент появления миграций (версия 1).
+
+Снимок не зависит от текущих моделей: изменения моделей оформляются
+следующими миграциями, а версия 1 всегда создает одни и те же таблицы.
+Значения по умолчанию задаются в моделях на стороне Python, поэтому в DDL
+их нет.
+"""
+from fastapi_users_db_sqlalchemy.generics import GUID
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "user",
+    metadata,
+    Column("id", GUID, primary_key=True),
+    Column("email", String(320), unique=True, index=True, nullable=False),
+    Column("hashed_password", String(1024), nullable=False),
+    Column("is_active", Boolean, nullable=False),
+    Column("is_superuser", Boolean, nullable=False),
+    Column("is_verified", Boolean, nullable=False),
+    Column("username", String, unique=True, index=True),
+    Column("words_shown_counter", Integer),
+)
+
+Table(
+    "word",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("english", String, index=True, nullable=False),
+    Column("russian", String, nullable=False),
+    Column("audio_path", String, nullable=True),
+)
+
+Table(
+    "wordset",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("description", String, nullable=True),
+)
+
+Table(
+    "wordset_word",
+    metadata,
+    Column("wordset_id", Integer, ForeignKey("wordset.id"), primary_key=True),
+    Column("word_id", Integer, ForeignKey("word.id"), primary_key=True),
+)
+
+Table(
+    "user_wordset",
+    metadata,
+    Column("user_id", GUID, ForeignKey("user.id"), primary_key=True),
+    Column("wordset_id", Integer, ForeignKey("wordset.id"), primary_key=True),
+)
+
+Table(
+    "progress",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", GUID, ForeignKey("user.id"), nullable=False),
+    Column("completed", Boolean, nullable=False),
+    Column("score", Integer, nullable=False),
+    Column("duration_seconds", Integer, nullable=False),
+    Column("words_learned", Integer, nullable=False),
+    Column("accuracy", Float, nullable=False),
+    Column("session_start", DateTime, nullable=False),
+)
+
+Table(
+    "wordprogress",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("word_id", Integer, ForeignKey("word.id"), nullable=False),
+    Column("user_id", GUID, ForeignKey("user.id"), nullable=False),
+    Column("last_shown", DateTime, nullable=False),
+    Column("shown_count", Integer, nullable=False),
+    Column("correct_count", Integer, nullable=False),
+    Column("error_count", Integer, nullable=False),
+    Column("last_shown_position", Integer, nullable=False),
+    Column("exp_error_rate", Float, nullable=False),
+)
+
+Table(
+    "user_word_events",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", GUID, ForeignKey("user.id"), nullable=False),
+    Column("word_id", Integer, ForeignKey("word.id"), nullable=False),
+    Column("event_type", String, nullable=False),
+    Column("is_correct", Boolean, nullable=True),
+    Column("timestamp", DateTime, nullable=False),
+    Column("event_data", String, nullable=True),
+)
@@ -0,0 +1,48 @@
+"""
+Операции миграций. Каждая операция идемпотентна, поэтому миграцию, прерванную
+посередине (например, построение индекса вне транзакции), можно запустить снова.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import MetaData
+
+
+class SQL(NamedTuple):
+    """Произвольный SQL; dialects — текст для postgresql/sqlite или "*" для всех"""
+    dialects: Dict[str, str]
+
+
+class AddColumn(NamedTuple):
+    """Добавление колонки, если ее еще нет"""
+    table: str
+    column: str
+    ddl: str  # Тип и значение по умолчанию, например "INTEGER DEFAULT 0"
+
+
+class CreateIndex(NamedTuple):
+    """
+    Индекс; на PostgreSQL строится CONCURRENTLY (без блокировки записи),
+    поэтому миграции с индексами выполняются вне транзакции.
+    """
+    name: str
+    table: str
+    columns: str
+    unique: bool = False
+
+
+class CreateTables(NamedTuple):
+    """
+    Создание перечисленных таблиц, если их нет. Определения берутся из
+    metadata (по умолчанию — из моделей, Base.metadata).
+    """
+    tables: Tuple[str, ...]
+    metadata: Optional[MetaData] = None
+
+
+Operation = Union[SQL, AddColumn, CreateIndex, CreateTables]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    operations: list
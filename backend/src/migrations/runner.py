@@ -0,0 +1,139 @@
+"""
+Версионированные миграции схемы для PostgreSQL и SQLite.
+
+Примененные версии записываются в таблицу schema_migrations. Обычные миграции
+выполняются в транзакции вместе с записью версии. Миграции с индексами на
+PostgreSQL выполняются в режиме AUTOCOMMIT через CREATE INDEX CONCURRENTLY,
+чтобы не блокировать запись в таблицы на время построения.
+"""
+import logging
+from datetime import datetime
+from typing import List, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ..models.models import Base
+from .operations import SQL, AddColumn, CreateIndex, CreateTables, Migration
+from .versions import MIGRATIONS
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+async def applied_versions(engine: AsyncEngine) -> Set[int]:
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        result = await conn.execute(select(schema_migrations.c.version))
+        return set(result.scalars().all())
+
+
+async def pending_migrations(engine: AsyncEngine) -> List[Migration]:
+    applied = await applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+async def missing_migrations(engine: AsyncEngine) -> List[Migration]:
+    """
+    Непримененные миграции только чтением: без создания schema_migrations.
+    Если таблицы версий нет, непримененными считаются все миграции.
+    """
+    async with engine.connect() as conn:
+        has_table = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table(schema_migrations.name)
+        )
+        if not has_table:
+            return list(MIGRATIONS)
+        result = await conn.execute(select(schema_migrations.c.version))
+        applied = set(result.scalars().all())
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+async def run_migrations(engine: AsyncEngine) -> List[Migration]:
+    """Применяет недостающие миграции по порядку; возвращает примененные"""
+    # Модели нужны в Base.metadata для CreateTables
+    from ..models import word  # noqa: F401
+
+    applied = []
+    for migration in await pending_migrations(engine):
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        online = engine.dialect.name == "postgresql" and any(
+            isinstance(op, CreateIndex) for op in migration.operations
+        )
+        if online:
+            # CREATE INDEX CONCURRENTLY нельзя выполнить внутри транзакции
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                for op in migration.operations:
+                    await _apply(conn, op)
+                await _record(conn, migration)
+        else:
+            async with engine.begin() as conn:
+                for op in migration.operations:
+                    await _apply(conn, op)
+                await _record(conn, migration)
+        applied.append(migration)
+    return applied
+
+
+async def _record(conn: AsyncConnection, migration: Migration):
+    await conn.execute(schema_migrations.insert().values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.utcnow(),
+    ))
+
+
+async def _apply(conn: AsyncConnection, op):
+    dialect = conn.dialect.name
+    if isinstance(op, CreateTables):
+        metadata = op.metadata if op.metadata is not None else Base.metadata
+        tables = [metadata.tables[name] for name in op.tables]
+        await conn.run_sync(lambda sync_conn: metadata.create_all(sync_conn, tables=tables))
+
+    elif isinstance(op, SQL):
+        statement = op.dialects.get(dialect, op.dialects.get("*"))
+        if statement:
+            await conn.execute(text(statement))
+
+    elif isinstance(op, AddColumn):
+        columns = await conn.run_sync(
+            lambda sync_conn: [c["name"] for c in inspect(sync_conn).get_columns(op.table)]
+        )
+        if op.column in columns:
+            logger.info(f"Column {op.table}.{op.column} already exists")
+            return
+        await conn.execute(text(f'ALTER TABLE "{op.table}" ADD COLUMN {op.column} {op.ddl}'))
+
+    elif isinstance(op, CreateIndex):
+        unique = "UNIQUE " if op.unique else ""
+        if dialect == "postgresql":
+            # Прерванное CONCURRENTLY оставляет невалидный индекс — удаляем его
+            # и строим заново, иначе IF NOT EXISTS его пропустит
+            invalid = await conn.execute(text("""
+                SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = :name AND NOT i.indisvalid
+            """), {"name": op.name})
+            if invalid.first():
+                logger.warning(f"Dropping invalid index {op.name}")
+                await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{op.name}"'))
+            await conn.execute(text(
+                f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS "{op.name}" '
+                f'ON "{op.table}" ({op.columns})'
+            ))
+        else:
+            await conn.execute(text(
+                f'CREATE {unique}INDEX IF NOT EXISTS "{op.name}" ON "{op.table}" ({op.columns})'
+            ))
+
+    else:
+        raise ValueError(f"Unknown migration operation: {op!r}")
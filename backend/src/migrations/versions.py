@@ -0,0 +1,103 @@
+"""
+Список миграций схемы по порядку. Новые миграции добавляются в конец
+со следующим номером версии; примененные миграции не меняются.
+"""
+from . import baseline
+from .operations import Migration, SQL, AddColumn, CreateIndex, CreateTables
+
+# Слияние дубликатов wordprogress перед уникальным индексом (user_id, word_id):
+# счетчики дубликатов складываются в самую новую строку, остальные удаляются
+MERGE_DUPLICATE_WORD_PROGRESS = [
+    SQL({"*": """
+        UPDATE wordprogress SET
+            shown_count = (SELECT SUM(p.shown_count) FROM wordprogress p
+                           WHERE p.user_id = wordprogress.user_id AND p.word_id = wordprogress.word_id),
+            correct_count = (SELECT SUM(p.correct_count) FROM wordprogress p
+                             WHERE p.user_id = wordprogress.user_id AND p.word_id = wordprogress.word_id),
+            error_count = (SELECT SUM(p.error_count) FROM wordprogress p
+                           WHERE p.user_id = wordprogress.user_id AND p.word_id = wordprogress.word_id),
+            last_shown = (SELECT MAX(p.last_shown) FROM wordprogress p
+                          WHERE p.user_id = wordprogress.user_id AND p.word_id = wordprogress.word_id),
+            last_shown_position = (SELECT MAX(p.last_shown_position) FROM wordprogress p
+                                   WHERE p.user_id = wordprogress.user_id AND p.word_id = wordprogress.word_id)
+        WHERE id IN (
+            SELECT MAX(id) FROM wordprogress
+            GROUP BY user_id, word_id
+            HAVING COUNT(*) > 1
+        )
+    """}),
+    SQL({"*": """
+        DELETE FROM wordprogress
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM wordprogress
+            GROUP BY user_id, word_id
+        )
+    """}),
+]
+
+MIGRATIONS = [
+    Migration(
+        version=1,
+        description="Base schema",
+        # Зафиксированный снимок схемы, а не текущие модели
+        operations=[CreateTables(tuple(baseline.metadata.tables), baseline.metadata)],
+    ),
+    Migration(
+        version=2,
+        description="Smart word selection columns",
+        # Для баз, созданных до этих колонок
+        operations=[
+            AddColumn("user", "words_shown_counter", "INTEGER DEFAULT 0"),
+            AddColumn("wordprogress", "last_shown_position", "INTEGER DEFAULT 0"),
+            AddColumn("wordprogress", "exp_error_rate", "FLOAT DEFAULT 0.5"),
+        ],
+    ),
+    Migration(
+        version=3,
+        description="Merge duplicate wordprogress rows",
+        operations=MERGE_DUPLICATE_WORD_PROGRESS,
+    ),
+    Migration(
+        version=4,
+        description="Indexes for hot query paths",
+        # Дубликаты могли появиться после миграции 3, пока приложение работало;
+        # слияние повторяется при каждой попытке построить уникальный индекс
+        operations=MERGE_DUPLICATE_WORD_PROGRESS + [
+            CreateIndex("uq_wordprogress_user_word", "wordprogress", "user_id, word_id", unique=True),
+            CreateIndex("ix_wordprogress_user_last_shown", "wordprogress", "user_id, last_shown"),
+            CreateIndex("ix_user_word_events_user_timestamp", "user_word_events", "user_id, timestamp"),
+        ],
+    ),
+    Migration(
+        version=5,
+        description="Running totals of study sessions",
+        # Итоги для пользователей, у которых сессии записаны до появления таблицы
+        operations=[
+            CreateTables(("progress_totals",)),
+            SQL({"*": """
+                INSERT INTO progress_totals
+                    (user_id, sessions_count, total_duration_seconds, total_words_learned, accuracy_sum)
+                SELECT user_id, COUNT(*), COALESCE(SUM(duration_seconds), 0),
+                       COALESCE(SUM(words_learned), 0), COALESCE(SUM(accuracy), 0)
+                FROM progress
+                WHERE true
+                GROUP BY user_id
+                ON CONFLICT (user_id) DO NOTHING
+            """}),
+        ],
+    ),
+    Migration(
+        version=6,
+        description="Index for study session stats by period",
+        operations=[
+            CreateIndex("ix_progress_user_session_start", "progress", "user_id, session_start"),
+        ],
+    ),
+    Migration(
+        version=7,
+        description="Answer batches, catalog version and daily activity rollups",
+        operations=[
+            CreateTables(("answer_batch", "catalog_version", "user_daily_activity", "rollup_state")),
+        ],
+    ),
+]
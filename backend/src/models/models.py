@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import Optional, List
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Float, DateTime, Table
+from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Float, DateTime, Table, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 
@@ -49,6 +49,9 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
 # Progress models using SQLAlchemy
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        Index("ix_progress_user_session_start", "user_id", "session_start"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"))
@@ -61,6 +64,19 @@ class Progress(Base):
     
     user = relationship("User", back_populates="progress")
 
+class ProgressTotals(Base):
+    """
+    Накопленные итоги учебных сессий пользователя. Обновляются вместе с
+    записью сессии, поэтому сводная статистика не читает всю историю progress.
+    """
+    __tablename__ = "progress_totals"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    sessions_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_duration_seconds: Mapped[int] = mapped_column(Integer, default=0)
+    total_words_learned: Mapped[int] = mapped_column(Integer, default=0)
+    accuracy_sum: Mapped[float] = mapped_column(Float, default=0.0)
+
 # Add relationship to User model
 User.progress = relationship("Progress", back_populates="user")
 
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Boolean, Float
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Date, Boolean, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 import uuid
 import json
 
@@ -22,6 +22,11 @@ class Word(Base):
 
 class WordProgress(Base):
     __tablename__ = "wordprogress"
+    __table_args__ = (
+        # Те же индексы создает миграция 4 (src/migrations/versions.py)
+        Index("uq_wordprogress_user_word", "user_id", "word_id", unique=True),
+        Index("ix_wordprogress_user_last_shown", "user_id", "last_shown"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     word_id: Mapped[int] = mapped_column(ForeignKey("word.id"))
@@ -45,6 +50,9 @@ class UserWordEvent(Base):
     Сохраняет каждое событие показа слова и каждый ответ пользователя.
     """
     __tablename__ = "user_word_events"
+    __table_args__ = (
+        Index("ix_user_word_events_user_timestamp", "user_id", "timestamp"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"))
@@ -59,3 +67,52 @@ class UserWordEvent(Base):
     # Relationships
     user = relationship("User", back_populates="word_events")
     word = relationship("Word", back_populates="user_events")
+
+class AnswerBatch(Base):
+    """
+    Принятые пакеты ответов. Повторная отправка пакета с тем же batch_id
+    (например, после обрыва связи) не применяется второй раз.
+    """
+    __tablename__ = "answer_batch"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    batch_id: Mapped[str] = mapped_column(String, primary_key=True)
+    answers_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class CatalogVersion(Base):
+    """
+    Версия каталога слов (таблицы word, wordset, wordset_word).
+    Увеличивается при каждом изменении словаря или состава наборов, чтобы
+    процессы перечитали закэшированный каталог.
+    """
+    __tablename__ = "catalog_version"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+class UserDailyActivity(Base):
+    """
+    Дневная сводка событий пользователя: сколько слов показано, на сколько
+    дан ответ и сколько ответов верны. Обновляется вместе с записью событий,
+    чтобы календарь активности не сканировал user_word_events.
+    """
+    __tablename__ = "user_daily_activity"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    shown_count: Mapped[int] = mapped_column(Integer, default=0)
+    answered_count: Mapped[int] = mapped_column(Integer, default=0)
+    correct_count: Mapped[int] = mapped_column(Integer, default=0)
+
+class RollupState(Base):
+    """
+    Состояние заполнения сводок по историческим событиям.
+    События с id > live_from_event_id учитываются в момент записи;
+    более ранние досчитываются скриптом до last_event_id.
+    """
+    __tablename__ = "rollup_state"
+    
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    live_from_event_id: Mapped[int] = mapped_column(Integer, default=0)
+    last_event_id: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import text
+
+# Локальные импорты
+from ..database import engine, write_engine
+from ..db_pool import pool_status
+from ..startup import startup_state
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/health",
+    tags=["Health"],
+)
+
+# Сколько ждать ответа БД при проверке готовности, секунды
+READINESS_DB_TIMEOUT = 2.0
+
+
+async def _ping_database():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+@router.get("/live", response_model=dict)
+async def liveness():
+    """Процесс жив и обслуживает запросы; БД не проверяется"""
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=dict)
+async def readiness():
+    """Запуск завершен, остановка не началась и БД отвечает"""
+    if not startup_state.ready:
+        raise HTTPException(status_code=503, detail="Not ready")
+    try:
+        await asyncio.wait_for(_ping_database(), READINESS_DB_TIMEOUT)
+    except Exception as e:
+        # Текст ошибки драйвера (хост, пользователь БД) остается в логе
+        logger.warning(f"Readiness check failed: database unavailable: {e!r}")
+        raise HTTPException(status_code=503, detail="Database unavailable") from e
+    return {
+        "status": "ready",
+        "startup_mode": settings.STARTUP_MODE,
+        "startup_ms": startup_state.total_ms,
+        "phases": startup_state.phases,
+    }
+
+
+@router.get("/pool", response_model=dict)
+async def get_pool_status():
+    """Состояние пула соединений с БД и счетчики выдачи соединений"""
+    return pool_status(engine, write_engine)
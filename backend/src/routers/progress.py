@@ -1,14 +1,25 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select, func, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import base64
 import json
 
-from ..database import get_async_session
+from ..database import get_async_session, get_write_session
 from ..models.models import Progress, User
-from ..models.word import WordProgress, UserWordEvent, Word
+from ..models.word import WordProgress, UserWordEvent, Word, AnswerBatch, UserDailyActivity
 from ..auth.router import current_active_user
+from ..auth.cache import current_active_identity, AuthenticatedUser
+from ..services.scheduler import scheduler
+from ..services.answers import new_word_progress, apply_answer, record_answer
+from ..services.events import record_events, make_event
+from ..services.study_stats import add_study_session, get_summary, get_period_stats
+from ..services.export import stream_user_events, EXPORT_FORMATS
 
 router = APIRouter(
     prefix="/api/progress",
@@ -16,12 +27,38 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# Максимальное число ответов в одном пакете
+MAX_ANSWER_BATCH_SIZE = 1000
+
+class AnswerItem(BaseModel):
+    word_id: int
+    is_correct: bool
+    client_timestamp: Optional[datetime] = None
+
+class AnswerBatchRequest(BaseModel):
+    batch_id: str = Field(min_length=1, max_length=64)
+    answers: List[AnswerItem] = Field(min_length=1, max_length=MAX_ANSWER_BATCH_SIZE)
+
+class DayStats(BaseModel):
+    date: str
+    sessions: int
+    total_time: int
+    total_words: int
+    average_accuracy: float
+
+class PeriodStats(BaseModel):
+    sessions: int
+    total_time: int
+    total_words: int
+    average_accuracy: float
+    by_day: Optional[List[DayStats]] = None
+
 @router.post("/session", response_model=dict)
 async def record_study_session(
     duration_seconds: int,
     words_learned: int,
     accuracy: float,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Запись учебной сессии"""
@@ -36,6 +73,7 @@ async def record_study_session(
     )
     
     session.add(progress)
+    await add_study_session(session, progress)
     await session.commit()
     await session.refresh(progress)
     
@@ -47,32 +85,20 @@ async def record_study_session(
         "accuracy": accuracy
     }
 
-@router.get("/stats", response_model=List[dict])
+@router.get("/stats", response_model=PeriodStats)
 async def get_progress_stats(
-    days: int = 7,  # Статистика за последние X дней
+    days: int = Query(7, gt=0),  # Статистика за последние X дней
+    by_day: bool = False,  # Разбивка по дням
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(current_active_user)
 ):
-    """Получение статистики за период"""
+    """
+    Получение статистики за период: число сессий и итоги в тех же полях,
+    что у /summary. by_day всегда присутствует: null без by_day=true,
+    иначе список дней с теми же полями.
+    """
     start_date = datetime.utcnow() - timedelta(days=days)
-    
-    query = select(Progress).where(
-        Progress.user_id == current_user.id,
-        Progress.session_start >= start_date
-    )
-    
-    result = await session.execute(query)
-    progress_list = result.scalars().all()
-    
-    return [
-        {
-            "id": p.id,
-            "user_id": p.user_id,
-            "duration_seconds": p.duration_seconds,
-            "words_learned": p.words_learned,
-            "accuracy": p.accuracy
-        } for p in progress_list
-    ]
+    return await get_period_stats(session, current_user.id, start_date, by_day=by_day)
 
 @router.get("/summary")
 async def get_summary_stats(
@@ -80,91 +106,198 @@ async def get_summary_stats(
     current_user: User = Depends(current_active_user)
 ):
     """Сводная статистика"""
-    query = select(Progress).where(Progress.user_id == current_user.id)
-    result = await session.execute(query)
-    all_sessions = result.scalars().all()
-    
-    if not all_sessions:
-        return {
-            "total_time": 0,
-            "total_words": 0,
-            "average_accuracy": 0
-        }
-    
-    total_time = sum(s.duration_seconds for s in all_sessions)
-    total_words = sum(s.words_learned for s in all_sessions)
-    avg_accuracy = sum(s.accuracy for s in all_sessions) / len(all_sessions)
-    
-    return {
-        "total_time": total_time,
-        "total_words": total_words,
-        "average_accuracy": round(avg_accuracy, 2)
-    }
+    return await get_summary(session, current_user.id)
 
 
 @router.put("/progress/{word_id}")
 async def update_progress(
     word_id: int,
     is_correct: bool,
-    session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(current_active_user)
+    session: AsyncSession = Depends(get_write_session),
+    current_user: AuthenticatedUser = Depends(current_active_identity)
 ):
-    query = select(WordProgress).where(
-        WordProgress.word_id == word_id,
-        WordProgress.user_id == current_user.id
+    progress = await record_answer(session, current_user.id, word_id, is_correct)
+
+    await session.commit()
+
+    # Обновляем очередь планировщика, если пользователь активен в этом процессе
+    schedule = scheduler.peek(current_user.id)
+    if schedule is not None:
+        schedule.record_answer(word_id, progress.last_shown_position, progress.exp_error_rate)
+
+    return {"status": "success"}
+
+async def _claim_answer_batch(session: AsyncSession, user_id, batch_id: str) -> bool:
+    """
+    Записывает batch_id до применения ответов (INSERT ... ON CONFLICT DO NOTHING).
+    False — пакет уже принят, в том числе параллельным запросом.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(AnswerBatch)
+    else:
+        stmt = sqlite.insert(AnswerBatch)
+    result = await session.execute(
+        stmt.values(user_id=user_id, batch_id=batch_id, answers_count=0)
+        .on_conflict_do_nothing(index_elements=[AnswerBatch.user_id, AnswerBatch.batch_id])
     )
-    result = await session.execute(query)
-    progress = result.scalars().first()
-
-    if not progress:
-        progress = WordProgress(
-            word_id=word_id,
-            user_id=current_user.id,
-            shown_count=1,  # This is set to 1 because the word has already been shown
-            correct_count=1 if is_correct else 0,
-            error_count=0 if is_correct else 1,
-            last_shown_position=current_user.words_shown_counter,
-            exp_error_rate=0.0 if is_correct else 1.0  # Initial value based on first answer
+    return result.rowcount == 1
+
+async def _apply_answer_batch(session: AsyncSession, current_user: User, batch: AnswerBatchRequest):
+    """
+    Применяет пакет и коммитит. Возвращает (applied, skipped, progress_by_word)
+    или None, если пакет уже принят.
+    """
+    if not await _claim_answer_batch(session, current_user.id, batch.batch_id):
+        return None
+
+    word_ids = {a.word_id for a in batch.answers}
+
+    # Проверяем существование слов одним запросом
+    known_result = await session.execute(select(Word.id).where(Word.id.in_(word_ids)))
+    known_ids = set(known_result.scalars().all())
+
+    progress_result = await session.execute(
+        select(WordProgress).where(
+            WordProgress.user_id == current_user.id,
+            WordProgress.word_id.in_(known_ids)
         )
-        session.add(progress)
-    else:
-        # Don't increment shown_count here, it's already incremented in get_next_word
-        # progress.shown_count += 1  # This line was causing double counting
-        if is_correct:
-            progress.correct_count += 1
-            # Update exponential error rate (decrease if correct)
-            result_value = 0  # 0 for correct answer
-        else:
-            progress.error_count += 1
-            # Update exponential error rate (increase if incorrect)
-            result_value = 1  # 1 for incorrect answer
-            
-        # Update exponential error rate
-        progress.exp_error_rate = (result_value + progress.exp_error_rate) / 2
-    
-    # Запись события ответа пользователя
-    word_event = UserWordEvent(
-        user_id=current_user.id,
-        word_id=word_id,
-        event_type="answered",
-        is_correct=is_correct
     )
-    session.add(word_event)
+    progress_by_word = {p.word_id: p for p in progress_result.scalars().all()}
+
+    events = []
+    skipped = []
+    for answer in batch.answers:
+        if answer.word_id not in known_ids:
+            skipped.append(answer.word_id)
+            continue
+
+        progress = progress_by_word.get(answer.word_id)
+        if not progress:
+            progress = new_word_progress(
+                current_user.id, answer.word_id, answer.is_correct, current_user.words_shown_counter
+            )
+            session.add(progress)
+            progress_by_word[answer.word_id] = progress
+        else:
+            apply_answer(progress, answer.is_correct)
 
+        timestamp = answer.client_timestamp or datetime.utcnow()
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        events.append(make_event(
+            current_user.id,
+            answer.word_id,
+            "answered",
+            is_correct=answer.is_correct,
+            timestamp=timestamp
+        ))
+
+    await session.execute(
+        update(AnswerBatch)
+        .where(AnswerBatch.user_id == current_user.id, AnswerBatch.batch_id == batch.batch_id)
+        .values(answers_count=len(events))
+    )
+    await record_events(session, events)
     await session.commit()
-    return {"status": "success"}
+    return len(events), skipped, progress_by_word
+
+@router.post("/progress/bulk")
+async def update_progress_bulk(
+    batch: AnswerBatchRequest,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: User = Depends(current_active_user)
+):
+    """
+    Пакетная отправка накопленных ответов (офлайн-клиенты).
+    Ответы применяются по порядку; пакет с уже принятым batch_id не применяется повторно.
+    """
+    existing = await session.get(AnswerBatch, (current_user.id, batch.batch_id))
+    if existing:
+        return {
+            "status": "already_applied",
+            "batch_id": batch.batch_id,
+            "applied": existing.answers_count
+        }
+
+    # Повтор нужен, если параллельный запрос (например, /next) создал ту же
+    # строку WordProgress: во второй раз она будет прочитана и обновлена
+    for attempt in range(2):
+        try:
+            result = await _apply_answer_batch(session, current_user, batch)
+            break
+        except IntegrityError:
+            await session.rollback()
+            if attempt:
+                raise HTTPException(status_code=409, detail="Concurrent update, retry the batch")
 
-@router.get("/events", response_model=List[dict])
+    if result is None:
+        # Тот же пакет принят другим запросом
+        await session.rollback()
+        existing = await session.get(AnswerBatch, (current_user.id, batch.batch_id))
+        return {
+            "status": "already_applied",
+            "batch_id": batch.batch_id,
+            "applied": existing.answers_count if existing else 0
+        }
+
+    applied, skipped, progress_by_word = result
+    schedule = scheduler.peek(current_user.id)
+    if schedule is not None:
+        for progress in progress_by_word.values():
+            schedule.record_answer(progress.word_id, progress.last_shown_position, progress.exp_error_rate)
+
+    return {
+        "status": "success",
+        "batch_id": batch.batch_id,
+        "applied": applied,
+        "skipped": skipped
+    }
+
+# Максимальный размер страницы событий
+MAX_EVENTS_PAGE_SIZE = 500
+
+def _encode_events_cursor(timestamp: datetime, event_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{event_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_events_cursor(cursor: str):
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/events", response_model=dict)
 async def get_user_word_events(
-    limit: int = Query(100, gt=0),
-    offset: int = Query(0, ge=0),
+    limit: int = Query(100, gt=0, le=MAX_EVENTS_PAGE_SIZE),
+    cursor: Optional[str] = None,  # next_cursor предыдущей страницы
     word_id: Optional[int] = None,
     event_type: Optional[str] = None,
+    include_metadata: bool = True,
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(current_active_user)
 ):
-    """Получение истории событий взаимодействия со словами"""
-    query = select(UserWordEvent).where(
+    """
+    Получение истории событий взаимодействия со словами.
+    Страницы идут от новых событий к старым по ключу (timestamp, id), поэтому
+    любая страница стоит столько же, сколько первая.
+    """
+    columns = [
+        UserWordEvent.id,
+        UserWordEvent.word_id,
+        Word.english,
+        Word.russian,
+        UserWordEvent.event_type,
+        UserWordEvent.is_correct,
+        UserWordEvent.timestamp,
+    ]
+    if include_metadata:
+        columns.append(UserWordEvent.event_data)
+
+    # Текст слова берем в том же запросе
+    query = select(*columns).outerjoin(
+        Word, Word.id == UserWordEvent.word_id
+    ).where(
         UserWordEvent.user_id == current_user.id
     )
     
@@ -174,36 +307,61 @@ async def get_user_word_events(
     
     if event_type is not None:
         query = query.where(UserWordEvent.event_type == event_type)
+
+    # Продолжаем после последнего события предыдущей страницы
+    if cursor is not None:
+        query = query.where(
+            tuple_(UserWordEvent.timestamp, UserWordEvent.id) < tuple_(*_decode_events_cursor(cursor))
+        )
     
     # Сортировка по времени (сначала новые)
-    query = query.order_by(UserWordEvent.timestamp.desc())
-    
-    # Пагинация
-    query = query.offset(offset).limit(limit)
+    query = query.order_by(
+        UserWordEvent.timestamp.desc(),
+        UserWordEvent.id.desc()
+    ).limit(limit)
     
     result = await session.execute(query)
-    events = result.scalars().all()
-    
-    # Получаем информацию о словах для отображения
-    word_ids = [e.word_id for e in events]
-    words_query = select(Word).where(Word.id.in_(word_ids))
-    words_result = await session.execute(words_query)
-    words = {w.id: w for w in words_result.scalars().all()}
-    
-    return [
-        {
-            "id": e.id,
-            "word_id": e.word_id,
+    rows = result.all()
+
+    events = []
+    for row in rows:
+        event = {
+            "id": row.id,
+            "word_id": row.word_id,
             "word": {
-                "english": words[e.word_id].english if e.word_id in words else None,
-                "russian": words[e.word_id].russian if e.word_id in words else None
+                "english": row.english,
+                "russian": row.russian
             },
-            "event_type": e.event_type,
-            "is_correct": e.is_correct,
-            "timestamp": e.timestamp,
-            "metadata": json.loads(e.event_data) if e.event_data else None
-        } for e in events
-    ]
+            "event_type": row.event_type,
+            "is_correct": row.is_correct,
+            "timestamp": row.timestamp
+        }
+        if include_metadata:
+            event["metadata"] = json.loads(row.event_data) if row.event_data else None
+        events.append(event)
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = _encode_events_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return {
+        "events": events,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/events/export")
+async def export_user_word_events(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    word_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    current_user: User = Depends(current_active_user)
+):
+    """Потоковая выгрузка всей истории событий в NDJSON или CSV"""
+    return StreamingResponse(
+        stream_user_events(current_user.id, format, word_id=word_id, event_type=event_type),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="events.{format}"'}
+    )
 
 @router.get("/activity-calendar")
 async def get_activity_calendar(
@@ -212,60 +370,52 @@ async def get_activity_calendar(
     current_user: User = Depends(current_active_user)
 ):
     """Получение данных для календаря активности"""
-    start_date = datetime.utcnow() - timedelta(days=days)
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
     
-    # Определяем тип базы данных по URL
-    from ..database import DATABASE_URL
-    
-    # Запрос для подсчета событий по дням
-    if DATABASE_URL.startswith('sqlite'):
-        # SQLite использует strftime для работы с датами
-        query = select(
-            func.strftime('%Y-%m-%d', UserWordEvent.timestamp).label('day'),
-            func.count().label('count')
-        ).where(
-            UserWordEvent.user_id == current_user.id,
-            UserWordEvent.timestamp >= start_date,
-            UserWordEvent.event_type == "answered"  # Считаем только ответы
-        ).group_by(
-            func.strftime('%Y-%m-%d', UserWordEvent.timestamp)
-        ).order_by(
-            func.strftime('%Y-%m-%d', UserWordEvent.timestamp)
-        )
-    else:
-        # PostgreSQL использует date_trunc
-        # Создаем выражение один раз и используем его везде
-        day_trunc = func.date_trunc('day', UserWordEvent.timestamp).label('day')
-        
-        query = select(
-            day_trunc,
-            func.count().label('count')
-        ).where(
-            UserWordEvent.user_id == current_user.id,
-            UserWordEvent.timestamp >= start_date,
-            UserWordEvent.event_type == "answered"  # Считаем только ответы
-        ).group_by(
-            day_trunc
-        ).order_by(
-            day_trunc
-        )
+    # Читаем дневные сводки вместо группировки сырых событий
+    query = select(
+        UserDailyActivity.day,
+        UserDailyActivity.answered_count
+    ).where(
+        UserDailyActivity.user_id == current_user.id,
+        UserDailyActivity.day >= start_day,
+        UserDailyActivity.answered_count > 0  # Считаем только ответы
+    ).order_by(
+        UserDailyActivity.day
+    )
     
     result = await session.execute(query)
-    activity_data = result.all()
     
-    # Форматируем результат
-    calendar_data = []
-    for day, count in activity_data:
-        # Если day уже строка (SQLite), используем её напрямую
-        if isinstance(day, str):
-            date_str = day
-        else:
-            # Иначе форматируем datetime объект (PostgreSQL)
-            date_str = day.strftime("%Y-%m-%d")
-        
-        calendar_data.append({
-            "date": date_str,
+    return [
+        {
+            "date": day.strftime("%Y-%m-%d"),
             "count": count
-        })
+        } for day, count in result.all()
+    ]
+
+@router.get("/daily-activity")
+async def get_daily_activity(
+    days: int = Query(30, gt=0, le=3660),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_active_user)
+):
+    """Показы, ответы и верные ответы по дням"""
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
     
-    return calendar_data
+    result = await session.execute(
+        select(UserDailyActivity)
+        .where(
+            UserDailyActivity.user_id == current_user.id,
+            UserDailyActivity.day >= start_day
+        )
+        .order_by(UserDailyActivity.day)
+    )
+    
+    return [
+        {
+            "date": a.day.strftime("%Y-%m-%d"),
+            "shown": a.shown_count,
+            "answered": a.answered_count,
+            "correct": a.correct_count
+        } for a in result.scalars().all()
+    ]
@@ -2,17 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict
-import random
 import json
-import math
+import uuid
 from datetime import datetime, timedelta
-import random
 
 # Локальные импорты
-from ..database import get_async_session
-from ..models.word import Word, WordProgress, UserWordEvent
-from ..models.models import User, user_wordset, wordset_word
-from ..auth.router import current_active_user
+from ..database import get_async_session, get_write_session
+from ..models.word import Word, WordProgress
+from ..auth.cache import current_active_identity, AuthenticatedUser
+from ..services.selection import pick_next_word_id, reserve_positions
+from ..services.scheduler import scheduler, load_schedule
+from ..services.catalog import catalog_cache
+from ..services.answers import record_answer
+from ..services.events import record_events, make_event
+from ..config import settings
 
 router = APIRouter(
     prefix="/api/words",
@@ -29,23 +32,25 @@ async def get_words(
 ):
     """Получение списка слов с фильтрацией по категории"""
     try:
-        query = select(Word)
         if category:
-            query = query.where(Word.category == category)
-        
-        query = query.offset(offset).limit(limit)
-        
-        result = await session.execute(query)
-        words = result.scalars().all()
-        
-        return [
-            {
-                "id": w.id,
-                "english": w.english,
-                "russian": w.russian,
-                "audio_path": w.audio_path
-            } for w in words
-        ]
+            query = select(Word).where(Word.category == category)
+            query = query.offset(offset).limit(limit)
+            
+            result = await session.execute(query)
+            words = result.scalars().all()
+            
+            return [
+                {
+                    "id": w.id,
+                    "english": w.english,
+                    "russian": w.russian,
+                    "audio_path": w.audio_path
+                } for w in words
+            ]
+
+        # Без фильтра список отдается из каталога в памяти
+        catalog = await catalog_cache.get(session)
+        return [catalog.word(i) for i in range(offset, min(offset + limit, len(catalog)))]
     
     except Exception as e:
         raise HTTPException(
@@ -54,186 +59,264 @@ async def get_words(
         ) from e
 
 
+async def _show_next_word(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    exclude_last: int,
+    alpha: float
+) -> dict:
+    """
+    Выбирает следующее слово, готовит варианты ответа и записывает показ
+    (прогресс, счетчик, событие) без коммита. Возвращает карточку для ответа.
+    """
+    # Update user's word counter: позиция этого показа
+    position = await reserve_positions(session, user_id)
+    current_position = position - 1
+
+    schedule = None
+    if settings.SCHEDULER_ENABLED:
+        # Берем вершину очереди пользователя из памяти процесса
+        schedule = await scheduler.get(session, user_id, current_position)
+        next_word_id = schedule.pick(alpha=alpha, exclude_last=exclude_last)
+    else:
+        # Оцениваем всех кандидатов одним запросом и берем слово с максимальным весом
+        next_word_id = await pick_next_word_id(
+            session,
+            user_id,
+            current_position,
+            alpha=alpha,
+            exclude_last=exclude_last,
+        )
+    if next_word_id is None:
+        raise HTTPException(400, "База слов пуста. Добавьте слова через админку")
+    next_word = await session.get(Word, next_word_id)
+
+    # Генерация вариантов ответов из каталога в памяти (не читаем всю таблицу word)
+    catalog = await catalog_cache.get(session)
+    if next_word.id not in catalog:
+        # Слово добавлено после загрузки каталога
+        catalog = await catalog_cache.reload(session)
+    options = catalog.options_for(
+        next_word.id,
+        count=7,
+        same_wordset=settings.DISTRACTOR_MODE == "wordset",
+    )
+
+    # Update word progress
+    progress_result = await session.execute(
+        select(WordProgress)
+        .where(WordProgress.user_id == user_id)
+        .where(WordProgress.word_id == next_word.id)
+    )
+    progress = progress_result.scalars().first()
+
+    if not progress:
+        progress = WordProgress(
+            user_id=user_id,
+            word_id=next_word.id,
+            shown_count=1,
+            last_shown_position=position
+        )
+    else:
+        progress.shown_count += 1
+        progress.last_shown = datetime.utcnow()
+        progress.last_shown_position = position
+
+    session.add(progress)
+
+    # Запись события показа слова
+    await record_events(session, [make_event(
+        user_id,
+        next_word.id,
+        "shown",
+        event_data=json.dumps({
+            "options": [opt["id"] for opt in options]  # Сохраняем ID предложенных вариантов
+        })
+    )])
+
+    # Расписание продвигается до коммита; при ошибке вызывающий сбрасывает его
+    if schedule is not None:
+        schedule.record_show(next_word.id, position)
+
+    return {
+        "word": {
+            "id": next_word.id,
+            "english": next_word.english,
+            "russian": next_word.russian,
+            "audio_path": next_word.audio_path
+        },
+        "options": options,
+        "correct_id": next_word.id
+    }
+
+
 @router.get("/next", response_model=dict)
 async def get_next_word(
-    session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_write_session),
+    current_user: AuthenticatedUser = Depends(current_active_identity),
     exclude_last: int = Query(5),
     alpha: float = Query(2.0)  # Configurable alpha parameter for the algorithm
 ):
+    user_id = current_user.id
     try:
-        # Получаем ID наборов слов, назначенных пользователю
-        user_wordsets_result = await session.execute(
-            select(user_wordset.c.wordset_id)
-            .where(user_wordset.c.user_id == current_user.id)
+        card = await _show_next_word(session, user_id, exclude_last, alpha)
+        await session.commit()
+        return card
+
+    except Exception as e:
+        await session.rollback()
+        scheduler.invalidate(user_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/answer-and-next", response_model=dict)
+async def answer_and_get_next_word(
+    word_id: int,
+    is_correct: bool,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: AuthenticatedUser = Depends(current_active_identity),
+    exclude_last: int = Query(5),
+    alpha: float = Query(2.0)
+):
+    """
+    Ответ на текущее слово и следующая карточка за один запрос:
+    ответ, обновление WordProgress и показ следующего слова в одной транзакции.
+    """
+    user_id = current_user.id
+    try:
+        progress = await record_answer(session, user_id, word_id, is_correct)
+
+        # Новый exp_error_rate должен учитываться при выборе следующего слова
+        schedule = scheduler.peek(user_id)
+        if schedule is not None:
+            schedule.record_answer(word_id, progress.last_shown_position, progress.exp_error_rate)
+
+        card = await _show_next_word(session, user_id, exclude_last, alpha)
+        await session.commit()
+        return card
+
+    except Exception as e:
+        await session.rollback()
+        scheduler.invalidate(user_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Максимальный размер колоды за один запрос
+MAX_BATCH_SIZE = 100
+
+
+@router.get("/next-batch", response_model=dict)
+async def get_next_words_batch(
+    count: int = Query(10, gt=0, le=MAX_BATCH_SIZE),
+    session: AsyncSession = Depends(get_write_session),
+    current_user: AuthenticatedUser = Depends(current_active_identity),
+    exclude_last: int = Query(5),
+    alpha: float = Query(2.0)
+):
+    """
+    Колода из count следующих слов с вариантами ответов.
+    Позиция пользователя продвигается между карточками так же, как при
+    последовательных вызовах /next; прогресс и события показа пишутся одним коммитом.
+    """
+    user_id = current_user.id
+    try:
+        # Резервируем позиции всей колоды; колода короче count бывает только
+        # при пустом словаре, и тогда транзакция откатывается
+        start_position = await reserve_positions(session, user_id, count) - count
+
+        if settings.SCHEDULER_ENABLED:
+            schedule = await scheduler.get(session, user_id, start_position)
+        else:
+            schedule = await load_schedule(session, user_id, start_position)
+
+        # Симулируем показ слов по очереди
+        picked = []
+        for step in range(count):
+            word_id = schedule.pick(alpha=alpha, exclude_last=exclude_last)
+            if word_id is None:
+                break
+            schedule.record_show(word_id, start_position + step + 1)
+            picked.append(word_id)
+
+        if not picked:
+            raise HTTPException(400, "База слов пуста. Добавьте слова через админку")
+
+        words_result = await session.execute(
+            select(Word).where(Word.id.in_(set(picked)))
         )
-        user_wordset_ids = user_wordsets_result.scalars().all()
-        
-        # Получаем последние показанные слова
-        last_shown_result = await session.execute(
-            select(WordProgress.word_id)
-            .where(WordProgress.user_id == current_user.id)
-            .order_by(WordProgress.last_shown.desc())
-            .limit(exclude_last)
+        words = {w.id: w for w in words_result.scalars().all()}
+
+        progress_result = await session.execute(
+            select(WordProgress)
+            .where(WordProgress.user_id == user_id)
+            .where(WordProgress.word_id.in_(set(picked)))
         )
-        last_shown = last_shown_result.scalars().all()
-        
-        # Базовый запрос
-        base_query = select(Word)
-        
-        # Если пользователю назначены наборы слов, выбираем слова только из этих наборов
-        if user_wordset_ids:
-            # Получаем ID слов из наборов пользователя
-            user_words_result = await session.execute(
-                select(wordset_word.c.word_id)
-                .where(wordset_word.c.wordset_id.in_(user_wordset_ids))
-            )
-            user_word_ids = user_words_result.scalars().all()
-            
-            if not user_word_ids:
-                # Если в наборах пользователя нет слов, используем все слова
-                result = await session.execute(select(Word))
-                all_words = result.scalars().all()
-                if not all_words:
-                    raise HTTPException(400, "База слов пуста. Добавьте слова через админку")
-            else:
-                # Ограничиваем выборку словами из наборов пользователя
-                base_query = base_query.where(Word.id.in_(user_word_ids))
-        else:
-            # Если пользователю не назначены наборы, проверяем наличие слов в базе
-            result = await session.execute(select(Word))
-            all_words = result.scalars().all()
-            if not all_words:
-                raise HTTPException(400, "База слов пуста. Добавьте слова через админку")
-        
-        # Исключаем последние показанные слова
-        if last_shown:
-            base_query = base_query.where(Word.id.not_in(last_shown))
-        
-        # Get all candidate words (CHANGED: removed the limit(100))
-        candidates_result = await session.execute(base_query)
-        candidates = candidates_result.scalars().all()
-        
-        if not candidates:
-            # Если после всех фильтров не осталось кандидатов, берем любое слово
-            if user_wordset_ids:
-                # Из наборов пользователя, если они есть
-                user_words_query = select(Word).where(
-                    Word.id.in_(
-                        select(wordset_word.c.word_id)
-                        .where(wordset_word.c.wordset_id.in_(user_wordset_ids))
-                    )
-                )
-                result = await session.execute(user_words_query)
-                candidates = result.scalars().all()
-                
-                if not candidates:
-                    # Если в наборах пользователя нет слов, используем все слова
-                    result = await session.execute(select(Word))
-                    candidates = result.scalars().all()
-            else:
-                # Или из всех слов, если наборы не назначены
-                result = await session.execute(select(Word))
-                candidates = result.scalars().all()
-        
-        # Get current user's word counter
-        current_position = current_user.words_shown_counter
-        
-        # Calculate selection weights for each candidate
-        candidate_weights = []
-        for word in candidates:
-            # Get word progress
-            progress_result = await session.execute(
-                select(WordProgress)
-                .where(WordProgress.user_id == current_user.id)
-                .where(WordProgress.word_id == word.id)
-            )
-            progress = progress_result.scalars().first()
-            
-            if not progress:
-                # New word, never shown
-                age = max(1, current_position) + 100  # Default high value for new words
-                exp_error_rate = 0.5  # Neutral starting point
-            else:
-                # Calculate age in terms of words shown since last appearance
-                age = max(1, current_position - progress.last_shown_position)
-                exp_error_rate = progress.exp_error_rate
-            
-            # Calculate selection weight
-            selection_weight = math.log(age) + exp_error_rate * alpha + random.random() / 100
-            
-            candidate_weights.append((word, selection_weight))
-        
-        # Select word with maximum weight
-        if candidate_weights:
-            next_word, _ = max(candidate_weights, key=lambda x: x[1])
-        else:
-            next_word = None
-
-        # Генерация вариантов ответов
-        result = await session.execute(select(Word))
-        all_words = result.scalars().all()
-        wrong_choices = [w for w in all_words if w.id != next_word.id]
-        options = random.sample(wrong_choices, min(7, len(wrong_choices))) + [next_word]
-        random.shuffle(options)
-
-        # Update user's word counter
-        current_user.words_shown_counter += 1
-        session.add(current_user)
-
-        # Update word progress
-        if next_word:
-            progress_result = await session.execute(
-                select(WordProgress)
-                .where(WordProgress.user_id == current_user.id)
-                .where(WordProgress.word_id == next_word.id)
+        progress_by_word = {p.word_id: p for p in progress_result.scalars().all()}
+
+        catalog = await catalog_cache.get(session)
+        if any(word_id not in catalog for word_id in words):
+            catalog = await catalog_cache.reload(session)
+
+        now = datetime.utcnow()
+        cards = []
+        events = []
+        for step, word_id in enumerate(picked):
+            word = words[word_id]
+            position = start_position + step + 1
+            # Сохраняем порядок показа для exclude_last
+            shown_at = now + timedelta(microseconds=step)
+
+            options = catalog.options_for(
+                word_id,
+                count=7,
+                same_wordset=settings.DISTRACTOR_MODE == "wordset",
             )
-            progress = progress_result.scalars().first()
 
+            progress = progress_by_word.get(word_id)
             if not progress:
                 progress = WordProgress(
-                    user_id=current_user.id,
-                    word_id=next_word.id,
+                    user_id=user_id,
+                    word_id=word_id,
                     shown_count=1,
-                    last_shown_position=current_user.words_shown_counter
+                    last_shown=shown_at,
+                    last_shown_position=position
                 )
+                session.add(progress)
+                progress_by_word[word_id] = progress
             else:
                 progress.shown_count += 1
-                progress.last_shown = datetime.utcnow()
-                progress.last_shown_position = current_user.words_shown_counter
+                progress.last_shown = shown_at
+                progress.last_shown_position = position
 
-            session.add(progress)
-            
-            # Запись события показа слова
-            word_event = UserWordEvent(
-                user_id=current_user.id,
-                word_id=next_word.id,
-                event_type="shown",
+            events.append(make_event(
+                user_id,
+                word_id,
+                "shown",
                 event_data=json.dumps({
-                    "options": [opt.id for opt in options]  # Сохраняем ID предложенных вариантов
-                })
-            )
-            session.add(word_event)
-            
-            await session.commit()
-
-        return {
-            "word": {
-                "id": next_word.id,
-                "english": next_word.english,
-                "russian": next_word.russian,
-                "audio_path": next_word.audio_path
-            } if next_word else None,
-            "options":[
-                {
-                    "id": w.id,
-                    "english": w.english,
-                    "russian": w.russian
-                } for w in options
-            ], 
-            "correct_id": next_word.id if next_word else None
-        }
+                    "options": [opt["id"] for opt in options]
+                }),
+                timestamp=shown_at
+            ))
+
+            cards.append({
+                "word": {
+                    "id": word.id,
+                    "english": word.english,
+                    "russian": word.russian,
+                    "audio_path": word.audio_path
+                },
+                "options": options,
+                "correct_id": word.id
+            })
+
+        await record_events(session, events)
+
+        await session.commit()
+
+        return {"cards": cards}
 
     except Exception as e:
         await session.rollback()
+        # Расписание уже продвинуто симуляцией и не совпадает с БД
+        scheduler.invalidate(user_id)
         raise HTTPException(status_code=500, detail=str(e))
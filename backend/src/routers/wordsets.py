@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uuid
 
-from ..database import get_async_session
+from ..database import get_async_session, get_write_session
 from ..models.models import WordSet, user_wordset, wordset_word
 from ..models.word import Word
 from ..models.models import User
 from ..auth.router import current_active_user
+from ..services.scheduler import scheduler
+from ..services.eligibility import eligible_words
+from ..services.catalog import catalog_cache, bump_catalog_version
 
 router = APIRouter(
     prefix="/api/wordsets",
@@ -17,7 +21,7 @@ router = APIRouter(
 )
 
 # Схемы для запросов и ответов
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class WordSetCreate(BaseModel):
     name: str
@@ -39,10 +43,29 @@ class WordSetAssign(BaseModel):
     user_id: uuid.UUID
     wordset_id: int
 
+def wordsets_with_counts(user_id: Optional[uuid.UUID] = None):
+    """
+    Наборы слов с количеством слов одним запросом (GROUP BY по wordset_word);
+    с user_id — только наборы, назначенные пользователю.
+    """
+    query = select(
+        WordSet.id,
+        WordSet.name,
+        WordSet.description,
+        func.count(wordset_word.c.word_id).label("word_count")
+    ).outerjoin(
+        wordset_word, wordset_word.c.wordset_id == WordSet.id
+    )
+    if user_id is not None:
+        query = query.join(
+            user_wordset, user_wordset.c.wordset_id == WordSet.id
+        ).where(user_wordset.c.user_id == user_id)
+    return query.group_by(WordSet.id, WordSet.name, WordSet.description).order_by(WordSet.id)
+
 @router.post("/", response_model=WordSetResponse)
 async def create_wordset(
     wordset: WordSetCreate,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Создание нового набора слов"""
@@ -55,8 +78,10 @@ async def create_wordset(
     )
     
     session.add(new_wordset)
+    await bump_catalog_version(session)
     await session.commit()
     await session.refresh(new_wordset)
+    catalog_cache.invalidate()
     
     return {
         "id": new_wordset.id,
@@ -71,27 +96,18 @@ async def get_wordsets(
     current_user: User = Depends(current_active_user)
 ):
     """Получение списка всех наборов слов"""
-    result = await session.execute(select(WordSet))
-    wordsets = result.scalars().all()
-    
-    # Для каждого набора получаем количество слов
-    response = []
-    for ws in wordsets:
-        # Подсчет количества слов в наборе
-        count_result = await session.execute(
-            select(wordset_word)
-            .where(wordset_word.c.wordset_id == ws.id)
-        )
-        word_count = len(count_result.all())
-        
-        response.append({
-            "id": ws.id,
-            "name": ws.name,
-            "description": ws.description,
-            "word_count": word_count
-        })
-    
-    return response
+    result = await session.execute(wordsets_with_counts())
+    return [row._asdict() for row in result.all()]
+
+@router.get("/my", response_model=List[WordSetResponse])
+async def get_my_wordsets(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_active_user)
+):
+    """Получение списка наборов слов, назначенных текущему пользователю"""
+    # Получаем наборы слов пользователя
+    result = await session.execute(wordsets_with_counts(current_user.id))
+    return [row._asdict() for row in result.all()]
 
 @router.get("/{wordset_id}", response_model=WordSetDetail)
 async def get_wordset(
@@ -100,32 +116,21 @@ async def get_wordset(
     current_user: User = Depends(current_active_user)
 ):
     """Получение детальной информации о наборе слов, включая список слов"""
-    result = await session.execute(
-        select(WordSet).where(WordSet.id == wordset_id)
-    )
-    wordset = result.scalars().first()
-    
-    if not wordset:
+    # Набор и его слова берем из каталога в памяти
+    catalog = await catalog_cache.get(session)
+    if wordset_id not in catalog.wordsets:
+        # Набор мог быть создан через другой процесс
+        catalog = await catalog_cache.get(session, force_check=True)
+    if wordset_id not in catalog.wordsets:
         raise HTTPException(status_code=404, detail="Набор слов не найден")
-    
-    # Получаем слова из набора
-    words_result = await session.execute(
-        select(Word)
-        .join(wordset_word, Word.id == wordset_word.c.word_id)
-        .where(wordset_word.c.wordset_id == wordset_id)
-    )
-    words = words_result.scalars().all()
+    name, description = catalog.wordsets[wordset_id]
     
     return {
-        "id": wordset.id,
-        "name": wordset.name,
-        "description": wordset.description,
+        "id": wordset_id,
+        "name": name,
+        "description": description,
         "words": [
-            {
-                "id": word.id,
-                "english": word.english,
-                "russian": word.russian
-            } for word in words
+            catalog.option(i) for i in catalog.set_members[wordset_id]
         ]
     }
 
@@ -133,7 +138,7 @@ async def get_wordset(
 async def add_word_to_set(
     wordset_id: int,
     word_id: int,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Добавление слова в набор"""
@@ -169,7 +174,11 @@ async def add_word_to_set(
             word_id=word_id
         )
     )
+    await bump_catalog_version(session)
     await session.commit()
+    # Состав набора изменился — расписания пользователей и каталог устарели
+    scheduler.invalidate()
+    catalog_cache.invalidate()
     
     return {"status": "success"}
 
@@ -177,7 +186,7 @@ async def add_word_to_set(
 async def remove_word_from_set(
     wordset_id: int,
     word_id: int,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Удаление слова из набора"""
@@ -196,14 +205,127 @@ async def remove_word_from_set(
         .where(wordset_word.c.wordset_id == wordset_id)
         .where(wordset_word.c.word_id == word_id)
     )
+    await bump_catalog_version(session)
     await session.commit()
+    # Состав набора изменился — расписания пользователей и каталог устарели
+    scheduler.invalidate()
+    catalog_cache.invalidate()
     
     return {"status": "success"}
 
+# Максимальное число слов в одном пакетном запросе
+MAX_BULK_WORDS = 5000
+
+class WordSetWordsBulk(BaseModel):
+    word_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_WORDS)
+
+async def _load_membership(session: AsyncSession, wordset_id: int, word_ids: List[int]):
+    """
+    Одним запросом: какие из word_ids существуют и какие из них уже в наборе.
+    Возвращает (существующие ID, ID в наборе).
+    """
+    result = await session.execute(
+        select(Word.id, wordset_word.c.word_id)
+        .outerjoin(
+            wordset_word,
+            (wordset_word.c.word_id == Word.id) & (wordset_word.c.wordset_id == wordset_id)
+        )
+        .where(Word.id.in_(word_ids))
+    )
+    existing, members = set(), set()
+    for word_id, member_id in result.all():
+        existing.add(word_id)
+        if member_id is not None:
+            members.add(word_id)
+    return existing, members
+
+async def _get_wordset_or_404(session: AsyncSession, wordset_id: int) -> WordSet:
+    wordset = await session.get(WordSet, wordset_id)
+    if not wordset:
+        raise HTTPException(status_code=404, detail="Набор слов не найден")
+    return wordset
+
+@router.post("/{wordset_id}/words")
+async def add_words_to_set(
+    wordset_id: int,
+    payload: WordSetWordsBulk,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: User = Depends(current_active_user)
+):
+    """Пакетное добавление слов в набор"""
+    await _get_wordset_or_404(session, wordset_id)
+    word_ids = list(dict.fromkeys(payload.word_ids))
+    existing, members = await _load_membership(session, wordset_id, word_ids)
+
+    to_add = [word_id for word_id in word_ids if word_id in existing and word_id not in members]
+    inserted = set()
+    if to_add:
+        # Один многострочный INSERT; связи, добавленные параллельно, пропускаются,
+        # а в ответ попадают только строки, вставленные этим запросом
+        if session.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(wordset_word)
+        else:
+            stmt = sqlite.insert(wordset_word)
+        result = await session.execute(
+            stmt.on_conflict_do_nothing().returning(wordset_word.c.word_id),
+            [{"wordset_id": wordset_id, "word_id": word_id} for word_id in to_add]
+        )
+        inserted = set(result.scalars().all())
+    if inserted:
+        await bump_catalog_version(session)
+        await session.commit()
+        # Состав набора изменился — расписания пользователей и каталог устарели
+        scheduler.invalidate()
+        catalog_cache.invalidate()
+
+    return {
+        "status": "success",
+        "added": [word_id for word_id in word_ids if word_id in inserted],
+        "already_exists": [
+            word_id for word_id in word_ids if word_id in existing and word_id not in inserted
+        ],
+        "not_found": [word_id for word_id in word_ids if word_id not in existing]
+    }
+
+@router.delete("/{wordset_id}/words")
+async def remove_words_from_set(
+    wordset_id: int,
+    payload: WordSetWordsBulk,
+    session: AsyncSession = Depends(get_write_session),
+    current_user: User = Depends(current_active_user)
+):
+    """Пакетное удаление слов из набора"""
+    await _get_wordset_or_404(session, wordset_id)
+    word_ids = list(dict.fromkeys(payload.word_ids))
+    existing, members = await _load_membership(session, wordset_id, word_ids)
+
+    to_remove = [word_id for word_id in word_ids if word_id in members]
+    deleted = set()
+    if to_remove:
+        # Связи, удаленные параллельно, в ответ не попадают
+        result = await session.execute(
+            delete(wordset_word)
+            .where(wordset_word.c.wordset_id == wordset_id)
+            .where(wordset_word.c.word_id.in_(to_remove))
+            .returning(wordset_word.c.word_id)
+        )
+        deleted = set(result.scalars().all())
+    if deleted:
+        await bump_catalog_version(session)
+        await session.commit()
+        scheduler.invalidate()
+        catalog_cache.invalidate()
+
+    return {
+        "status": "success",
+        "removed": [word_id for word_id in word_ids if word_id in deleted],
+        "not_in_set": [word_id for word_id in word_ids if word_id not in deleted]
+    }
+
 @router.post("/assign")
 async def assign_wordset_to_user(
     assignment: WordSetAssign,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Назначение набора слов пользователю"""
@@ -240,13 +362,15 @@ async def assign_wordset_to_user(
         )
     )
     await session.commit()
+    eligible_words.invalidate(assignment.user_id)
+    scheduler.invalidate(assignment.user_id)
     
     return {"status": "success"}
 
 @router.delete("/unassign")
 async def unassign_wordset_from_user(
     assignment: WordSetAssign,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_write_session),
     current_user: User = Depends(current_active_user)
 ):
     """Отмена назначения набора слов пользователю"""
@@ -266,6 +390,8 @@ async def unassign_wordset_from_user(
         .where(user_wordset.c.wordset_id == assignment.wordset_id)
     )
     await session.commit()
+    eligible_words.invalidate(assignment.user_id)
+    scheduler.invalidate(assignment.user_id)
     
     return {"status": "success"}
 
@@ -285,61 +411,5 @@ async def get_user_wordsets(
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
     # Получаем наборы слов пользователя
-    wordsets_result = await session.execute(
-        select(WordSet)
-        .join(user_wordset, WordSet.id == user_wordset.c.wordset_id)
-        .where(user_wordset.c.user_id == user_id)
-    )
-    wordsets = wordsets_result.scalars().all()
-    
-    # Для каждого набора получаем количество слов
-    response = []
-    for ws in wordsets:
-        # Подсчет количества слов в наборе
-        count_result = await session.execute(
-            select(wordset_word)
-            .where(wordset_word.c.wordset_id == ws.id)
-        )
-        word_count = len(count_result.all())
-        
-        response.append({
-            "id": ws.id,
-            "name": ws.name,
-            "description": ws.description,
-            "word_count": word_count
-        })
-    
-    return response
-
-@router.get("/my", response_model=List[WordSetResponse])
-async def get_my_wordsets(
-    session: AsyncSession = Depends(get_async_session),
-    current_user: User = Depends(current_active_user)
-):
-    """Получение списка наборов слов, назначенных текущему пользователю"""
-    # Получаем наборы слов пользователя
-    wordsets_result = await session.execute(
-        select(WordSet)
-        .join(user_wordset, WordSet.id == user_wordset.c.wordset_id)
-        .where(user_wordset.c.user_id == current_user.id)
-    )
-    wordsets = wordsets_result.scalars().all()
-    
-    # Для каждого набора получаем количество слов
-    response = []
-    for ws in wordsets:
-        # Подсчет количества слов в наборе
-        count_result = await session.execute(
-            select(wordset_word)
-            .where(wordset_word.c.wordset_id == ws.id)
-        )
-        word_count = len(count_result.all())
-        
-        response.append({
-            "id": ws.id,
-            "name": ws.name,
-            "description": ws.description,
-            "word_count": word_count
-        })
-    
-    return response
+    result = await session.execute(wordsets_with_counts(user_id))
+    return [row._asdict() for row in result.all()]
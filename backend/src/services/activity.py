@@ -0,0 +1,150 @@
+"""
+Дневные сводки активности (user_daily_activity).
+
+Сводка обновляется в той же транзакции, что и запись событий (или при
+сбросе буфера событий), поэтому календарь и статистика читают O(дней), а не
+O(событий). События, записанные до появления сводок, досчитываются скриптом
+scripts/backfill_daily_activity.py от отметки в rollup_state.
+
+Отметка — максимальный id события на момент первого запуска. Id выдается
+при вставке, а видна строка после коммита, поэтому событие из транзакции,
+открытой в момент отметки, может получить id не больше отметки и при этом
+быть учтено при записи (тогда скрипт посчитает его второй раз), а событие,
+записанное старой версией при поэтапном обновлении, — id больше отметки
+без учета в сводке. Дни вокруг отметки пересчитываются целиком по событиям
+(rebuild_daily_activity, ключ --reconcile-from скрипта) после их окончания.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Date, select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.word import UserDailyActivity, UserWordEvent, RollupState
+
+# Строка rollup_state для дневных сводок
+DAILY_ACTIVITY_ROLLUP = "daily_activity"
+
+
+def aggregate_events(events: Iterable[dict]) -> List[dict]:
+    """Счетчики событий по (user_id, день)"""
+    totals: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for e in events:
+        counts = totals[(e["user_id"], e["timestamp"].date())]
+        if e["event_type"] == "shown":
+            counts[0] += 1
+        elif e["event_type"] == "answered":
+            counts[1] += 1
+            if e["is_correct"]:
+                counts[2] += 1
+    return [
+        {
+            "user_id": user_id,
+            "day": day,
+            "shown_count": shown,
+            "answered_count": answered,
+            "correct_count": correct,
+        }
+        for (user_id, day), (shown, answered, correct) in totals.items()
+    ]
+
+
+async def add_daily_activity(session: AsyncSession, events: List[dict]):
+    """Прибавляет события к дневным сводкам (INSERT ... ON CONFLICT DO UPDATE)"""
+    rows = aggregate_events(events)
+    if not rows:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(UserDailyActivity)
+    else:
+        stmt = sqlite.insert(UserDailyActivity)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDailyActivity.user_id, UserDailyActivity.day],
+        set_={
+            "shown_count": UserDailyActivity.shown_count + stmt.excluded.shown_count,
+            "answered_count": UserDailyActivity.answered_count + stmt.excluded.answered_count,
+            "correct_count": UserDailyActivity.correct_count + stmt.excluded.correct_count,
+        },
+    )
+    await session.execute(stmt, rows)
+
+
+async def ensure_rollup_state(session: AsyncSession) -> RollupState:
+    """
+    Создает отметку при первом запуске: все события до текущего максимального
+    id считаются историческими и досчитываются скриптом. Несколько процессов,
+    запущенных одновременно, не мешают друг другу: отметку создает первый
+    (INSERT ... ON CONFLICT DO NOTHING), остальные читают ее.
+    """
+    state = await session.get(RollupState, DAILY_ACTIVITY_ROLLUP)
+    if state is None:
+        max_id = (await session.execute(select(func.max(UserWordEvent.id)))).scalar() or 0
+        if session.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(RollupState)
+        else:
+            stmt = sqlite.insert(RollupState)
+        await session.execute(
+            stmt.values(name=DAILY_ACTIVITY_ROLLUP, live_from_event_id=max_id, last_event_id=0)
+            .on_conflict_do_nothing(index_elements=[RollupState.name])
+        )
+        await session.commit()
+        state = await session.get(RollupState, DAILY_ACTIVITY_ROLLUP)
+    return state
+
+
+async def rebuild_daily_activity(session: AsyncSession, day_from: date, day_to: date) -> int:
+    """
+    Пересчитывает сводки за дни day_from..day_to целиком по user_word_events
+    одним INSERT ... SELECT ... GROUP BY; возвращает число строк сводки.
+    Вызывать только для завершившихся дней: запись событий за эти дни
+    параллельно с пересчетом потеряла бы свои прибавки.
+    """
+    await session.execute(
+        delete(UserDailyActivity)
+        .where(UserDailyActivity.day >= day_from, UserDailyActivity.day <= day_to)
+    )
+    day = func.date(UserWordEvent.timestamp, type_=Date)
+    answered = UserWordEvent.event_type == "answered"
+    totals = (
+        select(
+            UserWordEvent.user_id,
+            day,
+            func.count().filter(UserWordEvent.event_type == "shown"),
+            func.count().filter(answered),
+            func.count().filter(answered, UserWordEvent.is_correct.is_(True)),
+        )
+        .where(
+            UserWordEvent.timestamp >= datetime.combine(day_from, time.min),
+            UserWordEvent.timestamp < datetime.combine(day_to + timedelta(days=1), time.min),
+        )
+        .group_by(UserWordEvent.user_id, day)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(UserDailyActivity)
+    else:
+        stmt = sqlite.insert(UserDailyActivity)
+    stmt = stmt.from_select(
+        [
+            UserDailyActivity.user_id,
+            UserDailyActivity.day,
+            UserDailyActivity.shown_count,
+            UserDailyActivity.answered_count,
+            UserDailyActivity.correct_count,
+        ],
+        totals,
+    )
+    # Строки периода удалены выше; конфликт возможен только с прибавкой
+    # запоздавшей записи, пересчет по событиям ее заменяет
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDailyActivity.user_id, UserDailyActivity.day],
+        set_={
+            "shown_count": stmt.excluded.shown_count,
+            "answered_count": stmt.excluded.answered_count,
+            "correct_count": stmt.excluded.correct_count,
+        },
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
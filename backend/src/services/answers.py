@@ -0,0 +1,62 @@
+"""Учет ответа пользователя в WordProgress (экспоненциальная оценка ошибок)."""
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import User
+from ..models.word import WordProgress
+from .events import record_events, make_event
+
+
+def new_word_progress(user_id: uuid.UUID, word_id: int, is_correct: bool, position: int) -> WordProgress:
+    """Прогресс для слова, на которое ответили без записи о показе"""
+    return WordProgress(
+        word_id=word_id,
+        user_id=user_id,
+        shown_count=1,  # This is set to 1 because the word has already been shown
+        correct_count=1 if is_correct else 0,
+        error_count=0 if is_correct else 1,
+        last_shown_position=position,
+        exp_error_rate=0.0 if is_correct else 1.0  # Initial value based on first answer
+    )
+
+
+def apply_answer(progress: WordProgress, is_correct: bool):
+    """Обновляет счетчики и exp_error_rate существующего прогресса"""
+    # Don't increment shown_count here, it's already incremented in get_next_word
+    if is_correct:
+        progress.correct_count += 1
+        result_value = 0  # 0 for correct answer
+    else:
+        progress.error_count += 1
+        result_value = 1  # 1 for incorrect answer
+
+    # Update exponential error rate
+    progress.exp_error_rate = (result_value + progress.exp_error_rate) / 2
+
+
+async def record_answer(session: AsyncSession, user_id: uuid.UUID, word_id: int, is_correct: bool) -> WordProgress:
+    """Применяет ответ к прогрессу и добавляет событие answered (без коммита)"""
+    result = await session.execute(
+        select(WordProgress).where(
+            WordProgress.word_id == word_id,
+            WordProgress.user_id == user_id
+        )
+    )
+    progress = result.scalars().first()
+
+    if not progress:
+        position = (await session.execute(
+            select(User.words_shown_counter).where(User.id == user_id)
+        )).scalar() or 0
+        progress = new_word_progress(user_id, word_id, is_correct, position)
+        session.add(progress)
+    else:
+        apply_answer(progress, is_correct)
+
+    # Запись события ответа пользователя
+    await record_events(session, [make_event(
+        user_id, word_id, "answered", is_correct=is_correct
+    )])
+    return progress
@@ -0,0 +1,188 @@
+"""
+Компактный каталог слов в памяти процесса.
+
+Хранит ID и тексты слов в плоских массивах, наборы слов и их состав как
+массивы индексов. Варианты ответов выбираются случайными индексами, поэтому
+время и память на запрос не зависят от размера словаря.
+
+Каталог загружается при старте и несет версию из таблицы catalog_version.
+Изменения словаря и наборов увеличивают версию в той же транзакции; процессы
+сверяют версию не чаще раза в CATALOG_VERSION_CHECK_SECONDS и перечитывают
+каталог, если она изменилась.
+"""
+import asyncio
+import random
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.word import Word, CatalogVersion
+from ..models.models import WordSet, wordset_word
+
+# Единственная строка таблицы catalog_version
+CATALOG_VERSION_ID = 1
+
+
+class WordCatalog:
+    """Снимок таблиц word, wordset и wordset_word"""
+
+    def __init__(self, version: int, words, wordsets, memberships):
+        self.version = version
+        self.ids = array("q")
+        self.english: List[str] = []
+        self.russian: List[str] = []
+        self.audio_path: List[Optional[str]] = []
+        for word_id, english, russian, audio_path in words:
+            self.ids.append(word_id)
+            self.english.append(english)
+            self.russian.append(russian)
+            self.audio_path.append(audio_path)
+        self._index: Dict[int, int] = {word_id: i for i, word_id in enumerate(self.ids)}
+
+        # wordset_id -> (name, description)
+        self.wordsets: Dict[int, Tuple[str, Optional[str]]] = {
+            wordset_id: (name, description) for wordset_id, name, description in wordsets
+        }
+
+        # wordset_id -> индексы слов; индекс слова -> наборы, в которых оно есть
+        self.set_members: Dict[int, array] = {wordset_id: array("l") for wordset_id in self.wordsets}
+        self._word_sets: Dict[int, List[int]] = {}
+        for wordset_id, word_id in memberships:
+            i = self._index.get(word_id)
+            if i is None:
+                continue
+            self.set_members.setdefault(wordset_id, array("l")).append(i)
+            self._word_sets.setdefault(i, []).append(wordset_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, word_id: int) -> bool:
+        return word_id in self._index
+
+    def word(self, i: int) -> dict:
+        return {
+            "id": self.ids[i],
+            "english": self.english[i],
+            "russian": self.russian[i],
+            "audio_path": self.audio_path[i],
+        }
+
+    def option(self, i: int) -> dict:
+        return {
+            "id": self.ids[i],
+            "english": self.english[i],
+            "russian": self.russian[i],
+        }
+
+    def sample_distractors(self, word_id: int, count: int = 7, same_wordset: bool = False) -> List[int]:
+        """
+        Индексы count случайных неправильных вариантов для слова word_id.
+        В режиме same_wordset варианты берутся из набора, в котором есть слово;
+        если в наборе слов не хватает, недостающие добираются из всего словаря.
+        """
+        target = self._index[word_id]
+        picked: List[int] = []
+        if same_wordset and target in self._word_sets:
+            pool = self.set_members[random.choice(self._word_sets[target])]
+            picked = _sample_excluding(pool, {target}, count)
+        if len(picked) < count:
+            picked += _sample_excluding(range(len(self.ids)), {target, *picked}, count - len(picked))
+        return picked
+
+    def options_for(self, word_id: int, count: int = 7, same_wordset: bool = False) -> List[dict]:
+        """Перемешанные варианты ответа: правильный и count неправильных"""
+        indices = self.sample_distractors(word_id, count, same_wordset) + [self._index[word_id]]
+        random.shuffle(indices)
+        return [self.option(i) for i in indices]
+
+
+def _sample_excluding(pool, excluded: set, count: int) -> List[int]:
+    """count случайных элементов pool, не входящих в excluded"""
+    k = min(len(pool), count + len(excluded))
+    return [pool[j] for j in random.sample(range(len(pool)), k) if pool[j] not in excluded][:count]
+
+
+class CatalogCache:
+    """Каталог процесса; перечитывается при смене версии в БД"""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._catalog: Optional[WordCatalog] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: AsyncSession, force_check: bool = False) -> WordCatalog:
+        """
+        Каталог процесса. force_check сверяет версию немедленно — для случаев,
+        когда запрошенный объект мог появиться в другом процессе.
+        """
+        if force_check or self._catalog is None or time.monotonic() - self._checked_at >= self.check_interval:
+            async with self._lock:
+                if self._catalog is None:
+                    self._catalog = await load_catalog(session)
+                elif force_check or time.monotonic() - self._checked_at >= self.check_interval:
+                    if await get_catalog_version(session) != self._catalog.version:
+                        self._catalog = await load_catalog(session)
+                self._checked_at = time.monotonic()
+        return self._catalog
+
+    async def reload(self, session: AsyncSession) -> WordCatalog:
+        async with self._lock:
+            self._catalog = await load_catalog(session)
+            self._checked_at = time.monotonic()
+        return self._catalog
+
+    def invalidate(self):
+        """Сбрасывает каталог процесса; следующий запрос загрузит его заново"""
+        self._catalog = None
+
+
+async def get_catalog_version(session: AsyncSession) -> int:
+    result = await session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    )
+    return result.scalar() or 0
+
+
+async def bump_catalog_version(session: AsyncSession):
+    """
+    Увеличивает версию каталога в текущей транзакции (коммит — у вызывающего).
+    Строку создает первое изменение; INSERT ... ON CONFLICT DO UPDATE, чтобы
+    одновременные первые изменения не упирались в первичный ключ.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = postgresql.insert(CatalogVersion)
+    else:
+        stmt = sqlite.insert(CatalogVersion)
+    await session.execute(
+        stmt.values(id=CATALOG_VERSION_ID, version=1)
+        .on_conflict_do_update(
+            index_elements=[CatalogVersion.id],
+            set_={"version": CatalogVersion.version + 1},
+        )
+    )
+
+
+async def load_catalog(session: AsyncSession) -> WordCatalog:
+    # Версию читаем до данных: изменение, пришедшее во время загрузки,
+    # будет замечено при следующей проверке
+    version = await get_catalog_version(session)
+    words = await session.execute(
+        select(Word.id, Word.english, Word.russian, Word.audio_path).order_by(Word.id)
+    )
+    wordsets = await session.execute(
+        select(WordSet.id, WordSet.name, WordSet.description).order_by(WordSet.id)
+    )
+    memberships = await session.execute(
+        select(wordset_word.c.wordset_id, wordset_word.c.word_id)
+    )
+    return WordCatalog(version, words.all(), wordsets.all(), memberships.all())
+
+
+catalog_cache = CatalogCache(check_interval=settings.CATALOG_VERSION_CHECK_SECONDS)
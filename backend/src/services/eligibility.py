@@ -0,0 +1,95 @@
+"""
+Кэш слов, доступных пользователю для изучения.
+
+Список наборов пользователя (user_wordset) кэшируется в процессе, а состав
+наборов берется из каталога слов, поэтому выбор следующего слова не
+разворачивает user_wordset -> wordset_word запросами и не передает в БД
+длинные списки IN (...). Результат — отсортированный массив ID слов.
+
+Запись сбрасывается при назначении/снятии набора, при смене версии каталога
+(изменение состава наборов) и по истечении ELIGIBLE_WORDS_TTL_SECONDS —
+чтобы назначения, сделанные через другой процесс, тоже подхватывались. Если
+после перечитывания состав не изменился, остается прежний массив: расписание
+планировщика сверяется с ним по идентичности и не перестраивается зря.
+Записи пользователей, не обращавшихся дольше idle_seconds, выгружаются.
+"""
+import time
+import uuid
+from array import array
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.models import user_wordset
+from .catalog import catalog_cache
+
+
+class _Entry(NamedTuple):
+    catalog_version: int
+    loaded_at: float
+    word_ids: array
+
+
+class EligibleWordsCache:
+    """ID слов пользователя: из его наборов или весь словарь, если наборы пусты"""
+
+    def __init__(self, ttl: float, idle_seconds: float):
+        self.ttl = ttl
+        self.idle_seconds = idle_seconds
+        self._entries: Dict[uuid.UUID, _Entry] = {}
+        self._next_eviction = 0.0
+
+    async def get(self, session: AsyncSession, user_id: uuid.UUID) -> array:
+        self.evict_idle()
+        catalog = await catalog_cache.get(session)
+        entry = self._entries.get(user_id)
+        if (
+            entry is None
+            or entry.catalog_version != catalog.version
+            or time.monotonic() - entry.loaded_at >= self.ttl
+        ):
+            result = await session.execute(
+                select(user_wordset.c.wordset_id)
+                .where(user_wordset.c.user_id == user_id)
+            )
+            indices = set()
+            for wordset_id in result.scalars().all():
+                indices.update(catalog.set_members.get(wordset_id, ()))
+
+            if indices:
+                word_ids = array("q", sorted(catalog.ids[i] for i in indices))
+            else:
+                # Если пользователю не назначены наборы (или они пусты), доступны все слова
+                word_ids = catalog.ids
+            if entry is not None and entry.word_ids == word_ids:
+                # Состав не изменился — сохраняем идентичность массива
+                word_ids = entry.word_ids
+            entry = _Entry(catalog.version, time.monotonic(), word_ids)
+            self._entries[user_id] = entry
+        return entry.word_ids
+
+    def invalidate(self, user_id: Optional[uuid.UUID] = None):
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+    def evict_idle(self):
+        """Выгружает записи пользователей, не обращавшихся дольше idle_seconds"""
+        now = time.monotonic()
+        if now < self._next_eviction:
+            return
+        # Полный проход не чаще раза в TTL
+        self._next_eviction = now + self.ttl
+        # Запись активного пользователя перечитывается не реже раза в TTL
+        deadline = now - self.idle_seconds - self.ttl
+        for user_id in [u for u, e in self._entries.items() if e.loaded_at < deadline]:
+            del self._entries[user_id]
+
+
+eligible_words = EligibleWordsCache(
+    ttl=settings.ELIGIBLE_WORDS_TTL_SECONDS,
+    idle_seconds=settings.SCHEDULER_IDLE_SECONDS,
+)
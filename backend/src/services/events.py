@@ -0,0 +1,209 @@
+"""
+Запись событий UserWordEvent.
+
+По умолчанию события вставляются в текущую транзакцию запроса. При
+EVENT_BUFFER_ENABLED события после успешного коммита попадают в
+ограниченный буфер процесса, который фоновая задача сбрасывает в БД пачками
+(многострочный INSERT на PostgreSQL, executemany на SQLite). Место в буфере
+резервируется до коммита и освобождается после коммита или отката; если
+места нет, события пишутся в транзакции запроса, как без буфера — запрос
+не ждет буфер, удерживая открытую транзакцию и соединение. Пачка, которая
+не записалась EVENT_BUFFER_MAX_RETRIES раз подряд, пишется по одному
+событию: события, отвергнутые БД (например, слово уже удалено), пишутся в
+лог и отбрасываются, чтобы не держать очередь. При остановке буфер
+дочищается.
+В обоих режимах дневные сводки обновляются в одной транзакции с событиями.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.word import UserWordEvent
+from .activity import add_daily_activity
+
+logger = logging.getLogger(__name__)
+
+# Ключ session.info для событий, ожидающих коммита
+PENDING_EVENTS_KEY = "pending_word_events"
+
+
+def make_event(
+    user_id: uuid.UUID,
+    word_id: int,
+    event_type: str,
+    is_correct: Optional[bool] = None,
+    event_data: Optional[str] = None,
+    timestamp: Optional[datetime] = None,
+) -> dict:
+    """Строка user_word_events; время фиксируется в момент события, а не записи"""
+    return {
+        "user_id": user_id,
+        "word_id": word_id,
+        "event_type": event_type,
+        "is_correct": is_correct,
+        "event_data": event_data,
+        "timestamp": timestamp or datetime.utcnow(),
+    }
+
+
+async def record_events(session: AsyncSession, events: List[dict]):
+    """Записывает события в транзакции session или ставит их в буфер после коммита"""
+    if not events:
+        return
+    if event_buffer.running and event_buffer.try_reserve(len(events)):
+        if not session.in_transaction():
+            # Резерв освобождается по окончании транзакции, поэтому она нужна явно
+            await session.begin()
+        session.info.setdefault(PENDING_EVENTS_KEY, []).extend(events)
+    else:
+        await session.execute(insert(UserWordEvent), events)
+        await add_daily_activity(session, events)
+
+
+class EventBuffer:
+    """Ограниченная очередь событий с фоновым сбросом пачками"""
+
+    def __init__(self, max_size: int, flush_size: int, flush_interval: float, max_retries: int):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        # Сколько раз подряд не записалась пачка в начале очереди
+        self._failed_attempts = 0
+        self._events: deque = deque()
+        # Места, занятые событиями еще не закоммиченных транзакций
+        self._reserved = 0
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._session_maker: Optional[async_sessionmaker] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def try_reserve(self, count: int) -> bool:
+        """Резервирует место под count событий; False, если буфер заполнен"""
+        if len(self._events) + self._reserved + count > self.max_size:
+            # Заполненный буфер стоит сбросить, не дожидаясь интервала
+            self._wakeup.set()
+            return False
+        self._reserved += count
+        return True
+
+    def release(self, count: int):
+        """Освобождает место, зарезервированное откаченной транзакцией"""
+        self._reserved -= count
+
+    def put_many(self, events: List[dict]):
+        """Переносит зарезервированные события закоммиченной транзакции в очередь"""
+        self._reserved -= len(events)
+        self._events.extend(events)
+        if len(self._events) >= self.flush_size:
+            self._wakeup.set()
+
+    def start(self, session_maker: async_sessionmaker):
+        self._session_maker = session_maker
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Event buffer started (max_size={self.max_size}, "
+            f"flush_size={self.flush_size}, flush_interval={self.flush_interval}s)"
+        )
+
+    async def stop(self):
+        """Останавливает фоновую задачу и записывает оставшиеся события"""
+        if self._task is None:
+            return
+        # Не отменяем задачу: она может быть посреди записи пачки
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await self.flush()
+        if self._events:
+            logger.error(f"Event buffer stopped with {len(self._events)} unwritten events")
+        else:
+            logger.info("Event buffer drained")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self._events:
+            batch = [self._events.popleft() for _ in range(min(self.flush_size, len(self._events)))]
+            try:
+                if self._failed_attempts < self.max_retries:
+                    await self._write(batch)
+                else:
+                    # Пачка раз за разом не записывается — по одному событию,
+                    # отвергнутые БД события отбрасываются
+                    while batch:
+                        try:
+                            await self._write(batch[:1])
+                        except (IntegrityError, DataError) as e:
+                            logger.error(f"Dropping event rejected by the database: {batch[0]}: {str(e)}")
+                        del batch[0]
+                self._failed_attempts = 0
+            except BaseException as e:
+                # Возвращаем незаписанное в начало очереди и пробуем на следующем
+                # цикле; при отмене задачи пачка тоже не должна потеряться
+                self._events.extendleft(reversed(batch))
+                if not isinstance(e, Exception):
+                    raise
+                self._failed_attempts += 1
+                logger.error(
+                    f"Failed to flush {len(batch)} events "
+                    f"(attempt {self._failed_attempts}): {str(e)}"
+                )
+                break
+
+    async def _write(self, batch: List[dict]):
+        async with self._session_maker() as session:
+            await session.execute(insert(UserWordEvent), batch)
+            await add_daily_activity(session, batch)
+            await session.commit()
+
+
+event_buffer = EventBuffer(
+    max_size=settings.EVENT_BUFFER_MAX_SIZE,
+    flush_size=settings.EVENT_BUFFER_FLUSH_SIZE,
+    flush_interval=settings.EVENT_BUFFER_FLUSH_INTERVAL,
+    max_retries=settings.EVENT_BUFFER_MAX_RETRIES,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_events(session: Session):
+    events = session.info.pop(PENDING_EVENTS_KEY, None)
+    if events:
+        event_buffer.put_many(events)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_rolled_back_events(session: Session, transaction):
+    # Срабатывает и после отката, и при закрытии сессии без коммита;
+    # после коммита события уже перенесены в очередь
+    if transaction.parent is not None:
+        return
+    events = session.info.pop(PENDING_EVENTS_KEY, None)
+    if events:
+        event_buffer.release(len(events))
@@ -0,0 +1,103 @@
+"""
+Потоковая выгрузка истории событий пользователя в NDJSON или CSV.
+
+События читаются серверным курсором (AsyncSession.stream с yield_per) и
+отдаются клиенту порциями по мере чтения, поэтому память не зависит от
+размера истории.
+"""
+import csv
+import io
+import json
+import uuid
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from ..database import async_session_maker
+from ..models.word import UserWordEvent, Word
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_COLUMNS = ["id", "word_id", "english", "russian", "event_type", "is_correct", "timestamp", "metadata"]
+
+# Строк на одну порцию чтения из БД и записи в ответ
+EXPORT_CHUNK_SIZE = 1000
+
+
+def events_export_query(user_id: uuid.UUID, word_id: Optional[int] = None, event_type: Optional[str] = None):
+    query = select(
+        UserWordEvent.id,
+        UserWordEvent.word_id,
+        Word.english,
+        Word.russian,
+        UserWordEvent.event_type,
+        UserWordEvent.is_correct,
+        UserWordEvent.timestamp,
+        UserWordEvent.event_data,
+    ).outerjoin(
+        Word, Word.id == UserWordEvent.word_id
+    ).where(
+        UserWordEvent.user_id == user_id
+    )
+    if word_id is not None:
+        query = query.where(UserWordEvent.word_id == word_id)
+    if event_type is not None:
+        query = query.where(UserWordEvent.event_type == event_type)
+    return query.order_by(UserWordEvent.timestamp, UserWordEvent.id)
+
+
+async def stream_user_events(
+    user_id: uuid.UUID,
+    fmt: str,
+    word_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Порции выгрузки в формате fmt. Открывает собственную сессию: сессия
+    запроса закрывается до того, как ответ будет отправлен.
+    """
+    query = events_export_query(user_id, word_id, event_type).execution_options(
+        yield_per=EXPORT_CHUNK_SIZE
+    )
+    async with async_session_maker() as session:
+        result = await session.stream(query)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            async for rows in result.partitions():
+                for row in rows:
+                    writer.writerow([
+                        row.id,
+                        row.word_id,
+                        row.english,
+                        row.russian,
+                        row.event_type,
+                        "" if row.is_correct is None else int(row.is_correct),
+                        row.timestamp.isoformat(),
+                        row.event_data or "",
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        else:
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps({
+                        "id": row.id,
+                        "word_id": row.word_id,
+                        "english": row.english,
+                        "russian": row.russian,
+                        "event_type": row.event_type,
+                        "is_correct": row.is_correct,
+                        "timestamp": row.timestamp.isoformat(),
+                        "metadata": json.loads(row.event_data) if row.event_data else None,
+                    }, ensure_ascii=False) + "\n"
+                    for row in rows
+                )
@@ -0,0 +1,239 @@
+"""
+Планировщик выбора следующего слова в памяти процесса.
+
+Для каждого активного пользователя хранится очередь с приоритетами: слова
+разложены по корзинам квантованного exp_error_rate, внутри корзины — min-heap
+по last_shown_position. Внутри одной корзины максимальный вес всегда у самого
+"старого" слова, поэтому следующий кандидат — лучшая вершина среди корзин:
+O(B + log n) вместо линейного прохода по всем словам на каждый запрос.
+
+Внутри корзины слова упорядочены только по возрасту, а exp_error_rate
+округляется до шага 1/64 (round(rate * 64)): слово с чуть большей ошибкой
+в той же корзине может уступить более старому. Поэтому выбор приблизителен
+по сравнению с pick_next_word_id — расхождение в весе не больше alpha/64,
+что сопоставимо с шумом веса.
+
+Расписание загружается из WordProgress и кэша доступных пользователю слов
+при первом обращении, обновляется при показе и ответе и выгружается после простоя.
+Ответы, записанные другим процессом, не меняют счетчик показов, поэтому
+расписание перечитывается из БД не реже раза в SCHEDULER_TTL_SECONDS.
+"""
+import heapq
+import random
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from .eligibility import eligible_words
+from .selection import (
+    NEW_WORD_AGE_BONUS,
+    NEW_WORD_ERROR_RATE,
+    last_shown_query,
+    load_user_progress,
+    selection_weight,
+    word_age,
+)
+
+# Количество корзин для exp_error_rate (шаг 1/64 сопоставим с шумом веса)
+ERROR_RATE_BUCKETS = 64
+# Сколько последних показанных слов помнит расписание для exclude_last
+RECENT_LIMIT = 50
+
+
+def _bucket_key(exp_error_rate: float) -> int:
+    return round(exp_error_rate * ERROR_RATE_BUCKETS)
+
+
+def _sort_position(last_shown_position: Optional[int]) -> int:
+    # Новые слова старше любого показанного
+    if last_shown_position is None:
+        return -NEW_WORD_AGE_BONUS
+    return last_shown_position
+
+
+class UserSchedule:
+    """Очередь слов одного пользователя"""
+
+    def __init__(self, position: int, word_ids=None):
+        self.position = position
+        # Массив доступных слов, по которому построено расписание
+        self.word_ids = word_ids
+        self.loaded_at = time.monotonic()
+        self.last_access = self.loaded_at
+        # word_id -> (last_shown_position | None, exp_error_rate)
+        self._state: Dict[int, Tuple[Optional[int], float]] = {}
+        # корзина -> heap из (sort_position, tiebreak, word_id); устаревшие записи
+        # удаляются лениво, случайный tiebreak заменяет шум веса среди равных слов
+        self._buckets: Dict[int, List[Tuple[int, float, int]]] = {}
+        self._entries = 0
+        self._recent: deque = deque(maxlen=RECENT_LIMIT)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def __contains__(self, word_id: int) -> bool:
+        return word_id in self._state
+
+    def set_word(self, word_id: int, last_shown_position: Optional[int], exp_error_rate: float):
+        self._state[word_id] = (last_shown_position, exp_error_rate)
+        heap = self._buckets.setdefault(_bucket_key(exp_error_rate), [])
+        heapq.heappush(heap, (_sort_position(last_shown_position), random.random(), word_id))
+        self._entries += 1
+        if self._entries > 2 * len(self._state) + 64:
+            self._compact()
+
+    def record_show(self, word_id: int, position: int):
+        """Слово показано; position — новое значение words_shown_counter"""
+        self.position = position
+        if word_id in self._state:
+            exp_error_rate = self._state[word_id][1]
+        else:
+            exp_error_rate = NEW_WORD_ERROR_RATE
+        self.set_word(word_id, position, exp_error_rate)
+        self._recent.append(word_id)
+
+    def record_answer(self, word_id: int, last_shown_position: int, exp_error_rate: float):
+        """Пользователь ответил на слово, exp_error_rate пересчитан"""
+        if word_id in self._state:
+            self.set_word(word_id, last_shown_position, exp_error_rate)
+
+    def load_recent(self, word_ids):
+        """Последние показанные слова, от старых к новым"""
+        self._recent.extend(word_ids)
+
+    def pick(self, alpha: float = 2.0, exclude_last: int = 5) -> Optional[int]:
+        """ID слова с максимальным весом или None, если слов нет"""
+        excluded = set()
+        if exclude_last > 0:
+            excluded = set(list(self._recent)[-exclude_last:])
+        word_id = self._pick(alpha, excluded)
+        if word_id is None and excluded:
+            # Если после исключения не осталось кандидатов, берем любое слово
+            word_id = self._pick(alpha, set())
+        return word_id
+
+    def _pick(self, alpha: float, excluded: set) -> Optional[int]:
+        best_id = None
+        best_weight = float("-inf")
+        for key in list(self._buckets):
+            word_id = self._peek(key, excluded)
+            if word_id is None:
+                continue
+            last_shown_position, exp_error_rate = self._state[word_id]
+            weight = selection_weight(
+                word_age(self.position, last_shown_position), exp_error_rate, alpha
+            )
+            if weight > best_weight:
+                best_id, best_weight = word_id, weight
+        return best_id
+
+    def _is_current(self, key: int, entry: Tuple[int, float, int]) -> bool:
+        state = self._state.get(entry[2])
+        return (
+            state is not None
+            and _bucket_key(state[1]) == key
+            and _sort_position(state[0]) == entry[0]
+        )
+
+    def _peek(self, key: int, excluded: set) -> Optional[int]:
+        """Вершина корзины без исключенных слов; устаревшие записи выбрасываются"""
+        heap = self._buckets[key]
+        skipped = []
+        found = None
+        while heap:
+            entry = heap[0]
+            if not self._is_current(key, entry):
+                heapq.heappop(heap)
+                self._entries -= 1
+            elif entry[2] in excluded:
+                skipped.append(heapq.heappop(heap))
+            else:
+                found = entry[2]
+                break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if not heap:
+            del self._buckets[key]
+        return found
+
+    def _compact(self):
+        self._buckets = {}
+        for word_id, (last_shown_position, exp_error_rate) in self._state.items():
+            self._buckets.setdefault(_bucket_key(exp_error_rate), []).append(
+                (_sort_position(last_shown_position), random.random(), word_id)
+            )
+        for heap in self._buckets.values():
+            heapq.heapify(heap)
+        self._entries = len(self._state)
+
+
+class Scheduler:
+    """Реестр расписаний активных пользователей"""
+
+    def __init__(self, idle_seconds: int, ttl: float):
+        self.idle_seconds = idle_seconds
+        self.ttl = ttl
+        self._schedules: Dict[uuid.UUID, UserSchedule] = {}
+
+    async def get(self, session: AsyncSession, user_id: uuid.UUID, position: int) -> UserSchedule:
+        """
+        Расписание пользователя; загружается из БД, если его нет, счетчик
+        показов разошелся с БД (например, показ прошел через другой процесс),
+        изменился список доступных пользователю слов или истек TTL (ответы
+        через другой процесс меняют exp_error_rate, но не счетчик).
+        """
+        self.evict_idle()
+        schedule = self._schedules.get(user_id)
+        word_ids = await eligible_words.get(session, user_id)
+        if (
+            schedule is None
+            or schedule.position != position
+            or schedule.word_ids is not word_ids
+            or time.monotonic() - schedule.loaded_at > self.ttl
+        ):
+            schedule = await load_schedule(session, user_id, position)
+            self._schedules[user_id] = schedule
+        schedule.last_access = time.monotonic()
+        return schedule
+
+    def peek(self, user_id: uuid.UUID) -> Optional[UserSchedule]:
+        """Расписание пользователя, только если оно уже загружено"""
+        return self._schedules.get(user_id)
+
+    def invalidate(self, user_id: Optional[uuid.UUID] = None):
+        """Сбрасывает расписание пользователя (или всех пользователей)"""
+        if user_id is None:
+            self._schedules.clear()
+        else:
+            self._schedules.pop(user_id, None)
+
+    def evict_idle(self):
+        deadline = time.monotonic() - self.idle_seconds
+        for user_id in [u for u, s in self._schedules.items() if s.last_access < deadline]:
+            del self._schedules[user_id]
+
+
+async def load_schedule(session: AsyncSession, user_id: uuid.UUID, position: int) -> UserSchedule:
+    """Строит расписание пользователя по данным из БД"""
+    word_ids = await eligible_words.get(session, user_id)
+    schedule = UserSchedule(position, word_ids)
+    progress = await load_user_progress(session, user_id)
+
+    for word_id in word_ids:
+        last_shown_position, exp_error_rate = progress.get(word_id, (None, NEW_WORD_ERROR_RATE))
+        schedule.set_word(word_id, last_shown_position, exp_error_rate)
+
+    recent = (await session.execute(
+        last_shown_query(user_id, RECENT_LIMIT)
+    )).scalars().all()
+    schedule.load_recent(reversed(recent))
+    return schedule
+
+
+scheduler = Scheduler(
+    idle_seconds=settings.SCHEDULER_IDLE_SECONDS, ttl=settings.SCHEDULER_TTL_SECONDS
+)
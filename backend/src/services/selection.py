@@ -0,0 +1,126 @@
+"""
+Выбор следующего слова для пользователя.
+
+Вес кандидата: log(age) + exp_error_rate * alpha + небольшой шум, где age —
+количество показанных слов с момента последнего показа данного слова.
+Кандидаты берутся из кэша доступных пользователю слов и оцениваются за один
+проход по прогрессу пользователя, загруженному одним запросом, без
+отдельного запроса на каждое слово.
+"""
+import math
+import random
+import uuid
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import User
+from ..models.word import WordProgress
+from .eligibility import eligible_words
+
+# Новые слова получают "возраст" больше любого реального
+NEW_WORD_AGE_BONUS = 100
+# Нейтральная стартовая оценка ошибок для нового слова
+NEW_WORD_ERROR_RATE = 0.5
+
+
+def word_age(current_position: int, last_shown_position: Optional[int]) -> int:
+    """Возраст слова в показах; None означает, что слово ещё не показывалось"""
+    if last_shown_position is None:
+        return max(1, current_position) + NEW_WORD_AGE_BONUS
+    return max(1, current_position - last_shown_position)
+
+
+def selection_weight(age: int, exp_error_rate: float, alpha: float) -> float:
+    """Вес слова при выборе следующего показа"""
+    return math.log(age) + exp_error_rate * alpha + random.random() / 100
+
+
+async def reserve_positions(session: AsyncSession, user_id: uuid.UUID, count: int = 1) -> int:
+    """
+    Увеличивает счетчик показов пользователя на count одним UPDATE ... RETURNING
+    и возвращает новое значение. Параллельные запросы получают разные позиции.
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(words_shown_counter=func.coalesce(User.words_shown_counter, 0) + count)
+        .returning(User.words_shown_counter)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+
+def last_shown_query(user_id: uuid.UUID, exclude_last: int):
+    """Подзапрос ID последних показанных пользователю слов"""
+    return (
+        select(WordProgress.word_id)
+        .where(WordProgress.user_id == user_id)
+        .order_by(WordProgress.last_shown.desc())
+        .limit(exclude_last)
+    )
+
+
+async def load_user_progress(
+    session: AsyncSession, user_id: uuid.UUID
+) -> Dict[int, Tuple[int, float]]:
+    """word_id -> (last_shown_position, exp_error_rate) для всех слов пользователя"""
+    result = await session.execute(
+        select(
+            WordProgress.word_id,
+            WordProgress.last_shown_position,
+            WordProgress.exp_error_rate,
+        ).where(WordProgress.user_id == user_id)
+    )
+    return {
+        word_id: (last_shown_position or 0, exp_error_rate)
+        for word_id, last_shown_position, exp_error_rate in result.all()
+    }
+
+
+async def pick_next_word_id(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    current_position: int,
+    alpha: float = 2.0,
+    exclude_last: int = 5,
+) -> Optional[int]:
+    """
+    Возвращает ID слова с максимальным весом среди кандидатов пользователя
+    или None, если база слов пуста.
+    """
+    word_ids = await eligible_words.get(session, user_id)
+    progress = await load_user_progress(session, user_id)
+
+    excluded = set()
+    if exclude_last > 0:
+        # Исключаем последние показанные слова
+        excluded = set((await session.execute(
+            last_shown_query(user_id, exclude_last)
+        )).scalars().all())
+
+    best_id = _best_candidate(word_ids, progress, excluded, current_position, alpha)
+    if best_id is None and excluded:
+        # Если после исключения не осталось кандидатов, берем любое слово
+        best_id = _best_candidate(word_ids, progress, set(), current_position, alpha)
+    return best_id
+
+
+def _best_candidate(word_ids, progress, excluded, current_position, alpha) -> Optional[int]:
+    best_id = None
+    best_weight = float("-inf")
+    for word_id in word_ids:
+        if word_id in excluded:
+            continue
+        state = progress.get(word_id)
+        if state is None:
+            age = word_age(current_position, None)
+            exp_error_rate = NEW_WORD_ERROR_RATE
+        else:
+            age = word_age(current_position, state[0])
+            exp_error_rate = state[1]
+        weight = selection_weight(age, exp_error_rate, alpha)
+        if weight > best_weight:
+            best_id, best_weight = word_id, weight
+    return best_id
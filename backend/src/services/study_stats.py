@@ -0,0 +1,111 @@
+"""
+Статистика учебных сессий (таблица progress).
+
+Сводка читается из накопленных итогов progress_totals, которые обновляются
+в той же транзакции, что и запись сессии, — стоимость не зависит от длины
+истории. Статистика за период считается агрегатами в SQL по индексу
+(user_id, session_start).
+"""
+import uuid
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Date, select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import Progress, ProgressTotals
+
+
+def _aggregates():
+    return (
+        func.count(Progress.id),
+        func.coalesce(func.sum(Progress.duration_seconds), 0),
+        func.coalesce(func.sum(Progress.words_learned), 0),
+        func.coalesce(func.sum(Progress.accuracy), 0.0),
+    )
+
+
+def _stats(sessions_count: int, duration: int, words: int, accuracy_sum: float) -> dict:
+    return {
+        "total_time": duration,
+        "total_words": words,
+        "average_accuracy": round(accuracy_sum / sessions_count, 2) if sessions_count else 0,
+    }
+
+
+async def add_study_session(session: AsyncSession, progress: Progress):
+    """
+    Прибавляет сессию к итогам пользователя (коммит — у вызывающего).
+    История до появления итогов переносится миграцией 5, поэтому здесь
+    только приращения этой сессии: INSERT ... ON CONFLICT DO UPDATE.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        insert = postgresql.insert
+    else:
+        insert = sqlite.insert
+    stmt = insert(ProgressTotals).values(
+        user_id=progress.user_id,
+        sessions_count=1,
+        total_duration_seconds=progress.duration_seconds,
+        total_words_learned=progress.words_learned,
+        accuracy_sum=progress.accuracy,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProgressTotals.user_id],
+        set_={
+            "sessions_count": ProgressTotals.sessions_count + 1,
+            "total_duration_seconds": ProgressTotals.total_duration_seconds + stmt.excluded.total_duration_seconds,
+            "total_words_learned": ProgressTotals.total_words_learned + stmt.excluded.total_words_learned,
+            "accuracy_sum": ProgressTotals.accuracy_sum + stmt.excluded.accuracy_sum,
+        },
+    )
+    await session.execute(stmt)
+
+
+async def get_summary(session: AsyncSession, user_id: uuid.UUID) -> dict:
+    """Сводная статистика по всем сессиям пользователя"""
+    totals = await session.get(ProgressTotals, user_id)
+    if totals is not None:
+        return _stats(
+            totals.sessions_count,
+            totals.total_duration_seconds,
+            totals.total_words_learned,
+            totals.accuracy_sum,
+        )
+    # Итоги еще не созданы (история до миграции) — один агрегирующий запрос
+    row = (await session.execute(
+        select(*_aggregates()).where(Progress.user_id == user_id)
+    )).one()
+    return _stats(*row)
+
+
+async def get_period_stats(
+    session: AsyncSession, user_id: uuid.UUID, since: datetime, by_day: bool = False
+) -> dict:
+    """Статистика сессий начиная с since; by_day — разбивка по дням (иначе None)"""
+    row = (await session.execute(
+        select(*_aggregates()).where(
+            Progress.user_id == user_id,
+            Progress.session_start >= since,
+        )
+    )).one()
+    stats = {"sessions": row[0], **_stats(*row), "by_day": None}
+
+    if by_day:
+        day = func.date(Progress.session_start, type_=Date)
+        result = await session.execute(
+            select(day, *_aggregates())
+            .where(
+                Progress.user_id == user_id,
+                Progress.session_start >= since,
+            )
+            .group_by(day)
+            .order_by(day)
+        )
+        days: List[dict] = [
+            {"date": d.strftime("%Y-%m-%d"), "sessions": counts[0], **_stats(*counts)}
+            for d, *counts in result.all()
+        ]
+        stats["by_day"] = days
+    return stats
@@ -0,0 +1,99 @@
+"""
+Генерация аудио с произношением слов.
+
+Файлы адресуются по содержимому: имя — хэш нормализованного английского
+текста и параметров синтеза, поэтому слова с одинаковым текстом делят один
+файл, а уже сгенерированные файлы не синтезируются повторно. Синтез идет в
+пуле потоков ограниченного размера.
+
+Провайдер синтеза подключаемый: "gtts" (Google TTS, нужна сеть) или "stub"
+(локальная заглушка для проверки импорта без сети).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Текст для синтеза и ключ дедупликации: без лишних пробелов, в нижнем регистре"""
+    return " ".join(text.split()).lower()
+
+
+class GTTSProvider:
+    """Google TTS через gTTS"""
+
+    def __init__(self, lang: str = "en", slow: bool = False, tld: str = "com"):
+        self.lang = lang
+        self.slow = slow
+        self.tld = tld  # Домен для акцента (com - американский)
+
+    @property
+    def cache_key(self) -> str:
+        return f"gtts:{self.lang}:{self.slow}:{self.tld}"
+
+    def synthesize(self, text: str, path: Path):
+        from gtts import gTTS
+
+        gTTS(text=text, lang=self.lang, slow=self.slow, tld=self.tld).save(str(path))
+
+
+class StubProvider:
+    """Заглушка без сети: пишет в файл сам текст"""
+
+    cache_key = "stub"
+
+    def synthesize(self, text: str, path: Path):
+        path.write_bytes(text.encode("utf-8"))
+
+
+TTS_PROVIDERS = {
+    "gtts": GTTSProvider,
+    "stub": StubProvider,
+}
+
+
+class AudioGenerator:
+    """Синтезирует аудио для набора текстов в пуле из workers потоков"""
+
+    def __init__(self, provider, audio_dir: Path, workers: int = 4):
+        self.provider = provider
+        self.audio_dir = Path(audio_dir)
+        self.workers = workers
+
+    def path_for(self, text: str) -> Path:
+        digest = hashlib.sha1(f"{self.provider.cache_key}:{normalize_text(text)}".encode("utf-8")).hexdigest()
+        return self.audio_dir / f"tts_{digest[:20]}.mp3"
+
+    async def generate(self, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Нормализованный текст -> путь к файлу для БД. Каждый уникальный текст
+        синтезируется не больше одного раза; существующие файлы переиспользуются.
+        """
+        self.audio_dir.mkdir(parents=True, exist_ok=True)
+        unique = {normalize_text(text) for text in texts}
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def worker(text: str):
+            path = self.path_for(text)
+            if not path.exists():
+                async with semaphore:
+                    await asyncio.to_thread(self._synthesize, text, path)
+                logger.info(f"Сгенерировано аудио для {text}")
+            return text, "/" + str(path)
+
+        return dict(await asyncio.gather(*(worker(text) for text in unique)))
+
+    def _synthesize(self, text: str, path: Path):
+        # Пишем во временный файл: прерванный синтез не оставит битый файл
+        # под именем, которое считается готовым
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.provider.synthesize(text, tmp)
+            tmp.replace(path)
+        finally:
+            tmp.unlink(missing_ok=True)
@@ -0,0 +1,80 @@
+"""
+Режим SQLite для небольших установок (SQLITE_WAL_MODE).
+
+SQLite допускает только одного писателя: при конкурентных записях из
+разных соединений транзакции ждут блокировку или получают
+"database is locked". В этом режиме:
+
+- база переводится в WAL, чтение не блокирует запись и наоборот;
+- на каждом соединении выставляются synchronous, busy_timeout, cache_size
+  и mmap_size из настроек SQLITE_*;
+- чтение идет через пул из SQLITE_READ_POOL_SIZE соединений;
+- запись идет через единственное соединение писателя. Очередь пула на одно
+  соединение и есть очередь писателей: запросы ждут его по порядку, а
+  транзакция начинается с BEGIN IMMEDIATE, поэтому блокировка берется сразу,
+  а не при первом изменении посреди транзакции.
+
+Пользователи fastapi-users (регистрация, изменение профиля, сброс пароля,
+перехэширование пароля при входе) тоже работают через писателя. Блокировку
+до busy_timeout ждет только запись из других процессов (скрипты импорта).
+"""
+import logging
+from typing import Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from .config import settings
+from .db_pool import MonitoredQueuePool, install_pool_monitor
+
+logger = logging.getLogger(__name__)
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    # Отрицательное значение — размер кэша в КиБ, а не в страницах
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def create_sqlite_engines(url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """Движки (чтение, запись) для SQLite в режиме WAL"""
+    read_engine = create_async_engine(
+        url,
+        poolclass=MonitoredQueuePool,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    event.listen(read_engine.sync_engine, "connect", _apply_pragmas)
+    install_pool_monitor(read_engine)
+
+    write_engine = create_async_engine(
+        url,
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITER_TIMEOUT,
+    )
+
+    @event.listens_for(write_engine.sync_engine, "connect")
+    def on_writer_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, connection_record)
+        # Транзакциями управляем сами, а не драйвер sqlite3
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine.sync_engine, "begin")
+    def on_writer_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    install_pool_monitor(write_engine)
+
+    logger.info(
+        f"SQLite WAL mode: {settings.SQLITE_READ_POOL_SIZE} readers, 1 writer, "
+        f"synchronous={settings.SQLITE_SYNCHRONOUS}, busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}ms"
+    )
+    return read_engine, write_engine
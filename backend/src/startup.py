@@ -0,0 +1,47 @@
+"""
+Фазы запуска приложения и готовность к приему трафика.
+
+STARTUP_MODE="full" — как раньше: create_all по моделям и тестовый
+пользователь при каждом запуске. STARTUP_MODE="fast" — для контейнеров и
+rolling restart: схемой управляют миграции (python -m scripts.migrate), при
+запуске только проверяется, что они применены; тестовый пользователь
+создается отдельной командой (python -m scripts.create_test_user).
+
+Длительность каждой фазы пишется в лог и отдается в /api/health/ready.
+Живость (/api/health/live) означает только, что процесс отвечает;
+готовность — что запуск завершен, остановка не началась и БД доступна.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+STARTUP_MODES = ("full", "fast")
+
+
+class StartupState:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.total_ms = 0.0
+        self.ready = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет фазу запуска и пишет ее длительность в лог"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.phases[name] = round(elapsed_ms, 1)
+            logger.info(f"Startup phase '{name}' took {elapsed_ms:.0f} ms")
+
+    def mark_ready(self):
+        self.total_ms = round(sum(self.phases.values()), 1)
+        self.ready = True
+        logger.info(f"Startup complete in {self.total_ms:.0f} ms: {self.phases}")
+
+
+startup_state = StartupState()
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Приложение создает движок при импорте src.database — не трогаем ./test.db
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'tests.db'}")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.models.models import Base
+from src.models import word  # noqa: F401  (таблицы word, wordprogress, ...)
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def session_maker(db_url):
+    """Отдельная база SQLite со схемой по моделям на каждый тест"""
+    engine = create_async_engine(db_url)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Кэши процесса не переживают базу теста"""
+    from src.auth.cache import user_cache
+    from src.services.catalog import catalog_cache
+    from src.services.eligibility import eligible_words
+    from src.services.scheduler import scheduler
+
+    for cache in (catalog_cache, eligible_words, scheduler, user_cache):
+        cache.invalidate()
+    yield
+
+
+@pytest.fixture
+def api(session_maker, monkeypatch):
+    """Приложение на базе теста; возвращает фабрику клиентов (создавать внутри asyncio.run)"""
+    from src import database
+    from src.main import app
+
+    monkeypatch.setattr(database, "async_session_maker", session_maker)
+    monkeypatch.setattr(database, "write_session_maker", session_maker)
+
+    def client():
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    return client
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from src.models.word import UserDailyActivity, RollupState
+from src.services.activity import add_daily_activity, ensure_rollup_state, rebuild_daily_activity
+from src.services.events import make_event, record_events
+from tests.test_events import seed
+
+
+def test_concurrent_startups_share_rollup_state(session_maker):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        async with session_maker() as session:
+            await record_events(session, [make_event(user_id, word_id, "shown")])
+            await session.commit()
+
+        async def start():
+            async with session_maker() as session:
+                return await ensure_rollup_state(session)
+
+        states = await asyncio.gather(*(start() for _ in range(5)))
+        assert {state.live_from_event_id for state in states} == {1}
+        async with session_maker() as session:
+            assert len((await session.execute(select(RollupState))).scalars().all()) == 1
+
+    asyncio.run(run())
+
+
+def test_rebuild_replaces_double_counted_day(session_maker):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        today = datetime.utcnow()
+        yesterday = today - timedelta(days=1)
+        event = make_event(user_id, word_id, "answered", is_correct=True, timestamp=yesterday)
+        others = [
+            make_event(user_id, word_id, "shown", timestamp=yesterday),
+            make_event(user_id, word_id, "answered", is_correct=False, timestamp=yesterday),
+            make_event(user_id, word_id, "shown", timestamp=today),
+        ]
+        async with session_maker() as session:
+            await record_events(session, [event, *others])
+            await session.commit()
+            # Событие на границе отметки: учтено при записи и еще раз скриптом
+            await add_daily_activity(session, [event])
+            await session.commit()
+
+            assert await rebuild_daily_activity(session, yesterday.date(), yesterday.date()) == 1
+            rows = (await session.execute(
+                select(UserDailyActivity).order_by(UserDailyActivity.day)
+            )).scalars().all()
+            assert [(r.day, r.shown_count, r.answered_count, r.correct_count) for r in rows] == [
+                (yesterday.date(), 1, 2, 1),
+                (today.date(), 1, 0, 0),
+            ]
+
+    asyncio.run(run())
@@ -0,0 +1,120 @@
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import select
+
+from src.config import settings
+from src.models.word import WordProgress
+from src.routers import words
+from src.services.scheduler import scheduler
+from tests.test_auth_cache import register, seed_words
+from tests.test_next_batch import shown_state
+
+
+@pytest.mark.parametrize("scheduler_enabled", [False, True])
+def test_answer_and_next_advances_like_next(session_maker, api, monkeypatch, scheduler_enabled):
+    monkeypatch.setattr(random, "random", lambda: 0.0)
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", scheduler_enabled)
+
+    async def run():
+        await seed_words(session_maker, 12)
+        async with api() as client:
+            combined_user, combined = await register(client, session_maker, "combined")
+            separate_user, separate = await register(client, session_maker, "separate")
+
+            combined_words, separate_words = [], []
+            response = await client.get("/api/words/next", headers=combined)
+            word_id = response.json()["word"]["id"]
+            combined_words.append(word_id)
+            for step in range(6):
+                response = await client.post(
+                    "/api/words/answer-and-next",
+                    params={"word_id": word_id, "is_correct": step % 2 == 0},
+                    headers=combined,
+                )
+                assert response.status_code == 200, response.text
+                word_id = response.json()["word"]["id"]
+                combined_words.append(word_id)
+
+            # То же через отдельные запросы ответа и показа
+            response = await client.get("/api/words/next", headers=separate)
+            word_id = response.json()["word"]["id"]
+            separate_words.append(word_id)
+            for step in range(6):
+                response = await client.put(
+                    f"/api/progress/progress/{word_id}",
+                    params={"is_correct": step % 2 == 0},
+                    headers=separate,
+                )
+                assert response.status_code == 200, response.text
+                response = await client.get("/api/words/next", headers=separate)
+                word_id = response.json()["word"]["id"]
+                separate_words.append(word_id)
+
+        assert combined_words == separate_words
+        assert await shown_state(session_maker, combined_user) == await shown_state(session_maker, separate_user)
+        counter, _ = await shown_state(session_maker, combined_user)
+        assert counter == 7
+        async with session_maker() as session:
+            answers = (await session.execute(
+                select(WordProgress.correct_count, WordProgress.error_count)
+                .where(WordProgress.user_id == combined_user)
+            )).all()
+        assert sum(c for c, _ in answers) == 3 and sum(e for _, e in answers) == 3
+
+    asyncio.run(run())
+
+
+def test_answer_and_next_respects_exclude_last(session_maker, api):
+    async def run():
+        await seed_words(session_maker, 3)
+        async with api() as client:
+            _, headers = await register(client, session_maker, "learner")
+            response = await client.get("/api/words/next", params={"exclude_last": 2}, headers=headers)
+            shown = [response.json()["word"]["id"]]
+            for _ in range(8):
+                response = await client.post(
+                    "/api/words/answer-and-next",
+                    params={"word_id": shown[-1], "is_correct": True, "exclude_last": 2},
+                    headers=headers,
+                )
+                shown.append(response.json()["word"]["id"])
+
+        for i, word_id in enumerate(shown):
+            assert word_id not in shown[max(0, i - 2):i]
+
+    asyncio.run(run())
+
+
+def test_failed_answer_and_next_rolls_back_and_drops_schedule(session_maker, api, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", True)
+
+    async def failing_record_events(session, events):
+        raise RuntimeError("events table unavailable")
+
+    async def run():
+        await seed_words(session_maker, 5)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            response = await client.get("/api/words/next", headers=headers)
+            word_id = response.json()["word"]["id"]
+            assert scheduler.peek(user_id) is not None
+
+            monkeypatch.setattr(words, "record_events", failing_record_events)
+            response = await client.post(
+                "/api/words/answer-and-next", params={"word_id": word_id, "is_correct": True}, headers=headers,
+            )
+            assert response.status_code == 500
+
+        # Ответ и показ откатились вместе; расписание с их учетом сброшено
+        assert scheduler.peek(user_id) is None
+        counter, _ = await shown_state(session_maker, user_id)
+        assert counter == 1
+        async with session_maker() as session:
+            progress = (await session.execute(
+                select(WordProgress).where(WordProgress.user_id == user_id)
+            )).scalar_one()
+        assert progress.correct_count == 0
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from src.models.word import AnswerBatch, WordProgress
+from src.routers import progress
+from src.routers.progress import AnswerBatchRequest, update_progress_bulk
+from tests.test_events import seed
+
+
+def make_batch(word_id, batch_id="b1"):
+    return AnswerBatchRequest(
+        batch_id=batch_id,
+        answers=[{"word_id": word_id, "is_correct": True}, {"word_id": 999, "is_correct": False}],
+    )
+
+
+def test_batch_already_claimed_is_reported_not_failed(session_maker):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        user = SimpleNamespace(id=user_id, words_shown_counter=0)
+        async with session_maker() as session:
+            first = await update_progress_bulk(make_batch(word_id), session, user)
+        assert first["status"] == "success" and first["applied"] == 1
+
+        # Проверка session.get пропущена: пакет принят между проверкой и вставкой
+        async with session_maker() as session:
+            result = await progress._apply_answer_batch(session, user, make_batch(word_id))
+        assert result is None
+
+        async with session_maker() as session:
+            again = await update_progress_bulk(make_batch(word_id), session, user)
+        assert again == {"status": "already_applied", "batch_id": "b1", "applied": 1}
+
+    asyncio.run(run())
+
+
+def test_progress_conflict_is_retried_not_reported_as_duplicate(session_maker, monkeypatch):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        user = SimpleNamespace(id=user_id, words_shown_counter=0)
+        new_word_progress = progress.new_word_progress
+        attempts = []
+
+        async with session_maker() as session:
+            def conflicting_new_word_progress(*args):
+                attempts.append(args)
+                if len(attempts) == 1:
+                    # Строка той же пары (user, word), созданная параллельным /next
+                    session.add(WordProgress(user_id=user_id, word_id=word_id, shown_count=1))
+                return new_word_progress(*args)
+
+            monkeypatch.setattr(progress, "new_word_progress", conflicting_new_word_progress)
+            result = await update_progress_bulk(make_batch(word_id), session, user)
+
+        assert len(attempts) == 2
+        assert result["status"] == "success" and result["applied"] == 1
+        async with session_maker() as session:
+            batch = await session.get(AnswerBatch, (user_id, "b1"))
+            rows = (await session.execute(select(WordProgress))).scalars().all()
+        assert batch.answers_count == 1 and len(rows) == 1
+
+    asyncio.run(run())
@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+
+from fastapi_users.jwt import generate_jwt
+from sqlalchemy import insert, update
+
+from src.auth.cache import user_cache
+from src.config import settings
+from src.models.models import User
+from src.models.word import Word
+
+PASSWORD = "test-password"
+AUDIENCE = ["fastapi-users:auth"]
+
+
+async def register(client, session_maker, name, superuser=False):
+    """Регистрирует и логинит пользователя; возвращает (id, заголовки)"""
+    email = f"{name}@example.com"
+    response = await client.post("/api/auth/register", json={
+        "email": email, "username": name, "password": PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    user_id = uuid.UUID(response.json()["id"])
+    if superuser:
+        async with session_maker() as session:
+            await session.execute(update(User).where(User.id == user_id).values(is_superuser=True))
+            await session.commit()
+    response = await client.post("/api/auth/jwt/login", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def seed_words(session_maker, count=10):
+    async with session_maker() as session:
+        word_ids = (await session.execute(
+            insert(Word).returning(Word.id),
+            [{"english": f"w{i}", "russian": f"с{i}"} for i in range(count)],
+        )).scalars().all()
+        await session.commit()
+    return list(word_ids)
+
+
+def token(user_id, secret=None, lifetime=60, audience=AUDIENCE):
+    return generate_jwt(
+        {"sub": str(user_id), "aud": audience}, secret or settings.SECRET_KEY, lifetime,
+    )
+
+
+def test_deactivation_by_superuser_evicts_cached_identity(session_maker, api):
+    async def run():
+        await seed_words(session_maker)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            _, admin = await register(client, session_maker, "admin", superuser=True)
+
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+            assert user_cache.get(user_id) is not None
+
+            response = await client.patch(f"/api/users/{user_id}", json={"is_active": False}, headers=admin)
+            assert response.status_code == 200, response.text
+            assert user_cache.get(user_id) is None
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 401
+
+    asyncio.run(run())
+
+
+def test_cache_hides_direct_database_changes_until_evicted(session_maker, api):
+    async def run():
+        await seed_words(session_maker)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+
+            # Изменение мимо UserManager видно только после сброса записи (или TTL)
+            async with session_maker() as session:
+                await session.execute(update(User).where(User.id == user_id).values(is_active=False))
+                await session.commit()
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+            user_cache.invalidate(user_id)
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 401
+
+    asyncio.run(run())
+
+
+def test_password_change_evicts_cached_identity(session_maker, api):
+    async def run():
+        await seed_words(session_maker)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+            assert user_cache.get(user_id) is not None
+
+            response = await client.patch("/api/users/me", json={"password": "another-password"}, headers=headers)
+            assert response.status_code == 200, response.text
+            assert user_cache.get(user_id) is None
+
+    asyncio.run(run())
+
+
+def test_bad_tokens_are_rejected_on_cache_hit(session_maker, api):
+    async def run():
+        await seed_words(session_maker)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+            assert user_cache.get(user_id) is not None
+
+            for bad in (
+                token(user_id, lifetime=-10),
+                token(user_id, audience=["another-audience"]),
+                token(user_id, secret="not-the-secret"),
+                "not-a-jwt",
+            ):
+                response = await client.get("/api/words/next", headers={"Authorization": f"Bearer {bad}"})
+                assert response.status_code == 401
+            # Корректный токен того же пользователя проходит
+            response = await client.get("/api/words/next", headers={"Authorization": f"Bearer {token(user_id)}"})
+            assert response.status_code == 200
+
+    asyncio.run(run())
@@ -0,0 +1,17 @@
+import asyncio
+
+from src.services.catalog import bump_catalog_version, get_catalog_version
+
+
+def test_first_bumps_do_not_conflict(session_maker):
+    async def run():
+        async def bump():
+            async with session_maker() as session:
+                await bump_catalog_version(session)
+                await session.commit()
+
+        await asyncio.gather(*(bump() for _ in range(3)))
+        async with session_maker() as session:
+            assert await get_catalog_version(session) == 3
+
+    asyncio.run(run())
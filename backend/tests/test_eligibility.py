@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+
+from sqlalchemy import insert
+
+from src.models.models import User, WordSet, user_wordset, wordset_word
+from src.models.word import Word
+from src.services import eligibility, scheduler as scheduler_module
+from src.services.eligibility import EligibleWordsCache
+
+
+async def seed_user_with_wordset(session_maker, words=20):
+    async with session_maker() as session:
+        user_id = uuid.uuid4()
+        await session.execute(insert(User).values(
+            id=user_id, email=f"{user_id}@example.com", username=str(user_id),
+            hashed_password="x", words_shown_counter=0,
+        ))
+        word_ids = (await session.execute(
+            insert(Word).returning(Word.id),
+            [{"english": f"w{i}", "russian": f"с{i}"} for i in range(words)],
+        )).scalars().all()
+        wordset_id = (await session.execute(
+            insert(WordSet).values(name="set").returning(WordSet.id)
+        )).scalar_one()
+        await session.execute(insert(wordset_word), [
+            {"wordset_id": wordset_id, "word_id": word_id} for word_id in word_ids[: words // 2]
+        ])
+        await session.execute(insert(user_wordset).values(user_id=user_id, wordset_id=wordset_id))
+        await session.commit()
+    return user_id, list(word_ids)
+
+
+def test_ttl_refresh_keeps_array_identity_and_schedule(session_maker, monkeypatch):
+    cache = EligibleWordsCache(ttl=0, idle_seconds=900)
+    monkeypatch.setattr(eligibility, "eligible_words", cache)
+    monkeypatch.setattr(scheduler_module, "eligible_words", cache)
+    loads = []
+    load_schedule = scheduler_module.load_schedule
+
+    async def counting_load_schedule(*args):
+        loads.append(args)
+        return await load_schedule(*args)
+
+    monkeypatch.setattr(scheduler_module, "load_schedule", counting_load_schedule)
+
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker)
+        async with session_maker() as session:
+            first = await cache.get(session, user_id)
+            # TTL истек, состав наборов не менялся
+            assert await cache.get(session, user_id) is first
+            assert list(first) == sorted(word_ids[:10])
+
+            schedule = await scheduler_module.scheduler.get(session, user_id, 0)
+            assert await scheduler_module.scheduler.get(session, user_id, 0) is schedule
+        assert len(loads) == 1
+
+    asyncio.run(run())
+
+
+def test_idle_entries_are_evicted(session_maker):
+    cache = EligibleWordsCache(ttl=30, idle_seconds=900)
+
+    async def run():
+        user_id, _ = await seed_user_with_wordset(session_maker)
+        async with session_maker() as session:
+            await cache.get(session, user_id)
+        assert user_id in cache._entries
+
+        entry = cache._entries[user_id]
+        cache._entries[user_id] = entry._replace(loaded_at=entry.loaded_at - 500)
+        cache.evict_idle()
+        # Полный проход не чаще раза в TTL, и запись моложе idle_seconds + ttl
+        assert user_id in cache._entries
+
+        cache._entries[user_id] = entry._replace(loaded_at=entry.loaded_at - 1000)
+        cache._next_eviction = 0.0
+        cache.evict_idle()
+        assert user_id not in cache._entries
+
+    asyncio.run(run())
@@ -0,0 +1,162 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import insert, select, func
+
+from src.models.models import User
+from src.models.word import Word, UserWordEvent, UserDailyActivity
+from src.services import events
+from src.services.events import EventBuffer, make_event, record_events
+
+
+async def seed(session_maker):
+    async with session_maker() as session:
+        user_id = uuid.uuid4()
+        await session.execute(insert(User).values(
+            id=user_id, email="u@example.com", username="u", hashed_password="x",
+        ))
+        word_id = (await session.execute(
+            insert(Word).values(english="word", russian="слово").returning(Word.id)
+        )).scalar_one()
+        await session.commit()
+    return user_id, word_id
+
+
+async def count_events(session_maker):
+    async with session_maker() as session:
+        return (await session.execute(select(func.count()).select_from(UserWordEvent))).scalar_one()
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    """Буфер теста вместо глобального (record_events и хуки сессии берут его из модуля)"""
+    buffer = EventBuffer(max_size=3, flush_size=1000, flush_interval=60, max_retries=2)
+    monkeypatch.setattr(events, "event_buffer", buffer)
+    return buffer
+
+
+def test_reservations_are_released_on_commit_and_rollback(session_maker, buffer):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        buffer.start(session_maker)
+
+        async with session_maker() as session:
+            await record_events(session, [make_event(user_id, word_id, "shown")] * 2)
+            assert buffer._reserved == 2
+            await session.rollback()
+        assert buffer._reserved == 0 and len(buffer) == 0
+
+        async with session_maker() as session:
+            await record_events(session, [make_event(user_id, word_id, "shown")] * 2)
+        # Сессия закрыта без коммита
+        assert buffer._reserved == 0
+
+        async with session_maker() as session:
+            await record_events(session, [make_event(user_id, word_id, "shown")] * 2)
+            await session.commit()
+        assert buffer._reserved == 0 and len(buffer) == 2
+
+        await buffer.stop()
+        assert await count_events(session_maker) == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_reservations_never_exceed_max_size(session_maker, buffer):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        buffer.start(session_maker)
+        # Все места заняты открытыми транзакциями, в очереди пока ничего нет
+        sessions = [session_maker() for _ in range(3)]
+        for session in sessions:
+            await record_events(session, [make_event(user_id, word_id, "shown")])
+        assert buffer._reserved == buffer.max_size and len(buffer) == 0
+
+        # Сверх max_size события пишутся в транзакции запроса, без ожидания
+        for _ in range(2):
+            async with session_maker() as session:
+                await asyncio.wait_for(
+                    record_events(session, [make_event(user_id, word_id, "shown")]), 1
+                )
+                await session.commit()
+        assert await count_events(session_maker) == 2
+
+        for session in sessions:
+            await session.commit()
+            await session.close()
+        assert len(buffer) == buffer.max_size and buffer._reserved == 0
+
+        await buffer.stop()
+        assert await count_events(session_maker) == 5
+
+    asyncio.run(run())
+
+
+def test_stop_during_flush_keeps_events(session_maker, buffer, monkeypatch):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        flushing = asyncio.Event()
+        add_daily_activity = events.add_daily_activity
+
+        async def slow_add_daily_activity(session, batch):
+            flushing.set()
+            await asyncio.sleep(0.2)
+            await add_daily_activity(session, batch)
+
+        monkeypatch.setattr(events, "add_daily_activity", slow_add_daily_activity)
+        buffer.start(session_maker)
+        buffer.put_many([make_event(user_id, word_id, "shown")] * 3)
+        buffer._wakeup.set()
+        await flushing.wait()
+
+        await buffer.stop()
+        assert len(buffer) == 0
+        assert await count_events(session_maker) == 3
+
+    asyncio.run(run())
+
+
+def test_cancelled_flush_requeues_batch(session_maker, buffer, monkeypatch):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        flushing = asyncio.Event()
+
+        async def hanging_add_daily_activity(session, batch):
+            flushing.set()
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(events, "add_daily_activity", hanging_add_daily_activity)
+        buffer._session_maker = session_maker
+        buffer.put_many([make_event(user_id, word_id, "shown")] * 3)
+        task = asyncio.create_task(buffer.flush())
+        await flushing.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(buffer) == 3
+
+    asyncio.run(run())
+
+
+def test_rejected_event_is_dropped_after_retries(session_maker, buffer):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        buffer._session_maker = session_maker
+        bad = make_event(user_id, word_id, None)
+        buffer.put_many([make_event(user_id, word_id, "shown"), bad, make_event(user_id, word_id, "shown")])
+
+        for _ in range(buffer.max_retries):
+            await buffer.flush()
+            assert len(buffer) == 3 and await count_events(session_maker) == 0
+
+        # Следующая попытка пишет по одному событию и отбрасывает ошибочное
+        buffer.put_many([make_event(user_id, word_id, "shown")])
+        await buffer.flush()
+        assert len(buffer) == 0 and buffer._failed_attempts == 0
+        assert await count_events(session_maker) == 3
+        async with session_maker() as session:
+            shown = (await session.execute(select(UserDailyActivity.shown_count))).scalar_one()
+        assert shown == 3
+
+    asyncio.run(run())
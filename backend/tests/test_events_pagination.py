@@ -0,0 +1,77 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from src.models.word import UserWordEvent
+from src.routers.progress import get_user_word_events
+from src.services.events import make_event
+from tests.test_events import seed
+
+EPOCH = datetime(2024, 1, 1)
+
+
+async def page(session_maker, user, limit, cursor=None):
+    async with session_maker() as session:
+        return await get_user_word_events(
+            limit=limit, cursor=cursor, word_id=None, event_type=None,
+            include_metadata=False, session=session, current_user=user,
+        )
+
+
+def test_pages_follow_timestamp_and_id_without_gaps(session_maker):
+    async def run():
+        user_id, word_id = await seed(session_maker)
+        user = SimpleNamespace(id=user_id)
+        # Три события с одинаковым временем попадают на границу страниц
+        timestamps = [EPOCH, EPOCH + timedelta(seconds=1)] + [EPOCH + timedelta(seconds=2)] * 3 + [EPOCH + timedelta(seconds=3)]
+        async with session_maker() as session:
+            await session.execute(insert(UserWordEvent), [
+                make_event(user_id, word_id, "shown", timestamp=ts) for ts in timestamps
+            ])
+            await session.commit()
+        expected = sorted(
+            zip(timestamps, range(1, len(timestamps) + 1)), reverse=True
+        )
+
+        seen = []
+        cursor = None
+        first = True
+        while True:
+            result = await page(session_maker, user, 2, cursor)
+            seen += [(e["timestamp"], e["id"]) for e in result["events"]]
+            if first:
+                # Новое событие после первой страницы не сдвигает следующие
+                async with session_maker() as session:
+                    await session.execute(insert(UserWordEvent).values(
+                        make_event(user_id, word_id, "shown", timestamp=EPOCH + timedelta(seconds=10))
+                    ))
+                    await session.commit()
+                first = False
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    base64.urlsafe_b64encode(b"yesterday|1").decode(),
+    base64.urlsafe_b64encode(b"2024-01-01T00:00:00|one").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+])
+def test_malformed_cursor_is_rejected(session_maker, cursor):
+    async def run():
+        user_id, _ = await seed(session_maker)
+        with pytest.raises(HTTPException) as raised:
+            await page(session_maker, SimpleNamespace(id=user_id), 2, cursor)
+        assert raised.value.status_code == 400
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from src.models.word import UserWordEvent
+from src.services import export
+from src.services.events import make_event
+from tests.test_auth_cache import register, seed_words
+
+EPOCH = datetime(2024, 1, 1)
+
+
+async def seed_history(session_maker, user_id, word_ids):
+    events = [
+        make_event(
+            user_id, word_ids[i % len(word_ids)], "answered" if i % 2 else "shown",
+            is_correct=(i % 4 == 1) if i % 2 else None,
+            event_data=json.dumps({"options": [i]}) if i % 3 == 0 else None,
+            timestamp=EPOCH + timedelta(minutes=i),
+        )
+        for i in range(5)
+    ]
+    async with session_maker() as session:
+        await session.execute(insert(UserWordEvent), events)
+        await session.commit()
+    return events
+
+
+def test_export_streams_csv_and_ndjson(session_maker, api, monkeypatch):
+    monkeypatch.setattr(export, "async_session_maker", session_maker)
+    # Маленькие порции: выгрузка идет несколькими частями
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", 2)
+
+    async def run():
+        word_ids = await seed_words(session_maker, 3)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "learner")
+            other_id, _ = await register(client, session_maker, "other")
+            events = await seed_history(session_maker, user_id, word_ids)
+            await seed_history(session_maker, other_id, word_ids)
+
+            response = await client.get("/api/progress/events/export", params={"format": "csv"}, headers=headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/csv")
+            assert response.headers["content-disposition"] == 'attachment; filename="events.csv"'
+            rows = list(csv.reader(io.StringIO(response.text)))
+            assert rows[0] == export.EXPORT_COLUMNS
+            assert [row[1] for row in rows[1:]] == [str(e["word_id"]) for e in events]
+            assert [row[5] for row in rows[1:]] == ["", "1", "", "0", ""]
+            assert rows[1][6] == EPOCH.isoformat() and rows[1][7] == '{"options": [0]}'
+            assert rows[1][2] == "w0" and rows[1][3] == "с0"
+
+            response = await client.get("/api/progress/events/export", headers=headers)
+            assert response.headers["content-type"] == "application/x-ndjson"
+            assert response.headers["content-disposition"] == 'attachment; filename="events.ndjson"'
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["event_type"] for line in lines] == [e["event_type"] for e in events]
+            assert lines[3]["metadata"] == {"options": [3]} and lines[1]["metadata"] is None
+            assert lines[1]["is_correct"] is True and lines[0]["is_correct"] is None
+
+            response = await client.get(
+                "/api/progress/events/export", params={"event_type": "answered"}, headers=headers,
+            )
+            assert len(response.text.splitlines()) == 2
+
+            response = await client.get("/api/progress/events/export", params={"format": "xml"}, headers=headers)
+            assert response.status_code == 422
+
+        parts = [part async for part in export.stream_user_events(user_id, "ndjson")]
+        assert [len(part.splitlines()) for part in parts] == [2, 2, 1]
+
+    asyncio.run(run())
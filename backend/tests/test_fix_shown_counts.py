@@ -0,0 +1,39 @@
+import asyncio
+
+from sqlalchemy import insert, select
+
+from scripts import fix_shown_counts
+from src.models.word import WordProgress, UserWordEvent
+from src.services.events import make_event
+from tests.test_eligibility import seed_user_with_wordset
+
+
+def test_shown_counts_are_set_from_events(session_maker, monkeypatch):
+    monkeypatch.setattr(fix_shown_counts, "async_session_maker", session_maker)
+
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker, words=3)
+        async with session_maker() as session:
+            # Двойной учет, верное значение и слово без событий
+            await session.execute(insert(WordProgress), [
+                {"user_id": user_id, "word_id": word_ids[0], "shown_count": 4},
+                {"user_id": user_id, "word_id": word_ids[1], "shown_count": 1},
+                {"user_id": user_id, "word_id": word_ids[2], "shown_count": 3},
+            ])
+            await session.execute(insert(UserWordEvent), [
+                make_event(user_id, word_ids[0], "shown"),
+                make_event(user_id, word_ids[0], "shown"),
+                make_event(user_id, word_ids[0], "answered", is_correct=True),
+                make_event(user_id, word_ids[1], "shown"),
+            ])
+            await session.commit()
+
+        assert await fix_shown_counts.fix_shown_counts(users_per_chunk=1, dry_run=True) == 2
+        assert await fix_shown_counts.fix_shown_counts(users_per_chunk=1) == 2
+        async with session_maker() as session:
+            counts = dict((await session.execute(
+                select(WordProgress.word_id, WordProgress.shown_count)
+            )).all())
+        assert counts == {word_ids[0]: 2, word_ids[1]: 1, word_ids[2]: 0}
+
+    asyncio.run(run())
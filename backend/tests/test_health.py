@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi import HTTPException
+
+from src import main
+from src.routers import health
+from src.startup import startup_state
+
+
+def test_readiness_hides_database_error(monkeypatch, caplog):
+    async def failing_ping():
+        raise OSError("connection refused: db.internal:5432 user=dbadmin")
+
+    monkeypatch.setattr(health, "_ping_database", failing_ping)
+    monkeypatch.setattr(startup_state, "ready", True)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(health.readiness())
+    assert raised.value.status_code == 503
+    assert raised.value.detail == "Database unavailable"
+    assert "db.internal" in caplog.text
+
+
+def test_full_startup_logs_database_failure(monkeypatch, caplog):
+    async def failing_create_schema():
+        raise RuntimeError("schema broken")
+
+    monkeypatch.setattr(main.settings, "STARTUP_MODE", "full")
+    monkeypatch.setattr(main, "create_schema", failing_create_schema)
+
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    with caplog.at_level(logging.ERROR), pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert "Database initialization failed: schema broken" in caplog.text
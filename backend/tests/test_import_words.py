@@ -0,0 +1,106 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from scripts import import_words
+from src.models.models import wordset_word
+from src.models.word import Word
+from src.services.catalog import get_catalog_version
+
+
+def write_words(path, pairs):
+    path.write_text(
+        "\n".join(json.dumps({"english": e, "russian": r}, ensure_ascii=False) for e, r in pairs),
+        encoding="utf-8",
+    )
+
+
+async def table(session_maker):
+    async with session_maker() as session:
+        words = (await session.execute(select(Word.russian, Word.english).order_by(Word.id))).all()
+        members = (await session.execute(select(func.count()).select_from(wordset_word))).scalar_one()
+        return words, members
+
+
+@pytest.fixture
+def importer(session_maker, monkeypatch):
+    monkeypatch.setattr(import_words, "async_session_maker", session_maker)
+
+    def run(path, **kwargs):
+        asyncio.run(import_words.import_words(str(path), "imported", chunk_size=2, tts=None, **kwargs))
+
+    return run
+
+
+def test_chunks_skip_known_and_repeated_words(tmp_path, session_maker, importer):
+    async def seed():
+        async with session_maker() as session:
+            await session.execute(insert(Word).values(english="cat", russian="кот"))
+            await session.commit()
+
+    asyncio.run(seed())
+    path = tmp_path / "words.jsonl"
+    # Повторы внутри порции, между порциями и со словом, которое уже есть в базе
+    write_words(path, [("dog", "собака"), ("dog", "собака"), ("cat", "кот"), ("fox", "лиса"), ("fox", "лиса")])
+    importer(path)
+
+    words, members = asyncio.run(table(session_maker))
+    assert words == [("кот", "cat"), ("собака", "dog"), ("лиса", "fox")]
+    assert members == 3
+    assert not Path(f"{path}.import-state").exists()
+
+    # Повторный импорт ничего не добавляет
+    importer(path)
+    assert asyncio.run(table(session_maker)) == (words, 3)
+
+
+def test_interrupted_import_resumes_from_checkpoint(tmp_path, session_maker, importer, monkeypatch):
+    path = tmp_path / "words.jsonl"
+    write_words(path, [(f"w{i}", f"с{i}") for i in range(5)])
+    import_chunk = import_words.import_chunk
+    chunks = []
+
+    async def failing_import_chunk(session, items, *args):
+        chunks.append([item["russian"] for item in items])
+        if len(chunks) == 2:
+            raise RuntimeError("connection lost")
+        return await import_chunk(session, items, *args)
+
+    monkeypatch.setattr(import_words, "import_chunk", failing_import_chunk)
+    with pytest.raises(RuntimeError):
+        importer(path)
+    assert json.loads(Path(f"{path}.import-state").read_text())["offset"] == 2
+    assert len(asyncio.run(table(session_maker))[0]) == 2
+
+    importer(path)
+    # Вторая порция повторяется, первая — нет
+    assert chunks[2:] == [["с2", "с3"], ["с4"]]
+    words, members = asyncio.run(table(session_maker))
+    assert [russian for russian, _ in words] == [f"с{i}" for i in range(5)]
+    assert members == 5
+    assert not Path(f"{path}.import-state").exists()
+
+
+def test_checkpoint_of_another_file_version_is_ignored(tmp_path, session_maker, importer):
+    path = tmp_path / "words.jsonl"
+    write_words(path, [("a", "а"), ("b", "б"), ("c", "в")])
+    import_words.ImportCheckpoint(str(path)).save(2)
+    write_words(path, [("a", "а"), ("b", "б"), ("c", "в"), ("d", "г")])
+    importer(path)
+    assert len(asyncio.run(table(session_maker))[0]) == 4
+
+
+def test_import_bumps_catalog_version(tmp_path, session_maker, importer):
+    path = tmp_path / "words.jsonl"
+    write_words(path, [("a", "а")])
+    importer(path)
+
+    async def version():
+        async with session_maker() as session:
+            return await get_catalog_version(session)
+
+    # Создание набора и одна порция
+    assert asyncio.run(version()) == 2
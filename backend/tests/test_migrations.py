@@ -0,0 +1,67 @@
+import asyncio
+import uuid
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.migrations import run_migrations, missing_migrations
+from src.migrations import runner
+from src.migrations.versions import MIGRATIONS
+from src.models.models import Base
+
+
+def schema(sync_conn):
+    inspector = inspect(sync_conn)
+    return {
+        table: (
+            sorted(c["name"] for c in inspector.get_columns(table)),
+            sorted(i["name"] for i in inspector.get_indexes(table)),
+        )
+        for table in inspector.get_table_names()
+        if table != "schema_migrations"
+    }
+
+
+def test_fresh_database_matches_models(tmp_path):
+    async def run():
+        migrated = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}")
+        assert len(await run_migrations(migrated)) == len(MIGRATIONS)
+        assert await run_migrations(migrated) == []
+        assert await missing_migrations(migrated) == []
+
+        created = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'created.db'}")
+        async with created.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with migrated.connect() as a, created.connect() as b:
+            assert await a.run_sync(schema) == await b.run_sync(schema)
+        await migrated.dispose()
+        await created.dispose()
+
+    asyncio.run(run())
+
+
+def test_duplicates_written_after_merge_do_not_block_unique_index(tmp_path, monkeypatch):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        monkeypatch.setattr(runner, "MIGRATIONS", MIGRATIONS[:3])
+        await run_migrations(engine)
+
+        # Приложение успело записать дубликат между миграциями 3 и 4
+        user_id = uuid.uuid4().hex
+        async with engine.begin() as conn:
+            for shown in (2, 3):
+                await conn.execute(text(
+                    "INSERT INTO wordprogress (word_id, user_id, last_shown, shown_count, correct_count, "
+                    "error_count, last_shown_position, exp_error_rate) "
+                    "VALUES (1, :user_id, CURRENT_TIMESTAMP, :shown, 0, 0, 0, 0.5)"
+                ), {"user_id": user_id, "shown": shown})
+
+        monkeypatch.setattr(runner, "MIGRATIONS", MIGRATIONS)
+        await run_migrations(engine)
+        async with engine.connect() as conn:
+            rows = (await conn.execute(text("SELECT shown_count FROM wordprogress"))).all()
+        assert rows == [(5,)]
+        await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,110 @@
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import select
+
+from src.config import settings
+from src.models.models import User
+from src.models.word import WordProgress
+from src.routers import words
+from src.services.scheduler import scheduler
+from tests.test_auth_cache import register, seed_words
+
+
+async def shown_state(session_maker, user_id):
+    """(счетчик показов, word_id -> last_shown_position)"""
+    async with session_maker() as session:
+        counter = (await session.execute(
+            select(User.words_shown_counter).where(User.id == user_id)
+        )).scalar_one()
+        positions = dict((await session.execute(
+            select(WordProgress.word_id, WordProgress.last_shown_position)
+            .where(WordProgress.user_id == user_id)
+        )).all())
+    return counter, positions
+
+
+@pytest.mark.parametrize("scheduler_enabled", [False, True])
+def test_deck_matches_successive_next_calls(session_maker, api, monkeypatch, scheduler_enabled):
+    # Без шума веса выбор однозначен: колода и /next должны совпасть
+    monkeypatch.setattr(random, "random", lambda: 0.0)
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", scheduler_enabled)
+
+    async def run():
+        await seed_words(session_maker, 12)
+        async with api() as client:
+            deck_user, deck_headers = await register(client, session_maker, "deck")
+            next_user, next_headers = await register(client, session_maker, "next")
+
+            response = await client.get("/api/words/next-batch", params={"count": 8}, headers=deck_headers)
+            assert response.status_code == 200, response.text
+            deck = [card["word"]["id"] for card in response.json()["cards"]]
+
+            one_by_one = []
+            for _ in range(8):
+                response = await client.get("/api/words/next", headers=next_headers)
+                assert response.status_code == 200, response.text
+                one_by_one.append(response.json()["word"]["id"])
+
+        assert deck == one_by_one
+        assert await shown_state(session_maker, deck_user) == await shown_state(session_maker, next_user)
+        counter, positions = await shown_state(session_maker, deck_user)
+        assert counter == 8
+        assert [positions[word_id] for word_id in deck] == list(range(1, 9))
+
+    asyncio.run(run())
+
+
+def test_deck_respects_exclude_last(session_maker, api):
+    async def run():
+        await seed_words(session_maker, 3)
+        async with api() as client:
+            _, headers = await register(client, session_maker, "deck")
+            response = await client.get(
+                "/api/words/next-batch", params={"count": 9, "exclude_last": 2}, headers=headers,
+            )
+            deck = [card["word"]["id"] for card in response.json()["cards"]]
+
+        assert len(deck) == 9
+        for i, word_id in enumerate(deck):
+            assert word_id not in deck[max(0, i - 2):i]
+
+    asyncio.run(run())
+
+
+def test_deck_size_is_limited(session_maker, api):
+    async def run():
+        await seed_words(session_maker, 3)
+        async with api() as client:
+            _, headers = await register(client, session_maker, "deck")
+            for count in (0, words.MAX_BATCH_SIZE + 1):
+                response = await client.get("/api/words/next-batch", params={"count": count}, headers=headers)
+                assert response.status_code == 422
+
+    asyncio.run(run())
+
+
+def test_failed_deck_rolls_back_and_drops_schedule(session_maker, api, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", True)
+
+    async def failing_record_events(session, events):
+        raise RuntimeError("events table unavailable")
+
+    async def run():
+        await seed_words(session_maker, 5)
+        async with api() as client:
+            user_id, headers = await register(client, session_maker, "deck")
+            assert (await client.get("/api/words/next", headers=headers)).status_code == 200
+            assert scheduler.peek(user_id) is not None
+
+            monkeypatch.setattr(words, "record_events", failing_record_events)
+            response = await client.get("/api/words/next-batch", params={"count": 3}, headers=headers)
+            assert response.status_code == 500
+
+        # Симуляция продвинула расписание — после отката его нет
+        assert scheduler.peek(user_id) is None
+        counter, positions = await shown_state(session_maker, user_id)
+        assert counter == 1 and sorted(positions.values()) == [1]
+
+    asyncio.run(run())
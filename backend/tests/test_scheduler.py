@@ -0,0 +1,147 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+
+from src.models.models import wordset_word
+from src.models.word import WordProgress
+from src.services.catalog import bump_catalog_version, catalog_cache
+from src.services.scheduler import scheduler
+from src.services.selection import pick_next_word_id
+from tests.test_eligibility import seed_user_with_wordset
+
+EPOCH = datetime(2024, 1, 1)
+
+
+async def show(session, user_id, word_id, position):
+    """Показ слова в БД, как его записывает /api/words/next"""
+    await session.execute(
+        update(WordProgress)
+        .where(WordProgress.user_id == user_id, WordProgress.word_id == word_id)
+        .values(last_shown_position=position, last_shown=EPOCH + timedelta(seconds=position))
+    )
+    await session.commit()
+
+
+def test_bucketed_pick_matches_sql_pick(session_maker, monkeypatch):
+    # Без шума веса и с exp_error_rate, кратными шагу корзины, выбор однозначен
+    monkeypatch.setattr(random, "random", lambda: 0.0)
+    rng = random.Random(7)
+
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker, words=40)
+        eligible = sorted(word_ids[:20])
+        async with session_maker() as session:
+            await session.execute(insert(WordProgress), [
+                {
+                    "user_id": user_id,
+                    "word_id": word_id,
+                    "last_shown_position": position,
+                    "last_shown": EPOCH + timedelta(seconds=position),
+                    "exp_error_rate": rng.randrange(65) / 64,
+                }
+                for position, word_id in enumerate(rng.sample(eligible, len(eligible)), start=1)
+            ])
+            await session.commit()
+
+            position = len(eligible)
+            schedule = await scheduler.get(session, user_id, position)
+            for _ in range(60):
+                expected = await pick_next_word_id(session, user_id, position)
+                assert schedule.pick() == expected
+
+                position += 1
+                await show(session, user_id, expected, position)
+                schedule.record_show(expected, position)
+                if rng.random() < 0.5:
+                    exp_error_rate = rng.randrange(65) / 64
+                    await session.execute(
+                        update(WordProgress)
+                        .where(WordProgress.user_id == user_id, WordProgress.word_id == expected)
+                        .values(exp_error_rate=exp_error_rate)
+                    )
+                    await session.commit()
+                    schedule.record_answer(expected, position, exp_error_rate)
+            assert await scheduler.get(session, user_id, position) is schedule
+
+    asyncio.run(run())
+
+
+def test_schedule_follows_wordset_changes(session_maker):
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker, words=4)
+        async with session_maker() as session:
+            wordset_id = (await session.execute(select(wordset_word.c.wordset_id))).scalars().first()
+            schedule = await scheduler.get(session, user_id, 0)
+            assert sorted(schedule._state) == sorted(word_ids[:2])
+
+            # Как POST /api/wordsets/{id}/words: версия каталога в той же транзакции
+            await session.execute(insert(wordset_word).values(wordset_id=wordset_id, word_id=word_ids[2]))
+            await bump_catalog_version(session)
+            await session.commit()
+            catalog_cache.invalidate()
+            schedule = await scheduler.get(session, user_id, 0)
+            assert word_ids[2] in schedule
+
+            await session.execute(
+                delete(wordset_word)
+                .where(wordset_word.c.wordset_id == wordset_id, wordset_word.c.word_id == word_ids[0])
+            )
+            await bump_catalog_version(session)
+            await session.commit()
+            catalog_cache.invalidate()
+            schedule = await scheduler.get(session, user_id, 0)
+            assert word_ids[0] not in schedule
+            assert {schedule.pick(exclude_last=0) for _ in range(20)} <= {word_ids[1], word_ids[2]}
+
+    asyncio.run(run())
+
+
+def test_position_mismatch_reloads_from_database(session_maker):
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker, words=4)
+        async with session_maker() as session:
+            schedule = await scheduler.get(session, user_id, 0)
+            assert await scheduler.get(session, user_id, 0) is schedule
+
+            # Показ прошел через другой процесс: в этом расписании его нет
+            await session.execute(insert(WordProgress).values(
+                user_id=user_id, word_id=word_ids[0], last_shown_position=1, exp_error_rate=0.0,
+            ))
+            await session.commit()
+            reloaded = await scheduler.get(session, user_id, 1)
+            assert reloaded is not schedule
+            assert reloaded.position == 1
+            assert reloaded._state[word_ids[0]] == (1, 0.0)
+            assert reloaded.pick() == word_ids[1]
+
+    asyncio.run(run())
+
+
+def test_answers_from_another_process_are_picked_up_after_ttl(session_maker):
+    async def run():
+        user_id, word_ids = await seed_user_with_wordset(session_maker, words=4)
+        async with session_maker() as session:
+            await session.execute(insert(WordProgress), [
+                {"user_id": user_id, "word_id": word_id, "last_shown_position": 1, "exp_error_rate": 0.5}
+                for word_id in word_ids[:2]
+            ])
+            await session.commit()
+            schedule = await scheduler.get(session, user_id, 1)
+
+            # Ответ через другой процесс: ошибка изменилась, счетчик показов — нет
+            await session.execute(
+                update(WordProgress)
+                .where(WordProgress.user_id == user_id, WordProgress.word_id == word_ids[0])
+                .values(exp_error_rate=1.0)
+            )
+            await session.commit()
+            assert await scheduler.get(session, user_id, 1) is schedule
+
+            schedule.loaded_at -= scheduler.ttl + 1
+            reloaded = await scheduler.get(session, user_id, 1)
+            assert reloaded is not schedule
+            assert reloaded._state[word_ids[0]] == (1, 1.0)
+
+    asyncio.run(run())
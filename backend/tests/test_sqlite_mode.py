@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+from sqlalchemy import event, select, func, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src import database
+from src.main import app
+from src.models.models import Base, User
+from src.models.word import UserWordEvent
+from src.services import events
+from src.services.events import EventBuffer, make_event, record_events
+from src.services.selection import reserve_positions
+from src.sqlite_mode import create_sqlite_engines
+from tests.test_events import seed
+
+
+def test_full_event_buffer_does_not_block_the_writer(db_url, monkeypatch):
+    buffer = EventBuffer(max_size=2, flush_size=1000, flush_interval=0.05, max_retries=2)
+    monkeypatch.setattr(events, "event_buffer", buffer)
+
+    async def run():
+        read_engine, write_engine = create_sqlite_engines(db_url)
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        write_maker = async_sessionmaker(write_engine, expire_on_commit=False)
+        read_maker = async_sessionmaker(read_engine, expire_on_commit=False)
+        user_id, word_id = await seed(write_maker)
+
+        buffer.start(write_maker)
+        # Буфер заполнен: сброс конкурирует с запросами за соединение писателя
+        assert buffer.try_reserve(2)
+        buffer.put_many([make_event(user_id, word_id, "shown")] * 2)
+
+        async def show_word():
+            # Как /api/words/next: BEGIN IMMEDIATE на единственном соединении писателя
+            async with write_maker() as session:
+                await reserve_positions(session, user_id)
+                await record_events(session, [make_event(user_id, word_id, "shown")])
+                await session.commit()
+
+        for _ in range(5):
+            await asyncio.wait_for(show_word(), 5)
+
+        await buffer.stop()
+        async with read_maker() as session:
+            shown = (await session.execute(select(func.count()).select_from(UserWordEvent))).scalar_one()
+            counter = (await session.execute(select(User.words_shown_counter))).scalar_one()
+        assert shown == 7 and counter == 5
+
+        await read_engine.dispose()
+        await write_engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_register_and_login_write_through_the_writer(db_url, monkeypatch):
+    async def run():
+        read_engine, write_engine = create_sqlite_engines(db_url)
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(read_engine, expire_on_commit=False))
+        monkeypatch.setattr(database, "write_session_maker", async_sessionmaker(write_engine, expire_on_commit=False))
+        writes = []
+
+        @event.listens_for(write_engine.sync_engine, "before_cursor_execute")
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT", "UPDATE")):
+                writes.append(statement)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def register_and_login(i):
+                email = f"wal-{i}@example.com"
+                response = await client.post("/api/auth/register", json={
+                    "email": email, "username": f"wal-{i}", "password": "wal-password",
+                })
+                assert response.status_code == 201, response.text
+                response = await client.post(
+                    "/api/auth/jwt/login", data={"username": email, "password": "wal-password"},
+                )
+                assert response.status_code == 200, response.text
+                token = response.json()["access_token"]
+                response = await client.patch(
+                    "/api/users/me", json={"username": f"wal-{i}-renamed"},
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                assert response.status_code == 200, response.text
+
+            await asyncio.wait_for(asyncio.gather(*(register_and_login(i) for i in range(5))), 30)
+
+        assert sum('INSERT INTO user' in s for s in writes) == 5
+        assert sum('UPDATE user' in s for s in writes) >= 5
+        await read_engine.dispose()
+        await write_engine.dispose()
+
+    asyncio.run(run())
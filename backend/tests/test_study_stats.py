@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.models.models import Progress, ProgressTotals
+from src.routers.progress import PeriodStats
+from src.services.study_stats import add_study_session, get_period_stats, get_summary
+from tests.test_events import seed
+
+
+def test_period_stats_keep_one_shape(session_maker):
+    async def run():
+        user_id, _ = await seed(session_maker)
+        since = datetime.utcnow() - timedelta(days=7)
+        async with session_maker() as session:
+            empty = await get_period_stats(session, user_id, since)
+            for accuracy in (0.5, 1.0):
+                progress = Progress(user_id=user_id, duration_seconds=60, words_learned=5, accuracy=accuracy)
+                session.add(progress)
+                await add_study_session(session, progress)
+            await session.commit()
+            totals = await get_period_stats(session, user_id, since)
+            days = await get_period_stats(session, user_id, since, by_day=True)
+
+        assert empty.keys() == totals.keys() == days.keys()
+        assert empty["by_day"] is None and empty["sessions"] == 0
+        assert (totals["sessions"], totals["total_time"], totals["total_words"], totals["average_accuracy"]) == (2, 120, 10, 0.75)
+        assert days["by_day"] == [{
+            "date": datetime.utcnow().strftime("%Y-%m-%d"),
+            "sessions": 2, "total_time": 120, "total_words": 10, "average_accuracy": 0.75,
+        }]
+        for stats in (empty, totals, days):
+            PeriodStats(**stats)
+
+    asyncio.run(run())
+
+
+def test_totals_add_only_the_new_session(session_maker):
+    async def run():
+        user_id, _ = await seed(session_maker)
+        async with session_maker() as session:
+            # История до итогов — ее переносит миграция 5, а не запись сессии
+            session.add(Progress(user_id=user_id, duration_seconds=600, words_learned=50, accuracy=0.1))
+            await session.commit()
+            for accuracy in (0.5, 1.0):
+                progress = Progress(user_id=user_id, duration_seconds=60, words_learned=5, accuracy=accuracy)
+                session.add(progress)
+                await add_study_session(session, progress)
+            await session.commit()
+            totals = await session.get(ProgressTotals, user_id)
+            assert (totals.sessions_count, totals.total_duration_seconds, totals.total_words_learned) == (2, 120, 10)
+            assert totals.accuracy_sum == 1.5
+            assert await get_summary(session, user_id) == {
+                "total_time": 120, "total_words": 10, "average_accuracy": 0.75,
+            }
+
+    asyncio.run(run())
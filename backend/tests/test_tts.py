@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+import time
+
+from sqlalchemy import select
+
+from scripts import import_words
+from src.models.word import Word
+from src.services.tts import AudioGenerator, StubProvider, normalize_text
+
+
+class CountingProvider(StubProvider):
+    """Заглушка, которая считает вызовы синтеза и параллельные вызовы"""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, path):
+        with self._lock:
+            self.calls.append(text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        super().synthesize(text, path)
+        with self._lock:
+            self.active -= 1
+
+
+def test_equal_texts_share_one_file(tmp_path):
+    provider = CountingProvider()
+    audio = AudioGenerator(provider, tmp_path, workers=2)
+    texts = ["Hello", " hello ", "HELLO  world", "hello world"] + [f"w{i}" for i in range(6)]
+
+    paths = asyncio.run(audio.generate(texts))
+    assert sorted(provider.calls) == sorted({normalize_text(text) for text in texts})
+    assert paths["hello"] == "/" + str(audio.path_for("Hello"))
+    assert paths["hello world"] == "/" + str(audio.path_for("hello  World"))
+    assert provider.max_active <= 2
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # Готовые файлы не синтезируются повторно
+    provider.calls.clear()
+    assert asyncio.run(audio.generate(texts)) == paths
+    assert provider.calls == []
+
+
+def test_path_depends_on_provider_settings(tmp_path):
+    class OtherProvider(StubProvider):
+        cache_key = "other"
+
+    assert AudioGenerator(StubProvider(), tmp_path).path_for("cat") != AudioGenerator(OtherProvider(), tmp_path).path_for("cat")
+
+
+def test_imported_words_with_same_english_share_audio(tmp_path, session_maker, monkeypatch):
+    monkeypatch.setattr(import_words, "async_session_maker", session_maker)
+    monkeypatch.setattr(import_words, "AUDIO_DIR", tmp_path / "audio")
+    path = tmp_path / "words.jsonl"
+    path.write_text("\n".join(json.dumps(item, ensure_ascii=False) for item in [
+        {"english": "Bank", "russian": "банк"},
+        {"english": "bank", "russian": "берег"},
+        {"english": "river", "russian": "река"},
+    ]), encoding="utf-8")
+
+    asyncio.run(import_words.import_words(str(path), chunk_size=2, tts="stub"))
+
+    async def audio_paths():
+        async with session_maker() as session:
+            return dict((await session.execute(select(Word.russian, Word.audio_path))).all())
+
+    paths = asyncio.run(audio_paths())
+    assert paths["банк"] == paths["берег"] != paths["река"]
+    assert sorted(p.name for p in (tmp_path / "audio").iterdir()) == sorted(
+        {paths["банк"].rsplit("/", 1)[1], paths["река"].rsplit("/", 1)[1]}
+    )
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from scripts import import_words
+from scripts.import_words import read_words
+
+WORDS = [
+    {"english": "bracket ] inside", "russian": "скобка, и запятая"},
+    {"english": "quote \" and [", "russian": "кавычка"},
+    {"english": "long " + "x" * 300, "russian": "длинное"},
+    {"english": "last", "russian": "последнее", "extra": {"nested": [1, 2]}},
+]
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    # Блок меньше записи: элементы разрезаются границами чтения
+    monkeypatch.setattr(import_words, "READ_SIZE", 7)
+
+
+def test_json_array_is_streamed_across_read_blocks(tmp_path, small_reads):
+    path = tmp_path / "words.json"
+    path.write_text("\ufeff[\n  " + ",\n  ".join(json.dumps(w, ensure_ascii=False) for w in WORDS) + "\n]\n", encoding="utf-8")
+    assert list(read_words(str(path))) == WORDS
+
+    path.write_text("[]", encoding="utf-8")
+    assert list(read_words(str(path))) == []
+
+
+@pytest.mark.parametrize("content", ['{"english": "a"}', '[{"english": "a"},', '[{"english": '])
+def test_broken_json_array_is_reported(tmp_path, small_reads, content):
+    path = tmp_path / "words.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(read_words(str(path)))
+
+
+def test_jsonl_and_csv(tmp_path):
+    path = tmp_path / "words.ndjson"
+    path.write_text("\n".join(json.dumps(w, ensure_ascii=False) for w in WORDS[:2]) + "\n\n", encoding="utf-8")
+    assert list(read_words(str(path))) == WORDS[:2]
+
+    path = tmp_path / "words.csv"
+    path.write_text('\ufeffenglish,russian\n"bracket ] inside","скобка, и запятая"\nlast,последнее\n', encoding="utf-8")
+    assert list(read_words(str(path))) == [
+        {"english": "bracket ] inside", "russian": "скобка, и запятая"},
+        {"english": "last", "russian": "последнее"},
+    ]
+
+
+def test_format_comes_from_suffix_or_argument(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text('{"english": "a", "russian": "б"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_words(str(path))
+    assert list(read_words(str(path), "jsonl")) == [{"english": "a", "russian": "б"}]
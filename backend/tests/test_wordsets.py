@@ -0,0 +1,96 @@
+import asyncio
+
+from sqlalchemy import insert, select
+
+from src.models.models import WordSet, wordset_word
+from src.routers import wordsets
+from src.services.catalog import get_catalog_version
+from tests.test_auth_cache import register, seed_words
+
+
+async def create_wordset(session_maker, word_ids=()):
+    async with session_maker() as session:
+        wordset_id = (await session.execute(
+            insert(WordSet).values(name="set").returning(WordSet.id)
+        )).scalar_one()
+        if word_ids:
+            await session.execute(insert(wordset_word), [
+                {"wordset_id": wordset_id, "word_id": word_id} for word_id in word_ids
+            ])
+        await session.commit()
+    return wordset_id
+
+
+async def members(session_maker, wordset_id):
+    async with session_maker() as session:
+        return set((await session.execute(
+            select(wordset_word.c.word_id).where(wordset_word.c.wordset_id == wordset_id)
+        )).scalars().all())
+
+
+async def catalog_version(session_maker):
+    async with session_maker() as session:
+        return await get_catalog_version(session)
+
+
+def test_bulk_add_and_remove_report_each_word(session_maker, api):
+    async def run():
+        w = await seed_words(session_maker, 4)
+        wordset_id = await create_wordset(session_maker, [w[0]])
+        async with api() as client:
+            _, headers = await register(client, session_maker, "admin")
+            url = f"/api/wordsets/{wordset_id}/words"
+
+            response = await client.post(url, json={"word_ids": [w[0], w[1], w[2], w[1], 999]}, headers=headers)
+            assert response.json() == {
+                "status": "success", "added": [w[1], w[2]], "already_exists": [w[0]], "not_found": [999],
+            }
+            assert await members(session_maker, wordset_id) == {w[0], w[1], w[2]}
+            assert await catalog_version(session_maker) == 1
+
+            response = await client.request("DELETE", url, json={"word_ids": [w[2], w[3], 999]}, headers=headers)
+            assert response.json() == {"status": "success", "removed": [w[2]], "not_in_set": [w[3], 999]}
+            assert await members(session_maker, wordset_id) == {w[0], w[1]}
+            assert await catalog_version(session_maker) == 2
+
+            response = await client.post(url, json={"word_ids": [w[0]]}, headers=headers)
+            assert response.json()["added"] == []
+            # Состав не изменился — версия каталога та же
+            assert await catalog_version(session_maker) == 2
+
+            response = await client.post(url, json={"word_ids": []}, headers=headers)
+            assert response.status_code == 422
+
+    asyncio.run(run())
+
+
+def test_concurrent_changes_are_not_reported_as_ours(session_maker, api, monkeypatch):
+    load_membership = wordsets._load_membership
+
+    async def stale_load_membership(session, wordset_id, word_ids):
+        # Параллельный запрос изменил набор после нашей проверки
+        existing, _ = await load_membership(session, wordset_id, word_ids)
+        return existing, stale_members
+
+    monkeypatch.setattr(wordsets, "_load_membership", stale_load_membership)
+
+    async def run():
+        nonlocal stale_members
+        w = await seed_words(session_maker, 3)
+        wordset_id = await create_wordset(session_maker, [w[0]])
+        async with api() as client:
+            _, headers = await register(client, session_maker, "admin")
+            url = f"/api/wordsets/{wordset_id}/words"
+
+            stale_members = set()
+            response = await client.post(url, json={"word_ids": [w[0], w[1]]}, headers=headers)
+            assert response.json()["added"] == [w[1]]
+            assert response.json()["already_exists"] == [w[0]]
+
+            stale_members = {w[0], w[1], w[2]}
+            response = await client.request("DELETE", url, json={"word_ids": [w[1], w[2]]}, headers=headers)
+            assert response.json()["removed"] == [w[1]]
+            assert response.json()["not_in_set"] == [w[2]]
+
+    stale_members = set()
+    asyncio.run(run())
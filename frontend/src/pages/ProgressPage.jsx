@@ -23,9 +23,10 @@ export function ProgressPage() {
       {stats && (
         <div className="stats-container">
           <div className="stats-summary">
-            <p>Всего слов: {stats.total}</p>
-            <p>Изучено: {stats.learned}</p>
-            <p>Точность: {stats.accuracy}%</p>
+            <p>Занятий за неделю: {stats.sessions}</p>
+            <p>Изучено слов: {stats.total_words}</p>
+            <p>Время: {Math.round(stats.total_time / 60)} мин</p>
+            <p>Точность: {Math.round(stats.average_accuracy * 100)}%</p>
           </div>
         </div>
       )}
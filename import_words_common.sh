@@ -5,6 +5,7 @@
 # Parse command line arguments
 WORDSET=""
 FILE=""
+FORMAT=""
 CONTAINER=""
 ENV=""
 
@@ -18,6 +19,10 @@ while [[ $# -gt 0 ]]; do
       FILE="$2"
       shift 2
       ;;
+    --format)
+      FORMAT="$2"
+      shift 2
+      ;;
     --container)
       CONTAINER="$2"
       shift 2
@@ -28,7 +33,7 @@ while [[ $# -gt 0 ]]; do
       ;;
     *)
       echo "Unknown option: $1"
-      echo "Usage: $0 --container CONTAINER_NAME [--wordset WORDSET_NAME] [--file FILE_PATH] [--env ENV_NAME]"
+      echo "Usage: $0 --container CONTAINER_NAME [--wordset WORDSET_NAME] [--file FILE_PATH] [--format json|jsonl|csv] [--env ENV_NAME]"
       exit 1
       ;;
   esac
@@ -62,6 +67,10 @@ if [ -n "$FILE" ]; then
   CMD="$CMD --file \"$FILE\""
 fi
 
+if [ -n "$FORMAT" ]; then
+  CMD="$CMD --format $FORMAT"
+fi
+
 echo "Importing words to database..."
 echo "Command: $CMD"
 docker exec $CONTAINER bash -c "$CMD"